@@ -1,21 +1,21 @@
-import { exec as execCb, spawn } from 'child_process';
-import { promisify } from 'util';
+import { spawn } from 'child_process';
 import fs from 'fs';
 import path from 'path';
 import os from 'os';
 import { startSpinner } from './utils.mjs';
 import { loadConfig, getConfigValue } from './configLoader.mjs';
-
-const exec = promisify(execCb);
+import { withLimit } from './src/rateLimiter.mjs';
 
 /**
  * Secure FFmpeg execution using spawn instead of shell execution
+ * Runs under the shared ffmpeg limit (audio.ffmpeg.maxConcurrent) so
+ * concurrently processed files don't oversubscribe the CPU
  * @param {Array} args - FFmpeg arguments array
  * @param {string} operation - Operation description for logging
  * @returns {Promise} - Promise that resolves when FFmpeg completes
  */
 function secureFFmpegCall(args, operation = 'FFmpeg operation') {
-  return new Promise((resolve, reject) => {
+  return withLimit('ffmpeg', () => new Promise((resolve, reject) => {
     const ffmpeg = spawn('ffmpeg', args, {
       stdio: ['ignore', 'pipe', 'pipe']
     });
@@ -42,7 +42,7 @@ function secureFFmpegCall(args, operation = 'FFmpeg operation') {
     ffmpeg.on('error', (error) => {
       reject(new Error(`${operation} spawn error: ${error.message}`));
     });
-  });
+  }), operation);
 }
 
 /**
@@ -124,6 +124,52 @@ async function isVideoFile(filePath) {
   }
 }
 
+// Raw PCM written next to the converted audio for speaker identification
+export const PCM_SIDECAR_SAMPLE_RATE = 16000;
+
+/**
+ * Path of the raw PCM sidecar (16 kHz mono s16le) for a converted audio file
+ * @param {string} audioPath - Converted audio file path
+ * @returns {string} - Sidecar path (may not exist)
+ */
+export function pcmSidecarPath(audioPath) {
+  const parsed = path.parse(audioPath);
+  return path.join(parsed.dir, `${parsed.name}.16k.s16le`);
+}
+
+/**
+ * Path of the timeline sidecar written when silence is removed during conversion
+ * @param {string} audioPath - Converted audio file path
+ * @returns {string} - Sidecar path (may not exist)
+ */
+export function timelineSidecarPath(audioPath) {
+  const parsed = path.parse(audioPath);
+  return path.join(parsed.dir, `${parsed.name}.timeline.json`);
+}
+
+/**
+ * Path of the filter script used while converting an audio file
+ * @param {string} audioPath - Converted audio path
+ * @returns {string} - Script path in the same directory
+ */
+function filterScriptPath(audioPath) {
+  const parsed = path.parse(audioPath);
+  return path.join(parsed.dir, `${parsed.name}.filter`);
+}
+
+/**
+ * Read the timeline written next to a converted file
+ * @param {string} audioPath - Converted audio file path
+ * @returns {Object|null} - Timeline from buildTimeline, or null if the audio was not condensed
+ */
+export function readTimeline(audioPath) {
+  try {
+    return JSON.parse(fs.readFileSync(timelineSidecarPath(audioPath), 'utf8'));
+  } catch {
+    return null;
+  }
+}
+
 /**
  * Converts an audio or video file to a compressed AAC format optimized for transcription
  * @param {string} inputPath - Path to the input audio or video file
@@ -131,15 +177,31 @@ async function isVideoFile(filePath) {
  * @param {Object} [options] - Conversion options
  * @param {boolean} [options.forceAudioExtraction=false] - Force audio extraction mode even for audio files
  * @param {boolean} [options.lowQuality=false] - Use more aggressive compression (smaller files, lower quality)
+ * @param {boolean} [options.pcmSidecar] - Also write raw 16 kHz mono PCM for speaker identification
+ *   (defaults to on when speaker identification is enabled)
+ * @param {boolean} [options.removeSilence] - Cut long silences in the same pass
+ *   (default: audio.processing.silenceRemoval.enabled). A timeline sidecar for mapping
+ *   timestamps back to the input is written either way.
  * @returns {Promise<string>} - Path to the converted audio file
  */
-export async function convertToTempAAC(inputPath, tempDir, { forceAudioExtraction = false, lowQuality = false } = {}) {
+export async function convertToTempAAC(inputPath, tempDir, {
+  forceAudioExtraction = false,
+  lowQuality = false,
+  pcmSidecar = getConfigValue(config, 'speakerIdentification.enabled', false) &&
+    getConfigValue(config, 'speakerIdentification.pcmSidecar', true),
+  removeSilence = getConfigValue(config, 'audio.processing.silenceRemoval.enabled', false)
+} = {}) {
   const format = getConfigValue(config, 'audio.processing.format', 'm4a');
   const tempAAC = path.join(tempDir, `temp.${format}`);
+  const tempPCM = pcmSidecarPath(tempAAC);
+  const tempTimeline = timelineSidecarPath(tempAAC);
+  const tempFilter = filterScriptPath(tempAAC);
   // Ensure tempDir exists
   if (!fs.existsSync(tempDir)) fs.mkdirSync(tempDir, { recursive: true });
-  // Remove previous temp file if exists
-  if (fs.existsSync(tempAAC)) fs.unlinkSync(tempAAC);
+  // Remove previous temp files if they exist
+  for (const previous of [tempAAC, tempPCM, tempTimeline, tempFilter]) {
+    if (fs.existsSync(previous)) fs.unlinkSync(previous);
+  }
   
   // Detect if file is a video
   const isVideo = forceAudioExtraction || await isVideoFile(inputPath);
@@ -157,6 +219,28 @@ export async function convertToTempAAC(inputPath, tempDir, { forceAudioExtractio
     const speedAdjustment = getConfigValue(config, 'audio.processing.speedAdjustment', 1.5);
     const codec = getConfigValue(config, 'audio.processing.codec', 'aac');
     const channels = getConfigValue(config, 'audio.processing.channels', 1);
+
+    // Silence is cut before the tempo change, so cut times are in the input's timeline
+    let audioFilter = `atempo=${speedAdjustment}`;
+    let cuts = [];
+    if (removeSilence) {
+      const silences = await detectSilence(
+        inputPath,
+        getConfigValue(config, 'audio.processing.silenceRemoval.threshold', -25),
+        getConfigValue(config, 'audio.processing.silenceRemoval.duration', 0.5)
+      );
+      cuts = silenceCuts(silences, getConfigValue(config, 'audio.processing.silenceRemoval.keep', 0.25));
+      if (cuts.length > 0) {
+        audioFilter = `${silenceRemovalFilter(cuts)},${audioFilter}`;
+      }
+    }
+
+    // Long filter chains are read from a file instead of the command line
+    let filterArgs = ['-af', audioFilter];
+    if (cuts.length > 0) {
+      fs.writeFileSync(tempFilter, audioFilter);
+      filterArgs = ['-filter_script:a', tempFilter];
+    }
     
     let ffmpegArgs;
     if (isVideo) {
@@ -164,7 +248,7 @@ export async function convertToTempAAC(inputPath, tempDir, { forceAudioExtractio
       ffmpegArgs = [
         '-i', inputPath,
         '-vn',
-        '-af', `atempo=${speedAdjustment}`,
+        ...filterArgs,
         '-c:a', codec,
         '-b:a', bitrate,
         '-ar', samplerate.toString(),
@@ -177,7 +261,7 @@ export async function convertToTempAAC(inputPath, tempDir, { forceAudioExtractio
       // For audio files: just optimize for speech
       ffmpegArgs = [
         '-i', inputPath,
-        '-af', `atempo=${speedAdjustment}`,
+        ...filterArgs,
         '-c:a', codec,
         '-b:a', bitrate,
         '-ar', samplerate.toString(),
@@ -188,8 +272,23 @@ export async function convertToTempAAC(inputPath, tempDir, { forceAudioExtractio
       console.log(`Processing audio file (${lowQuality ? 'low' : 'normal'} quality)...`);
     }
 
+    if (pcmSidecar) {
+      // Second output of the same decode: the filtered audio as raw PCM, so
+      // speaker identification can memory-map it instead of decoding the AAC again
+      ffmpegArgs.splice(ffmpegArgs.indexOf(tempAAC) + 1, 0,
+        '-vn',
+        ...filterArgs,
+        '-ac', '1',
+        '-ar', PCM_SIDECAR_SAMPLE_RATE.toString(),
+        '-c:a', 'pcm_s16le',
+        '-f', 's16le',
+        tempPCM
+      );
+    }
+
     const result = await secureFFmpegCall(ffmpegArgs, `Processing ${isVideo ? 'video' : 'audio'} file`);
     stopSpinner(); // Stop the spinner animation when done
+    if (fs.existsSync(tempFilter)) fs.unlinkSync(tempFilter);
 
     // Validate that output file was created
     if (!fs.existsSync(tempAAC)) {
@@ -203,15 +302,26 @@ export async function convertToTempAAC(inputPath, tempDir, { forceAudioExtractio
     }
 
     console.log(`Converted file size: ${(stats.size / (1024 * 1024)).toFixed(2)} MB`);
+
+    // Transcript timestamps are mapped back to the original recording through
+    // this, so they mean the same with or without silence removal (speed only
+    // when nothing was cut)
+    const timeline = buildTimeline(cuts, speedAdjustment);
+    fs.writeFileSync(tempTimeline, JSON.stringify(timeline));
+    if (removeSilence) {
+      await logSilenceSaved(timeline, tempAAC, stats.size);
+    }
   } catch (error) {
     stopSpinner(); // Make sure to stop the spinner even if there's an error
 
-    // Clean up any partial output file
-    if (fs.existsSync(tempAAC)) {
-      try {
-        fs.unlinkSync(tempAAC);
-      } catch (cleanupError) {
-        console.warn(`Warning: Could not clean up partial output file: ${cleanupError.message}`);
+    // Clean up any partial output files
+    for (const partial of [tempAAC, tempPCM, tempTimeline, tempFilter]) {
+      if (fs.existsSync(partial)) {
+        try {
+          fs.unlinkSync(partial);
+        } catch (cleanupError) {
+          console.warn(`Warning: Could not clean up partial output file: ${cleanupError.message}`);
+        }
       }
     }
 
@@ -286,6 +396,22 @@ export function cleanupStaleTempDirs(maxAgeMs = 3600000) {
  * @returns {Promise<string[]>} - Array of paths to the chunk files
  */
 export async function splitAudioFile(audioFilePath, outputDir, maxSizeMB = null) {
+  const chunks = await splitAudioChunks(audioFilePath, outputDir, maxSizeMB);
+  return chunks.map(chunk => chunk.path);
+}
+
+/**
+ * Splits a large audio file into chunks in a single ffmpeg pass
+ * Cuts are placed in silences (audio.chunking.splitAtSilence) so words aren't
+ * split between chunks, and the segment muxer stream-copies the already
+ * converted audio instead of re-encoding it once per chunk
+ * @param {string} audioFilePath - Path to the audio file to split
+ * @param {string} outputDir - Directory to store the chunks
+ * @param {number} maxSizeMB - Maximum size in MB for each chunk
+ * @returns {Promise<Array<{path: string, start: number, end: number}>>} - Chunks in order,
+ *   with their offsets (seconds) in the input for stitching timestamps back together
+ */
+export async function splitAudioChunks(audioFilePath, outputDir, maxSizeMB = null) {
   // Get max size from config if not provided
   if (maxSizeMB === null) {
     maxSizeMB = getConfigValue(config, 'audio.chunking.maxSizeMB', 22);
@@ -294,9 +420,10 @@ export async function splitAudioFile(audioFilePath, outputDir, maxSizeMB = null)
   if (!fs.existsSync(outputDir)) fs.mkdirSync(outputDir, { recursive: true });
   
   // Get audio duration
-  const durationCmd = `ffprobe -v error -show_entries format=duration -of json "${audioFilePath}"`;
-  const { stdout: durationOutput } = await exec(durationCmd);
-  const duration = JSON.parse(durationOutput).format.duration;
+  const { stdout: durationOutput } = await secureFFprobeCall([
+    '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', audioFilePath
+  ], 'Reading audio duration');
+  const duration = parseFloat(JSON.parse(durationOutput).format.duration);
   
   // Get file size
   const stats = fs.statSync(audioFilePath);
@@ -304,54 +431,58 @@ export async function splitAudioFile(audioFilePath, outputDir, maxSizeMB = null)
   
   // If file is under the size limit, return the original path
   if (fileSizeMB <= maxSizeMB) {
-    return [audioFilePath];
+    return [{ path: audioFilePath, start: 0, end: duration }];
   }
   
   console.log(`File size ${fileSizeMB.toFixed(2)} MB exceeds ${maxSizeMB} MB limit. Splitting into chunks...`);
   
-  // Calculate number of chunks needed
-  const numberOfChunks = Math.ceil(fileSizeMB / maxSizeMB);
-  // Calculate duration of each chunk
-  const chunkDuration = Math.ceil(duration / numberOfChunks);
-  
-  const chunkPaths = [];
+  // Longest chunk that stays under the limit (5% headroom for bitrate variation)
+  const maxChunkDuration = duration * (maxSizeMB / fileSizeMB) * 0.95;
   const stopSpinnerSplit = startSpinner('Splitting audio file into chunks...');
   
   try {
-    // Get configuration for chunk processing
     const chunkPrefix = getConfigValue(config, 'audio.chunking.chunkPrefix', 'chunk_');
-    const speedAdjustment = getConfigValue(config, 'audio.processing.speedAdjustment', 1.5);
-    const codec = getConfigValue(config, 'audio.processing.codec', 'aac');
-    const bitrate = getConfigValue(config, 'audio.compression.normal.bitrate', '48k');
-    const sampleRate = getConfigValue(config, 'audio.compression.normal.sampleRate', 16000);
-    const channels = getConfigValue(config, 'audio.processing.channels', 1);
     const format = getConfigValue(config, 'audio.processing.format', 'm4a');
-    
-    // Split the file into chunks
-    for (let i = 0; i < numberOfChunks; i++) {
-      const startTime = i * chunkDuration;
-      const chunkPath = path.join(outputDir, `${chunkPrefix}${i.toString().padStart(3, '0')}.${format}`);
-      
-      // Use secure ffmpeg to extract chunk with config settings
-      const ffmpegArgs = [
-        '-i', audioFilePath,
-        '-ss', startTime.toString(),
-        '-t', chunkDuration.toString(),
-        '-af', `atempo=${speedAdjustment}`,
-        '-c:a', codec,
-        '-b:a', bitrate,
-        '-ar', sampleRate.toString(),
-        '-ac', channels.toString(),
-        chunkPath,
-        '-y'
-      ];
-      await secureFFmpegCall(ffmpegArgs, `Creating chunk ${i+1}/${numberOfChunks}`);
-      
-      chunkPaths.push(chunkPath);
-      console.log(`Created chunk ${i+1}/${numberOfChunks}: ${chunkPath}`);
+
+    let silences = [];
+    if (getConfigValue(config, 'audio.chunking.splitAtSilence', true)) {
+      silences = await detectSilence(
+        audioFilePath,
+        getConfigValue(config, 'audio.chunking.silenceThreshold', -30),
+        getConfigValue(config, 'audio.chunking.silenceMinDuration', 0.3)
+      );
     }
+    const cutPoints = chooseChunkCuts(duration, maxChunkDuration, silences);
+
+    const listPath = path.join(outputDir, `${chunkPrefix}list.csv`);
+    const ffmpegArgs = [
+      '-i', audioFilePath,
+      '-map', '0:a',
+      '-c', 'copy',
+      '-f', 'segment',
+      '-segment_times', cutPoints.map(t => t.toFixed(3)).join(','),
+      '-reset_timestamps', '1',
+      '-segment_list', listPath,
+      '-segment_list_type', 'csv',
+      path.join(outputDir, `${chunkPrefix}%03d.${format}`),
+      '-y'
+    ];
+    await secureFFmpegCall(ffmpegArgs, `Creating ${cutPoints.length + 1} chunks`);
+
+    // The list has the actual boundaries (cuts snap to the nearest audio packet)
+    const chunks = fs.readFileSync(listPath, 'utf8')
+      .split(/\r?\n/)
+      .filter(line => line.trim())
+      .map(line => {
+        const [name, start, end] = line.split(',');
+        return { path: path.join(outputDir, name), start: parseFloat(start), end: parseFloat(end) };
+      });
+    fs.unlinkSync(listPath);
+
     stopSpinnerSplit();
-    return chunkPaths;
+    const silenceCuts = silences.length > 0 ? ' at silences' : '';
+    console.log(`Created ${chunks.length} chunks${silenceCuts} (max ${formatTime(maxChunkDuration)} each)`);
+    return chunks;
   } catch (error) {
     stopSpinnerSplit();
     console.error('Error splitting audio file:', error.message);
@@ -359,6 +490,185 @@ export async function splitAudioFile(audioFilePath, outputDir, maxSizeMB = null)
   }
 }
 
+/**
+ * Choose chunk boundaries no more than maxChunkDuration apart, preferring the
+ * middle of the latest silence in the back half of each window
+ * @param {number} duration - Total duration in seconds
+ * @param {number} maxChunkDuration - Longest allowed chunk in seconds
+ * @param {Array} silences - Silence sections from parseSilenceOutput
+ * @returns {number[]} - Cut times in seconds (ascending, excluding 0 and duration)
+ */
+export function chooseChunkCuts(duration, maxChunkDuration, silences = []) {
+  const cuts = [];
+  let chunkStart = 0;
+
+  while (duration - chunkStart > maxChunkDuration) {
+    const latest = chunkStart + maxChunkDuration;
+    const earliest = chunkStart + maxChunkDuration / 2;
+    let cut = latest;
+
+    for (const silence of silences) {
+      const middle = (silence.start + silence.end) / 2;
+      if (middle > latest) break;
+      if (middle >= earliest) cut = middle;
+    }
+
+    cuts.push(cut);
+    chunkStart = cut;
+  }
+
+  return cuts;
+}
+
+/**
+ * Run ffmpeg's silencedetect over a file
+ * @param {string} audioFile - Path to audio file
+ * @param {number} threshold - dB threshold
+ * @param {number} minDuration - Minimum silence duration in seconds
+ * @returns {Promise<Array>} - Silence sections with start, end, duration
+ */
+async function detectSilence(audioFile, threshold, minDuration) {
+  const { stderr } = await secureFFmpegCall([
+    '-hide_banner', '-nostats',
+    '-i', audioFile,
+    '-vn',
+    '-af', `silencedetect=n=${threshold}dB:d=${minDuration}`,
+    '-f', 'null',
+    '-'
+  ], 'Detecting silence');
+  return parseSilenceOutput(stderr);
+}
+
+/**
+ * Spans to cut from detected silences, leaving some silence either side so
+ * speech onsets and trailing syllables are not clipped
+ * @param {Array} silences - Silence sections from parseSilenceOutput
+ * @param {number} keep - Seconds of silence kept at each edge
+ * @returns {Array<{start: number, end: number}>} - Spans to remove (input seconds, ascending)
+ */
+export function silenceCuts(silences, keep = 0.25) {
+  const cuts = [];
+  for (const silence of silences) {
+    const start = silence.start + keep;
+    const end = silence.end - keep;
+    // Cuts shorter than a few audio frames aren't worth a discontinuity
+    if (end - start >= 0.05) {
+      cuts.push({ start, end });
+    }
+  }
+  return cuts;
+}
+
+/**
+ * Filter that drops the cut spans and closes the gaps
+ * Frames are made small first so cuts land within a few milliseconds of the
+ * requested times, which is what the timeline assumes. The select expression
+ * is a binary search over the (sorted, non-overlapping) cuts, so each frame
+ * is tested against log2(cuts) spans rather than all of them. With hundreds
+ * of cuts it is too long for the command line; see convertToTempAAC.
+ * @param {Array<{start: number, end: number}>} cuts - Spans to remove
+ * @returns {string} - Comma-separated audio filter chain
+ */
+export function silenceRemovalFilter(cuts) {
+  const keep = (first, last) => {
+    if (first === last) {
+      return `not(between(t,${cuts[first].start.toFixed(3)},${cuts[first].end.toFixed(3)}))`;
+    }
+    const middle = Math.ceil((first + last) / 2);
+    return `if(lt(t,${cuts[middle].start.toFixed(3)}),${keep(first, middle - 1)},${keep(middle, last)})`;
+  };
+  return `asetnsamples=n=256:p=0,aselect='${keep(0, cuts.length - 1)}',asetpts=N/SR/TB`;
+}
+
+/**
+ * Timeline of a converted file relative to its input: the tempo change plus,
+ * for each cut, where it falls in the condensed audio and the total seconds
+ * removed up to and including it
+ * @param {Array<{start: number, end: number}>} cuts - Spans removed (input seconds)
+ * @param {number} speed - atempo factor applied after the cuts
+ * @returns {Object} - { speed, removedSeconds, shifts: [{ at, offset }] }
+ */
+export function buildTimeline(cuts, speed = 1) {
+  let removed = 0;
+  const shifts = cuts.map(cut => {
+    const at = cut.start - removed;
+    removed += cut.end - cut.start;
+    return { at, offset: removed };
+  });
+  return { speed, removedSeconds: removed, shifts };
+}
+
+/**
+ * Map a time in the converted audio back to the original recording
+ * @param {number} time - Seconds in the converted audio
+ * @param {Object|null} timeline - From buildTimeline (null leaves the time unchanged)
+ * @returns {number} - Seconds in the original recording
+ */
+export function toOriginalTime(time, timeline) {
+  if (!timeline || !Number.isFinite(time)) return time;
+  const condensed = time * timeline.speed;
+
+  // Last cut strictly before this point (a time on a cut stays before the gap)
+  const { shifts } = timeline;
+  let low = 0;
+  let high = shifts.length;
+  while (low < high) {
+    const middle = (low + high) >> 1;
+    if (shifts[middle].at < condensed) {
+      low = middle + 1;
+    } else {
+      high = middle;
+    }
+  }
+  return condensed + (low > 0 ? shifts[low - 1].offset : 0);
+}
+
+/**
+ * Rewrite a transcription's segment times (and duration) in place from the
+ * converted audio's timeline to the original recording's
+ * @param {Object} transcriptionData - Verbose Scribe/Whisper result
+ * @param {Object|null} timeline - From readTimeline (null is a no-op)
+ * @returns {Object} - The same transcriptionData
+ */
+export function remapTranscriptionTimes(transcriptionData, timeline) {
+  if (!timeline || !transcriptionData || typeof transcriptionData !== 'object') return transcriptionData;
+
+  for (const segment of transcriptionData.segments || []) {
+    segment.start = toOriginalTime(segment.start, timeline);
+    segment.end = toOriginalTime(segment.end, timeline);
+  }
+  if (Number.isFinite(transcriptionData.duration)) {
+    transcriptionData.duration = toOriginalTime(transcriptionData.duration, timeline);
+  }
+  return transcriptionData;
+}
+
+/**
+ * Report how much silence removal saved on a converted file
+ * @param {Object} timeline - From buildTimeline
+ * @param {string} convertedPath - Condensed output
+ * @param {number} convertedBytes - Its size
+ */
+async function logSilenceSaved(timeline, convertedPath, convertedBytes) {
+  if (timeline.removedSeconds <= 0) {
+    console.log('Silence removal: no silences long enough to cut');
+    return;
+  }
+  try {
+    const { stdout } = await secureFFprobeCall([
+      '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', convertedPath
+    ], 'Reading audio duration');
+    // Kept audio in input seconds; bytes saved are estimated at the output's bitrate
+    const keptSeconds = parseFloat(JSON.parse(stdout).format.duration) * timeline.speed;
+    const percent = (timeline.removedSeconds / (keptSeconds + timeline.removedSeconds)) * 100;
+    const bytesSaved = convertedBytes * (timeline.removedSeconds / keptSeconds);
+    console.log(`Silence removal: cut ${formatTime(timeline.removedSeconds)} (${percent.toFixed(0)}%) ` +
+      `in ${timeline.shifts.length} places, about ${(bytesSaved / (1024 * 1024)).toFixed(2)} MB less to upload`);
+  } catch {
+    console.log(`Silence removal: cut ${formatTime(timeline.removedSeconds)} in ${timeline.shifts.length} places`);
+  }
+}
+
 /**
  * Format seconds to human-readable time string
  * @param {number} seconds - Time in seconds
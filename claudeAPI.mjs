@@ -1,9 +1,12 @@
 import axios from 'axios';
 import fs from 'fs';
+import os from 'os';
 import path from 'path';
+import crypto from 'crypto';
 import { fileURLToPath } from 'url';
 import { startSpinner, sanitizeFilename } from './utils.mjs';
 import { retryWithBackoff, defaultShouldRetry } from './retryUtils.mjs';
+import { withLimit, Semaphore } from './src/rateLimiter.mjs';
 import { resolveModel, checkForNewerModels, FALLBACK_MODEL } from './modelChecker.mjs';
 import logger, { LogCategory, LogStatus } from './src/logger.mjs';
 import { loadConfig, getConfigValue } from './configLoader.mjs';
@@ -184,6 +187,270 @@ function getContentTypeFromPath(filePath) {
   return 'audio'; // Default to audio for any other extension
 }
 
+/**
+ * Base URL of the Messages API (ANTHROPIC_BASE_URL points tests at a local stub server)
+ * @returns {string}
+ */
+function anthropicBaseUrl() {
+  return (process.env.ANTHROPIC_BASE_URL || 'https://api.anthropic.com').replace(/\/+$/, '');
+}
+
+/**
+ * Retry options shared by every Claude request
+ * @param {string} operation - Operation name for logging
+ * @returns {Object}
+ */
+function claudeRetryOptions(operation = 'Claude API request') {
+  return {
+    maxRetries: 3,
+    operation,
+    shouldRetry: (error) => {
+      // Check for rate limit errors
+      if (error.response && error.response.status === 429) {
+        logger.warn(LogCategory.API, 'Claude API rate limit hit, will retry');
+        return true;
+      }
+      // Use default retry logic for other errors
+      return defaultShouldRetry(error);
+    }
+  };
+}
+
+/**
+ * Send one prompt to the Messages API (with retries and the Anthropic rate limit)
+ * @param {string} prompt - User message
+ * @param {Object} options
+ * @param {string} options.model - Model ID
+ * @param {string} options.apiKey - Anthropic API key
+ * @param {number} [options.maxTokens=16000] - Response token limit
+ * @param {number|null} [options.thinkingBudget=10000] - Extended thinking budget (null = off)
+ * @param {string} [options.operation] - Operation name for retry logs
+ * @returns {Promise<string>} - Text of the response ('' if it had no text block)
+ */
+async function requestClaude(prompt, { model, apiKey, maxTokens = 16000, thinkingBudget = 10000, operation } = {}) {
+  const body = {
+    model,
+    max_tokens: maxTokens,
+    messages: [
+      { role: 'user', content: prompt }
+    ]
+  };
+  if (thinkingBudget) {
+    body.thinking = { type: 'enabled', budget_tokens: thinkingBudget };
+  }
+
+  const response = await retryWithBackoff(async () => {
+    return await withLimit('anthropic', () => axios.post(`${anthropicBaseUrl()}/v1/messages`, body, {
+      headers: {
+        'x-api-key': apiKey,
+        'anthropic-version': '2023-06-01',
+        'content-type': 'application/json'
+      },
+      timeout: parseInt(process.env.CLAUDE_TIMEOUT_SECONDS) * 1000 || 120000 // 2 minutes default
+    }));
+  }, claudeRetryOptions(operation));
+
+  // Extract content based on Messages API structure
+  // Find the content block with type: "text"
+  let textBlock = null;
+  if (response.data && response.data.content && Array.isArray(response.data.content)) {
+    textBlock = response.data.content.find(block => block.type === 'text');
+  }
+
+  if (textBlock && textBlock.text) {
+    return textBlock.text;
+  }
+  // Log if the expected content structure is not found
+  logger.warn(LogCategory.API, 'Claude response did not contain a text block in the content array', null, response.data);
+  return '';
+}
+
+/**
+ * Format seconds as [MM:SS] for transcript pieces
+ */
+function pieceTimestamp(seconds) {
+  const total = Math.max(0, Math.floor(seconds || 0));
+  return `${String(Math.floor(total / 60)).padStart(2, '0')}:${String(total % 60).padStart(2, '0')}`;
+}
+
+/**
+ * Break text into chunks of at most maxChars, at whitespace where possible
+ * @param {string} text - Text to wrap
+ * @param {number} maxChars - Maximum chunk length
+ * @returns {Array<string>}
+ */
+function wrapText(text, maxChars) {
+  const chunks = [];
+  let rest = text;
+  while (rest.length > maxChars) {
+    // Last whitespace that keeps the chunk within maxChars; cut mid-word if there is none
+    const breakAt = rest.slice(0, maxChars + 1).search(/\s\S*$/);
+    const cut = breakAt > 0 ? breakAt : maxChars;
+    chunks.push(rest.slice(0, cut).trimEnd());
+    rest = rest.slice(cut).trimStart();
+  }
+  if (rest) chunks.push(rest);
+  return chunks;
+}
+
+/**
+ * Split a long transcript into pieces of at most maxChars
+ * With segments, pieces are built from whole timestamped segments and end at a
+ * speaker change once they are reasonably full; otherwise the text is split
+ * at sentence boundaries. A single segment or sentence longer than maxChars
+ * is wrapped at whitespace (each part of a segment keeps its timestamp).
+ * @param {string} transcript - Plain transcript text
+ * @param {Array|null} segments - Segments ({start, end, text, speaker?}) if available
+ * @param {number} maxChars - Target maximum piece length
+ * @returns {Array<{text: string, start: number|null, end: number|null}>}
+ */
+export function splitTranscript(transcript, segments, maxChars) {
+  const units = Array.isArray(segments) && segments.length > 0
+    ? segments.flatMap(segment => {
+        const prefix = `[${pieceTimestamp(segment.start)}] ${segment.speaker ? `${segment.speaker}: ` : ''}`;
+        return wrapText((segment.text || '').trim(), Math.max(1, maxChars - prefix.length)).map(text => ({
+          text: prefix + text,
+          speaker: segment.speaker || null,
+          start: segment.start,
+          end: segment.end
+        }));
+      })
+    : transcript.split(/(?<=[.!?])\s+/).flatMap(sentence => wrapText(sentence, maxChars))
+      .map(text => ({ text, speaker: null, start: null, end: null }));
+
+  const pieces = [];
+  let current = [];
+  let length = 0;
+
+  const flush = () => {
+    if (current.length === 0) return;
+    const separator = current[0].start !== null ? '\n' : ' ';
+    pieces.push({
+      text: current.map(unit => unit.text).join(separator),
+      start: current[0].start,
+      end: current[current.length - 1].end
+    });
+    current = [];
+    length = 0;
+  };
+
+  for (const unit of units) {
+    const previous = current[current.length - 1];
+    const speakerChanged = previous && unit.speaker && previous.speaker !== unit.speaker;
+    if (length + unit.text.length > maxChars || (speakerChanged && length >= maxChars * 0.75)) {
+      flush();
+    }
+    current.push(unit);
+    length += unit.text.length + 1;
+  }
+  flush();
+
+  return pieces;
+}
+
+function summaryCacheDir() {
+  const configured = runtimeConfig ? getConfigValue(runtimeConfig, 'claude.longTranscript.cacheDir', null) : null;
+  const dir = configured || path.join(os.homedir(), '.summarai', 'cache', 'summaries');
+  return dir.startsWith('~') ? path.join(os.homedir(), dir.slice(1)) : dir;
+}
+
+function pieceCachePath(model, prompt) {
+  const key = crypto.createHash('sha256').update(`${model}\n${prompt}`).digest('hex');
+  return path.join(summaryCacheDir(), `${key}.json`);
+}
+
+/**
+ * Summarize a long transcript in two steps: each piece is summarized
+ * concurrently (map), then one request merges the partial summaries following
+ * the normal instructions (reduce). Piece summaries are cached until the
+ * reduce succeeds, so a failed reduce doesn't pay for the map step again.
+ * @param {string} transcript - Plain transcript text
+ * @param {Object} options
+ * @param {Array|null} options.segments - Timestamped segments, used to split on segment/speaker boundaries
+ * @param {string} options.model - Model ID
+ * @param {string} options.apiKey - Anthropic API key
+ * @param {string} options.instructionsNote - Instructions for the final response
+ * @param {string} options.nomenclatureNote - Terms list
+ * @param {string} [options.sourceLabel='audio transcription'] - What the transcript is from
+ * @param {string} [options.transcriptNote=''] - Context placed before the transcript (e.g. identified speakers)
+ * @param {number} [options.pieceChars] - Target piece size (default: claude.longTranscript.pieceChars)
+ * @param {number} [options.concurrency] - Pieces in flight (default: claude.longTranscript.concurrency)
+ * @returns {Promise<string>} - Final response text
+ */
+export async function summarizeInPieces(transcript, {
+  segments = null,
+  model,
+  apiKey,
+  instructionsNote = '',
+  nomenclatureNote = '',
+  sourceLabel = 'audio transcription',
+  transcriptNote = '',
+  pieceChars = getConfigValue(runtimeConfig, 'claude.longTranscript.pieceChars', 30000),
+  concurrency = getConfigValue(runtimeConfig, 'claude.longTranscript.concurrency', 3)
+}) {
+  const pieces = splitTranscript(transcript, segments, pieceChars);
+  const slots = new Semaphore(concurrency);
+
+  logger.info(LogCategory.API, `Long transcript (${transcript.length} characters): summarizing ${pieces.length} pieces, then merging`);
+
+  const cacheFiles = [];
+  let completed = 0;
+  const partials = await Promise.all(pieces.map(async (piece, index) => {
+    const range = piece.start !== null ? ` (${pieceTimestamp(piece.start)} - ${pieceTimestamp(piece.end)})` : '';
+    const prompt = `${nomenclatureNote}${transcriptNote}This is part ${index + 1} of ${pieces.length}${range} of a long ${sourceLabel}. ` +
+      'The parts will be merged into one summary later, so do not write a title or overall conclusion. ' +
+      'Summarize this part in detail as bullet points: topics and technical content, decisions, action items or tasks, ' +
+      'people and participants, and any words said right after "keyword", "directory" or "task".\n\n' +
+      piece.text;
+
+    const cacheFile = pieceCachePath(model, prompt);
+    cacheFiles.push(cacheFile);
+    try {
+      const cached = JSON.parse(fs.readFileSync(cacheFile, 'utf8'));
+      logger.debug(LogCategory.API, `Using cached summary for part ${index + 1}/${pieces.length}`);
+      return cached.summary;
+    } catch {
+      // Not cached yet
+    }
+
+    await slots.acquire();
+    let summary;
+    try {
+      summary = await requestClaude(prompt, {
+        model,
+        apiKey,
+        maxTokens: 4000,
+        thinkingBudget: null,
+        operation: `Claude summary of part ${index + 1}/${pieces.length}`
+      });
+    } finally {
+      slots.release();
+    }
+
+    try {
+      fs.mkdirSync(path.dirname(cacheFile), { recursive: true });
+      fs.writeFileSync(cacheFile, JSON.stringify({ createdAt: new Date().toISOString(), summary }));
+    } catch (err) {
+      logger.warn(LogCategory.API, `Could not cache part summary: ${err.message}`);
+    }
+    logger.info(LogCategory.API, `Summarized part ${index + 1}/${pieces.length} (${++completed} done)`);
+    return summary;
+  }));
+
+  const reducePrompt = `${instructionsNote}${nomenclatureNote}${transcriptNote}This ${sourceLabel} was too long to send at once, ` +
+    `so it was summarized in ${pieces.length} consecutive parts. Using the part summaries below (in order), ` +
+    'write the response the instructions ask for, as if you had read the full transcript.\n\n' +
+    partials.map((summary, index) => `## Part ${index + 1} of ${pieces.length}\n${summary}`).join('\n\n');
+
+  const merged = await requestClaude(reducePrompt, { model, apiKey, operation: 'Claude merge of part summaries' });
+
+  // The merged summary supersedes the cached parts
+  for (const cacheFile of cacheFiles) {
+    try { fs.unlinkSync(cacheFile); } catch { /* already gone */ }
+  }
+  return merged;
+}
+
 /**
  * Sends transcript to Claude for summarization and processing
  * @param {string} transcript - Transcript text to send
@@ -194,9 +461,12 @@ function getContentTypeFromPath(filePath) {
  * @param {string} originalFileName - Original filename to preserve date prefix from
  * @param {string} filePathToCopy - Actual file path to copy (defaults to filePath) - use for compressed/processed files
  * @param {Object} sourceMetadata - Optional metadata from input handlers (YouTube, etc.)
+ * @param {Object} [options]
+ * @param {Array} [options.segments] - Timestamped segments; long transcripts are split on their boundaries
+ * @param {string} [options.transcriptNote] - Context placed before the transcript in every prompt (e.g. identified speakers)
  * @returns {Promise<Object>} - Result with finalName, targetDir, and mdFilePath
  */
-export async function sendToClaude(transcript, filePath, recordingDateTimePrefix, recordingDateTime, outputDir, originalFileName = null, filePathToCopy = null, sourceMetadata = null) {
+export async function sendToClaude(transcript, filePath, recordingDateTimePrefix, recordingDateTime, outputDir, originalFileName = null, filePathToCopy = null, sourceMetadata = null, { segments = null, transcriptNote = '' } = {}) {
   // Get API key at runtime, after dotenv has loaded it
   const ANTHROPIC_API_KEY = process.env.ANTHROPIC_API_KEY;
 
@@ -223,33 +493,18 @@ export async function sendToClaude(transcript, filePath, recordingDateTimePrefix
   let prompt;
   if (contentType === 'youtube') {
     // For YouTube, include both primary and fallback transcripts if available
-    prompt = `${instructionsNote}${nomenclatureNote}Here is the transcription from a YouTube video:\n\n## Primary Transcript (ElevenLabs Scribe - most accurate)\n${transcript}`;
+    prompt = `${instructionsNote}${nomenclatureNote}Here is the transcription from a YouTube video:\n\n## Primary Transcript (ElevenLabs Scribe - most accurate)\n${transcriptNote}${transcript}`;
     if (sourceMetadata?.fallbackTranscript) {
       prompt += `\n\n## Reference Transcript (YouTube API - for cross-reference)\n${sourceMetadata.fallbackTranscript}`;
     }
   } else if (contentType === 'video') {
-    prompt = `${instructionsNote}${nomenclatureNote}Here is the transcription from a video file:\n${transcript}`;
+    prompt = `${instructionsNote}${nomenclatureNote}Here is the transcription from a video file:\n${transcriptNote}${transcript}`;
   } else {
-    prompt = `${instructionsNote}${nomenclatureNote}Here is the audio transcription:\n${transcript}`;
+    prompt = `${instructionsNote}${nomenclatureNote}Here is the audio transcription:\n${transcriptNote}${transcript}`;
   }
   const spinnerStop = startSpinner('Sending to Claude...');
   let claudeText = '';
   try {
-    // Define retry options for Claude API
-    const retryOptions = {
-      maxRetries: 3,
-      operation: 'Claude API request',
-      shouldRetry: (error) => {
-        // Check for rate limit errors
-        if (error.response && error.response.status === 429) {
-          logger.warn(LogCategory.API, 'Claude API rate limit hit, will retry');
-          return true;
-        }
-        // Use default retry logic for other errors
-        return defaultShouldRetry(error);
-      }
-    };
-
     // Model selection: supports tier shorthands (opus, sonnet, haiku) or full model IDs
     // Default to "opus" which auto-resolves to the latest opus model via the API
     let currentModel = FALLBACK_MODEL;
@@ -272,45 +527,26 @@ export async function sendToClaude(transcript, filePath, recordingDateTimePrefix
       });
     }
 
-    // Call Claude API with retry logic
-    const response = await retryWithBackoff(async () => {
-      return await axios.post('https://api.anthropic.com/v1/messages', {
+    const longThreshold = getConfigValue(runtimeConfig, 'claude.longTranscript.thresholdChars', 100000);
+    const longEnabled = getConfigValue(runtimeConfig, 'claude.longTranscript.enabled', true);
+
+    if (longEnabled && transcript.length > longThreshold) {
+      // Map-reduce for multi-hour recordings; the YouTube reference transcript is
+      // left out here since it would be just as long
+      spinnerStop();
+      claudeText = await summarizeInPieces(transcript, {
+        segments,
         model: currentModel,
-        max_tokens: 16000,
-        thinking: {
-          type: 'enabled',
-          budget_tokens: 10000
-        },
-        messages: [
-          { role: 'user', content: prompt }
-        ]
-      }, {
-        headers: {
-          'x-api-key': ANTHROPIC_API_KEY,
-          'anthropic-version': '2023-06-01',
-          'content-type': 'application/json'
-        },
-        timeout: parseInt(process.env.CLAUDE_TIMEOUT_SECONDS) * 1000 || 120000 // 2 minutes default
+        apiKey: ANTHROPIC_API_KEY,
+        instructionsNote,
+        nomenclatureNote,
+        transcriptNote,
+        sourceLabel: contentType === 'youtube' ? 'YouTube video transcript' : `${contentType} transcription`
       });
-    }, retryOptions);
-    
-    spinnerStop();
-
-    // Response received from Claude API
-
-    // Extract content based on Messages API structure
-    // Find the content block with type: "text"
-    let textBlock = null;
-    if (response.data && response.data.content && Array.isArray(response.data.content)) {
-      textBlock = response.data.content.find(block => block.type === 'text');
-    }
-
-    if (textBlock && textBlock.text) {
-      claudeText = textBlock.text;
     } else {
-      // Log if the expected content structure is not found
-      logger.warn(LogCategory.API, 'Claude response did not contain a text block in the content array', null, response.data);
-      claudeText = ''; // Default to empty string if no valid content
+      // Call Claude API with retry logic
+      claudeText = await requestClaude(prompt, { model: currentModel, apiKey: ANTHROPIC_API_KEY });
+      spinnerStop();
     }
 
     if (!claudeText.trim()) { // Check if claudeText is empty or only whitespace
@@ -1,8 +1,8 @@
 import fs from 'fs';
 import path from 'path';
 import os from 'os';
+import crypto from 'crypto';
 import { fileURLToPath } from 'url';
-import { validateConfig as validateConfigSchema } from './src/configSchema.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -13,6 +13,117 @@ export function getLastConfigPath() {
   return lastConfigPath;
 }
 
+// Every module loads the config when it is imported. The parsed file is kept
+// (here and in a snapshot under ~/.summarai/cache) until its mtime or size
+// changes, and the Zod schema check - warnings only - runs once per file
+// version after startup instead of on every load.
+const SNAPSHOT_VERSION = 1;
+const SCHEMA_CHECK_DELAY_MS = 2000;
+
+// configPath -> { mtimeMs, size, parsed, schema }
+const parsedConfigs = new Map();
+// Schema checks already run or scheduled in this process
+const schemaChecked = new Set();
+
+function snapshotPath() {
+  return path.join(os.homedir(), '.summarai', 'cache', 'config-snapshot.json');
+}
+
+function readSnapshots() {
+  try {
+    return JSON.parse(fs.readFileSync(snapshotPath(), 'utf8'));
+  } catch {
+    return {};
+  }
+}
+
+function writeSnapshot(configPath, entry) {
+  const file = snapshotPath();
+  const tempFile = `${file}.${process.pid}.tmp`;
+  try {
+    const snapshots = readSnapshots();
+    snapshots[configPath] = entry;
+    fs.mkdirSync(path.dirname(file), { recursive: true });
+    fs.writeFileSync(tempFile, JSON.stringify(snapshots));
+    fs.renameSync(tempFile, file);
+  } catch {
+    // The snapshot only saves work; a config that can't be cached still loads
+    try { fs.unlinkSync(tempFile); } catch { /* ignore */ }
+  }
+}
+
+/**
+ * Parsed YAML for a config file, reused while the file is unchanged
+ * @param {string} configPath - Config file
+ * @returns {Object} - { version, mtimeMs, size, parsed, schema }
+ */
+function readParsedConfig(configPath) {
+  const stats = fs.statSync(configPath);
+  const unchanged = entry => entry?.version === SNAPSHOT_VERSION &&
+    entry.mtimeMs === stats.mtimeMs && entry.size === stats.size;
+
+  let entry = parsedConfigs.get(configPath);
+  if (unchanged(entry)) return entry;
+
+  entry = readSnapshots()[configPath];
+  if (!unchanged(entry)) {
+    entry = {
+      version: SNAPSHOT_VERSION,
+      mtimeMs: stats.mtimeMs,
+      size: stats.size,
+      parsed: parseYAML(fs.readFileSync(configPath, 'utf8')),
+      schema: null
+    };
+    writeSnapshot(configPath, entry);
+  }
+  parsedConfigs.set(configPath, entry);
+  return entry;
+}
+
+function printSchemaWarnings(warnings) {
+  if (warnings.length > 0) {
+    console.warn('[config] Schema validation warnings:', warnings.join(', '));
+  }
+}
+
+/**
+ * Run the Zod schema check for a loaded config unless this file version (with
+ * the same PROCESSVM_* overrides) was already checked
+ * @param {string} configPath - Config file
+ * @param {Object} entry - From readParsedConfig
+ * @param {Object} config - Final config (paths expanded, overrides applied)
+ */
+function scheduleSchemaCheck(configPath, entry, config) {
+  const overrides = Object.keys(process.env)
+    .filter(key => key.startsWith('PROCESSVM_'))
+    .sort()
+    .map(key => `${key}=${process.env[key]}`)
+    .join('\n');
+  const env = crypto.createHash('sha1').update(overrides).digest('hex');
+  const key = `${configPath}\n${entry.mtimeMs}\n${entry.size}\n${env}`;
+  if (schemaChecked.has(key)) return;
+  schemaChecked.add(key);
+
+  if (entry.schema?.env === env) {
+    printSchemaWarnings(entry.schema.warnings);
+    return;
+  }
+
+  // Zod is only needed for this check, so it is imported here, after startup
+  setTimeout(async () => {
+    try {
+      const { validateConfig: validateConfigSchema } = await import('./src/configSchema.mjs');
+      const schemaResult = validateConfigSchema(config);
+      const warnings = schemaResult.success ? [] : schemaResult.errors;
+      printSchemaWarnings(warnings);
+      entry.schema = { env, warnings };
+      writeSnapshot(configPath, entry);
+    } catch {
+      // Schema validation is advisory
+    }
+  }, SCHEMA_CHECK_DELAY_MS).unref();
+}
+
 // We'll use a basic YAML parser to avoid adding dependencies for now
 // This is a simple YAML parser for our specific use case
 function parseSimpleYAML(yamlContent) {
@@ -417,12 +528,11 @@ export function loadConfig(configPath = null) {
   try {
     // Record path for diagnostics
     lastConfigPath = configPath;
-    // Read and parse YAML
-    const yamlContent = fs.readFileSync(configPath, 'utf8');
-    let config = parseYAML(yamlContent);
+    // Read and parse YAML (cached until the file changes)
+    const entry = readParsedConfig(configPath);
     
-    // Expand file paths
-    config = expandPaths(config);
+    // Expand file paths (builds a new object, so the cached parse is never modified)
+    let config = expandPaths(entry.parsed);
     
     // Apply environment overrides if enabled
     if (config.envOverride !== false) {
@@ -435,11 +545,8 @@ export function loadConfig(configPath = null) {
       throw new Error(`Configuration validation failed:\\n${errors.join('\\n')}`);
     }
 
-    // Schema validation with Zod (warnings only, non-blocking)
-    const schemaResult = validateConfigSchema(config);
-    if (!schemaResult.success) {
-      console.warn('[config] Schema validation warnings:', schemaResult.errors.join(', '));
-    }
+    // Schema validation with Zod (warnings only, deferred)
+    scheduleSchemaCheck(configPath, entry, config);
 
     return config;
   } catch (error) {
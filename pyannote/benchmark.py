@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for speaker_id.py.
+
+Generates synthetic multi-speaker WAV recordings and segment lists, enrolls
+profiles and runs identify through the same request handler Node uses, then
+writes end-to-end and per-stage latency, peak RSS, throughput and accuracy as
+JSON so results can be compared between commits. Each case runs in a fresh
+process so its peak RSS is its own, not the largest case run before it.
+
+Usage:
+    python3 benchmark.py                                   # default grid, stub backend
+    python3 benchmark.py --profiles 1,100,1000 --segments 10,200 --output bench.json
+    python3 benchmark.py --backend pyannote                # real model (needs HUGGINGFACE_TOKEN)
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import speaker_id  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def speaker_voice(index, seed):
+    """Pitch and formant parameters of a synthetic speaker."""
+    rng = np.random.default_rng(seed * 100003 + index)
+    return {
+        'f0': float(rng.uniform(85.0, 260.0)),
+        'formants': [float(f) for f in sorted(rng.uniform([300, 900, 2000], [900, 2200, 3500]))],
+        'bandwidth': float(rng.uniform(80.0, 200.0)),
+    }
+
+
+def synthesize(voice, seconds, rng):
+    """A harmonic tone shaped by the speaker's formants, with slight vibrato and noise."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = voice['f0'] * (1.0 + 0.02 * np.sin(2 * np.pi * 5.0 * t + rng.uniform(0, 2 * np.pi)))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+
+    signal = np.zeros_like(t)
+    for harmonic in range(1, int(4000 // voice['f0']) + 1):
+        frequency = harmonic * voice['f0']
+        gain = sum(
+            np.exp(-((frequency - formant) ** 2) / (2 * voice['bandwidth'] ** 2))
+            for formant in voice['formants']
+        ) + 0.05 / harmonic
+        signal += gain * np.sin(harmonic * phase)
+
+    signal += 0.01 * rng.standard_normal(t.size)
+    return (0.3 * signal / (np.abs(signal).max() or 1.0)).astype(np.float32)
+
+
+def write_wav(path, samples):
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+
+
+def build_recording(voices, num_segments, rng):
+    """Alternate speakers over num_segments turns; returns (samples, segments)."""
+    pieces = []
+    segments = []
+    cursor = 0.0
+    for turn in range(num_segments):
+        speaker = turn % len(voices)
+        seconds = float(rng.uniform(1.5, 4.0))
+        pieces.append(synthesize(voices[speaker], seconds, rng))
+        segments.append({
+            'speaker_id': f'speaker_{speaker}',
+            'start': round(cursor, 3),
+            'end': round(cursor + seconds, 3),
+            'text': f'turn {turn}'
+        })
+        cursor += seconds
+    return np.concatenate(pieces), segments
+
+
+def request(payload):
+    """Run one request through speaker_id's handler and time it end to end."""
+    started = time.perf_counter()
+    response = speaker_id.handle_request(json.dumps(payload))
+    return response, time.perf_counter() - started
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def build_library(workdir, num_profiles, args):
+    """Enroll num_profiles synthetic voices; returns (profiles_dir, voices, enroll stats)."""
+    rng = np.random.default_rng(args.seed + num_profiles * 7919)
+    profiles_dir = workdir / 'profiles'
+    profiles_dir.mkdir(parents=True)
+
+    voices = [speaker_voice(index, args.seed) for index in range(num_profiles)]
+    model = speaker_id.get_model(backend=args.backend)
+    version = speaker_id.backend_version(args.backend)
+
+    # Most profiles are written in bulk; the last few go through the enroll
+    # action so its latency is measured on a realistically sized library
+    enrolled_via_action = min(num_profiles, args.enroll_samples)
+    bulk = num_profiles - enrolled_via_action
+
+    started = time.perf_counter()
+    for index in range(bulk):
+        profile_path = profiles_dir / f'speaker_{index:05d}'
+        profile_path.mkdir()
+        sample = synthesize(voices[index], args.enroll_seconds, rng)
+        embedding = np.asarray(model({'waveform': sample[None, :], 'sample_rate': SAMPLE_RATE}))
+        np.save(profile_path / 'embedding.npy', embedding)
+        with open(profile_path / 'metadata.json', 'w') as f:
+            json.dump({
+                'name': f'Speaker {index:05d}',
+                'display_name': f'Speaker {index:05d}',
+                'profile_id': profile_path.name,
+                'embedding_version': version
+            }, f)
+    speaker_id.update_profile_index(profiles_dir, backend=args.backend)
+    bulk_seconds = time.perf_counter() - started
+
+    enroll_latencies = []
+    for index in range(bulk, num_profiles):
+        sample_path = workdir / f'enroll_{index}.wav'
+        write_wav(sample_path, synthesize(voices[index], args.enroll_seconds, rng))
+        response, seconds = request({
+            'action': 'enroll',
+            'name': f'Speaker {index:05d}',
+            'audio_path': str(sample_path),
+            'profiles_dir': str(profiles_dir),
+            'backend': args.backend
+        })
+        if response.get('success') is False:
+            raise RuntimeError(f'enroll failed: {response.get("error")}')
+        enroll_latencies.append(seconds)
+
+    return profiles_dir, voices, {
+        'bulk_index_seconds': round(bulk_seconds, 4),
+        'action_latency_seconds': [round(seconds, 4) for seconds in enroll_latencies],
+        'action_mean_seconds': round(float(np.mean(enroll_latencies)), 4) if enroll_latencies else None
+    }
+
+
+def run_case(workdir, profiles_dir, voices, num_segments, args):
+    """Identify one synthetic recording of num_segments turns against the library."""
+    num_profiles = len(voices)
+    rng = np.random.default_rng(args.seed + num_profiles * 7919 + num_segments)
+
+    # The recording features the last few enrolled voices
+    present = list(range(num_profiles))[-min(num_profiles, args.speakers):]
+    samples, segments = build_recording([voices[index] for index in present], num_segments, rng)
+    recording_path = workdir / f'recording_{num_segments}.wav'
+    write_wav(recording_path, samples)
+    truth = {
+        f'speaker_{position}': f'Speaker {index:05d}'
+        for position, index in enumerate(present)
+        if any(seg['speaker_id'] == f'speaker_{position}' for seg in segments)
+    }
+
+    identify_payload = {
+        'action': 'identify',
+        'audio_path': str(recording_path),
+        'segments': segments,
+        'profiles_dir': str(profiles_dir),
+        'backend': args.backend,
+        'threshold': args.threshold
+    }
+
+    runs = []
+    for _ in range(args.repeat):
+        # Each run re-reads the profile store, as a fresh request would
+        speaker_id._profiles_cache.clear()
+        response, seconds = request(identify_payload)
+        if response.get('success') is False:
+            raise RuntimeError(f'identify failed: {response.get("error")}')
+        runs.append((seconds, response))
+
+    latencies = sorted(seconds for seconds, _ in runs)
+    _, last = runs[-1]
+    correct = sum(1 for speaker, name in truth.items() if last['speaker_mapping'].get(speaker) == name)
+    audio_seconds = segments[-1]['end'] if segments else 0.0
+
+    return {
+        'profiles': num_profiles,
+        'segments': num_segments,
+        'speakers': len(truth),
+        'audio_seconds': round(audio_seconds, 2),
+        'identify': {
+            'runs': len(runs),
+            'min_seconds': round(latencies[0], 4),
+            'median_seconds': round(latencies[len(latencies) // 2], 4),
+            'max_seconds': round(latencies[-1], 4),
+            'segments_per_second': round(num_segments / latencies[len(latencies) // 2], 2),
+            'audio_seconds_per_second': round(audio_seconds / latencies[len(latencies) // 2], 2),
+            'stage_timings': last.get('timings', {}),
+            'counters': last.get('counters', {}),
+            'accuracy': round(correct / len(truth), 3) if truth else None
+        },
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_case_isolated(workdir, profiles_dir, voices, num_segments, args):
+    """
+    run_case in a newly spawned interpreter. ru_maxrss never goes down, so
+    measured in this process every case after the largest would report its peak.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, workdir, profiles_dir, voices, num_segments, args).result()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def parse_sizes(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark speaker_id.py enroll/identify')
+    parser.add_argument('--backend', default='stub', choices=sorted(speaker_id.EMBEDDING_BACKENDS))
+    parser.add_argument('--profiles', type=parse_sizes, default=[1, 10, 100, 1000],
+                        help='Comma-separated profile library sizes')
+    parser.add_argument('--segments', type=parse_sizes, default=[1, 10, 50, 200],
+                        help='Comma-separated transcript segment counts')
+    parser.add_argument('--speakers', type=int, default=4, help='Speakers per recording')
+    parser.add_argument('--repeat', type=int, default=3, help='Identify runs per case')
+    parser.add_argument('--enroll-samples', type=int, default=3,
+                        help='Profiles per case enrolled through the enroll action')
+    parser.add_argument('--enroll-seconds', type=float, default=4.0)
+    parser.add_argument('--threshold', type=float, default=0.70)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write JSON results here (default: stdout)')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='summarai-speaker-bench-') as tmp:
+        for num_profiles in args.profiles:
+            workdir = Path(tmp) / f'p{num_profiles}'
+            workdir.mkdir()
+            profiles_dir, voices, enroll = build_library(workdir, num_profiles, args)
+
+            for num_segments in args.segments:
+                result = run_case_isolated(workdir, profiles_dir, voices, num_segments, args)
+                result['enroll'] = enroll
+                results.append(result)
+                sys.stderr.write(
+                    f'profiles={num_profiles:<5} segments={num_segments:<4} '
+                    f'identify={result["identify"]["median_seconds"]:.3f}s '
+                    f'accuracy={result["identify"]["accuracy"]} '
+                    f'rss={result["peak_rss_mb"]}MB\n'
+                )
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'backend': args.backend,
+            'embedding_version': speaker_id.backend_version(args.backend),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key != 'output'}
+        },
+        'results': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Export the pyannote embedding model to ONNX and compare the ONNX Runtime
+backends against torch.
+
+export converts pyannote/embedding once (optionally also writing a dynamically
+int8-quantized copy) for speaker_id.py's onnx / onnx-int8 backends. compare
+reports startup time (imports + model load, each backend in a fresh process),
+per-segment latency and embedding agreement with the torch backend.
+
+Usage:
+    python3 onnx_export.py export                       # ~/.summarai/models/pyannote-embedding.onnx
+    python3 onnx_export.py export --quantize            # also write pyannote-embedding.int8.onnx
+    python3 onnx_export.py compare --audio ~/memo.m4a   # torch vs onnx vs onnx-int8
+    python3 onnx_export.py compare --threads 4 --output compare.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import speaker_id  # noqa: E402
+
+ONNX_BACKENDS = ('onnx', 'onnx-int8')
+
+
+def export(args):
+    """Export pyannote/embedding to ONNX (and optionally int8)."""
+    import torch
+    from pyannote.audio import Model
+
+    token = os.environ.get('HUGGINGFACE_TOKEN')
+    if not token:
+        raise SystemExit('HUGGINGFACE_TOKEN is required to download pyannote/embedding')
+
+    output = speaker_id.onnx_model_path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    model = Model.from_pretrained('pyannote/embedding', use_auth_token=token)
+    model.eval()
+    sample_rate = speaker_id.get_model_sample_rate(model)
+
+    dummy = torch.randn(1, 1, int(3 * sample_rate))
+    with torch.inference_mode():
+        expected = model(dummy).numpy()
+
+    torch.onnx.export(
+        model,
+        dummy,
+        str(output),
+        input_names=['waveforms'],
+        output_names=['embeddings'],
+        dynamic_axes={'waveforms': {0: 'batch', 2: 'samples'}, 'embeddings': {0: 'batch'}},
+        opset_version=args.opset,
+        do_constant_folding=True
+    )
+
+    info = {
+        'source': 'pyannote/embedding',
+        'embedding_version': speaker_id.EMBEDDING_VERSION,
+        'sample_rate': sample_rate,
+        'opset': args.opset,
+        'torch': torch.__version__,
+        'exported_at': datetime.now(timezone.utc).isoformat()
+    }
+    with open(str(output) + '.json', 'w') as f:
+        json.dump(info, f, indent=2)
+
+    exported = speaker_id.OnnxEmbeddingModel(output).embed_waveforms([dummy.numpy()[0]])
+    print(f'Exported {output} (max abs difference vs torch: {np.abs(exported - expected).max():.2e})')
+
+    if args.quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized = speaker_id.onnx_model_path(str(output), 'onnx-int8')
+        quantize_dynamic(str(output), str(quantized), weight_type=QuantType.QInt8)
+        with open(str(quantized) + '.json', 'w') as f:
+            json.dump(dict(info, quantized='dynamic-int8'), f, indent=2)
+        print(f'Quantized {quantized}')
+
+
+def startup(args):
+    """Time imports + model load for one backend (run in a fresh interpreter by compare)."""
+    started = time.perf_counter()
+    speaker_id.get_model(backend=args.backend, onnx_model=args.model, threads=args.threads)
+    print(json.dumps({
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'timings': speaker_id._timings
+    }))
+
+
+def measure_startup(backend, args):
+    command = [sys.executable, str(Path(__file__).resolve()), '_startup', '--backend', backend]
+    if args.model:
+        command += ['--model', args.model]
+    if args.threads:
+        command += ['--threads', str(args.threads)]
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['process_seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def load_audio(args, sample_rate):
+    """The comparison recording: --audio, or a synthetic two-voice signal."""
+    if args.audio:
+        return speaker_id.AudioSource(speaker_id.expand_path(args.audio), sample_rate)
+
+    import benchmark
+
+    rng = np.random.default_rng(args.seed)
+    voices = [benchmark.speaker_voice(index, args.seed) for index in range(2)]
+    samples, _ = benchmark.build_recording(voices, max(2, args.segments), rng)
+    path = Path(os.environ.get('TMPDIR', '/tmp')) / f'summarai-onnx-compare-{os.getpid()}.wav'
+    benchmark.write_wav(path, samples)
+    try:
+        return speaker_id.AudioSource(path, sample_rate)
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def compare(args):
+    """Startup, per-segment latency and agreement of each backend with torch."""
+    backends = ['pyannote'] + [
+        backend for backend in ONNX_BACKENDS
+        if speaker_id.onnx_model_path(args.model, backend).exists()
+    ]
+    speaker_id.configure_threads(args.threads)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'threads': args.threads,
+            'model': str(speaker_id.onnx_model_path(args.model)),
+            'segments': args.segments,
+            'segment_seconds': args.segment_seconds
+        },
+        'backends': {}
+    }
+
+    models = {
+        backend: speaker_id.get_model(backend=backend, onnx_model=args.model, threads=args.threads)
+        for backend in backends
+    }
+    source = load_audio(args, speaker_id.get_model_sample_rate(models['pyannote']))
+    starts = np.linspace(0.0, max(0.0, source.duration - args.segment_seconds), args.segments)
+    spans = [(float(start), float(start) + args.segment_seconds) for start in starts]
+
+    embeddings = {}
+    for backend, model in models.items():
+        # Warm up, then embed one segment per call as identify's fallback path would
+        speaker_id.embed_segments(model, source, spans[:1], batch_size=1)
+        latencies = []
+        rows = []
+        for span in spans:
+            started = time.perf_counter()
+            rows.append(speaker_id.embed_segments(model, source, [span], batch_size=1)[0])
+            latencies.append(time.perf_counter() - started)
+        embeddings[backend] = speaker_id.normalize_rows(np.stack(rows))
+
+        latencies.sort()
+        report['backends'][backend] = {
+            'startup': measure_startup(backend, args),
+            'segment_latency_seconds': {
+                'median': round(latencies[len(latencies) // 2], 4),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4),
+                'mean': round(float(np.mean(latencies)), 4)
+            }
+        }
+
+    reference = embeddings['pyannote']
+    reference_similarity = reference @ reference.T
+    for backend in backends[1:]:
+        cosine = np.sum(embeddings[backend] * reference, axis=1)
+        similarity = embeddings[backend] @ embeddings[backend].T
+        same_decision = (similarity >= args.threshold) == (reference_similarity >= args.threshold)
+        report['backends'][backend]['agreement_with_torch'] = {
+            'cosine_mean': round(float(cosine.mean()), 5),
+            'cosine_min': round(float(cosine.min()), 5),
+            'pairwise_similarity_max_abs_diff': round(float(np.abs(similarity - reference_similarity).max()), 5),
+            'threshold_decision_agreement': round(float(same_decision.mean()), 4)
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ONNX export and comparison for speaker_id.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='Export pyannote/embedding to ONNX')
+    export_parser.add_argument('--output', help=f'ONNX file (default: {speaker_id.ONNX_MODEL_PATH})')
+    export_parser.add_argument('--quantize', action='store_true', help='Also write a dynamic int8 copy')
+    export_parser.add_argument('--opset', type=int, default=17)
+
+    compare_parser = commands.add_parser('compare', help='Compare ONNX backends with torch')
+    compare_parser.add_argument('--model', help=f'ONNX file (default: {speaker_id.ONNX_MODEL_PATH})')
+    compare_parser.add_argument('--audio', help='Recording to embed (default: synthetic)')
+    compare_parser.add_argument('--segments', type=int, default=50)
+    compare_parser.add_argument('--segment-seconds', type=float, default=3.0)
+    compare_parser.add_argument('--threads', type=int, help='CPU threads for torch and onnxruntime')
+    compare_parser.add_argument('--threshold', type=float, default=0.70)
+    compare_parser.add_argument('--seed', type=int, default=1)
+    compare_parser.add_argument('--output', help='Write JSON results here (default: stdout)')
+
+    startup_parser = commands.add_parser('_startup')
+    startup_parser.add_argument('--backend', required=True)
+    startup_parser.add_argument('--model')
+    startup_parser.add_argument('--threads', type=int)
+
+    args = parser.parse_args()
+    {'export': export, 'compare': compare, '_startup': startup}[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,61 +3,195 @@
 Speaker identification using Pyannote embeddings.
 Communicates with Node.js via JSON stdin/stdout.
 
+Modes:
+  - one-shot (default): read a single JSON request from stdin, write one response
+  - server (--server): read newline-delimited JSON requests from stdin and answer
+    each with a single JSON line carrying the request's "id". The embedding
+    model and loaded profiles stay warm between requests. Streaming actions
+    may first send {"id", "event": "result", ...} lines for the same request.
+
 Actions:
   - check: Verify Python environment and dependencies
-  - enroll: Create a voice profile from audio sample
+  - enroll: Create a voice profile from an audio sample (append=true adds a
+    sample to an existing profile)
+  - enroll_bulk: enroll from several files/directories, decoded in parallel
   - identify: Match speakers in transcript segments to enrolled profiles
+  - identify_batch: identify for several recordings, streaming per-file results
   - list: List all enrolled speaker profiles
   - delete: Remove a speaker profile
+  - link_unknown: attach output files to stored unknown-speaker embeddings
+  - relabel: name past unknown speakers after an enrolled profile, rewriting
+    their labels in earlier outputs without any audio inference
+  - shutdown: Stop the server loop (server mode only)
+
+Embedding backends (request field "backend"):
+  - pyannote (default): pyannote/embedding, needs torch and a HuggingFace token
+  - onnx / onnx-int8: the same network exported by onnx_export.py, run with
+    onnxruntime on CPU (no torch import); onnx-int8 uses the dynamically
+    quantized export
+  - stub: deterministic NumPy-only embeddings for benchmarks and offline tests
 """
 
 import sys
 import json
 import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+# Interpreter boot is CPU-bound, so CPU time used before this line approximates it
+_process_started = time.perf_counter() - time.process_time()
+
+
+# (module name, distribution name) for each runtime dependency
+DEPENDENCIES = [
+    ('torch', 'torch'),
+    ('numpy', 'numpy'),
+    ('scipy', 'scipy'),
+    ('pyannote.audio', 'pyannote.audio'),
+]
+
+# The ONNX backends only need onnxruntime on top of NumPy/SciPy
+ONNX_DEPENDENCIES = [
+    ('numpy', 'numpy'),
+    ('scipy', 'scipy'),
+    ('onnxruntime', 'onnxruntime'),
+]
+
+
+def backend_dependencies(backend):
+    """Runtime dependencies of an embedding backend."""
+    if backend in ('onnx', 'onnx-int8'):
+        return ONNX_DEPENDENCIES
+    if backend == 'stub':
+        return DEPENDENCIES[1:3]
+    return DEPENDENCIES
+
+
+def check_dependencies(deep=False, backend='pyannote'):
+    """
+    Check if required dependencies are installed.
+
+    The default check only resolves module specs and installed versions, so it
+    never pays for importing torch. deep=True imports each package (and the
+    pyannote Inference class) to catch broken installs.
+
+    Returns (missing, versions).
+    """
+    import importlib.util
+    from importlib import metadata
 
-def check_dependencies():
-    """Check if required dependencies are installed."""
     missing = []
+    versions = {}
 
-    try:
-        import torch
-    except ImportError:
-        missing.append('torch')
+    for module_name, distribution in backend_dependencies(backend):
+        try:
+            found = importlib.util.find_spec(module_name) is not None
+        except (ImportError, ValueError):
+            found = False
 
-    try:
-        import numpy
-    except ImportError:
-        missing.append('numpy')
+        if found and deep:
+            try:
+                started = time.perf_counter()
+                with metrics().stage('imports'):
+                    if module_name == 'pyannote.audio':
+                        from pyannote.audio import Inference  # noqa: F401
+                    else:
+                        importlib.import_module(module_name)
+                _timings[f'import_{module_name}_seconds'] = round(time.perf_counter() - started, 3)
+            except ImportError:
+                found = False
 
-    try:
-        import scipy
-    except ImportError:
-        missing.append('scipy')
+        if not found:
+            missing.append(module_name)
+            continue
+
+        try:
+            versions[module_name] = metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            versions[module_name] = None
+
+    return missing, versions
 
-    try:
-        from pyannote.audio import Inference
-    except ImportError:
-        missing.append('pyannote.audio')
 
-    return missing
+# Warm state shared across requests in server mode
+_model_cache = {}
+_profiles_cache = {}
+_embedding_caches = {}
 
+# Where startup time goes (imports, model load), reported by check and on ready
+_timings = {}
 
-def output_json(data):
-    """Output JSON to stdout and exit."""
-    print(json.dumps(data))
-    sys.stdout.flush()
+
+class RequestMetrics:
+    """Per-request stage timings and counters, attached to every response."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.counters = {}
+        self.batches = []
+
+    @contextmanager
+    def stage(self, name):
+        """Accumulate wall time spent in a named stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self):
+        timings = {name: round(seconds, 4) for name, seconds in self.timings.items()}
+        timings['interpreter_start'] = _timings.get('startup_seconds')
+        timings['total'] = round(time.perf_counter() - self.started, 4)
+        if self.batches:
+            timings['inference_batches'] = [round(seconds, 4) for seconds in self.batches]
+        return {'timings': timings, 'counters': dict(self.counters)}
+
+
+_metrics = RequestMetrics()
+
+# Callback for streaming partial results (set per request in server mode)
+_emit = None
+
+
+def metrics():
+    """Metrics collector for the request currently being handled."""
+    return _metrics
+
+
+class ActionError(Exception):
+    """Error raised by an action handler, reported to Node as a JSON error."""
+
+    def __init__(self, message, error_type='error', **extra):
+        super().__init__(message)
+        self.error_type = error_type
+        self.extra = extra
+
+    def to_response(self):
+        response = {
+            'success': False,
+            'error': str(self),
+            'error_type': self.error_type
+        }
+        response.update(self.extra)
+        return response
+
+
+def output_json(data, stream=None):
+    """Write a single JSON response line."""
+    stream = stream or sys.stdout
+    stream.write(json.dumps(data) + '\n')
+    stream.flush()
 
 
 def output_error(message, error_type='error'):
-    """Output error response."""
-    output_json({
-        'success': False,
-        'error': message,
-        'error_type': error_type
-    })
-    sys.exit(1)
+    """Abort the current action with an error response."""
+    raise ActionError(message, error_type)
 
 
 def expand_path(path_str):
@@ -66,41 +200,241 @@ def expand_path(path_str):
 
 
 def action_check(data):
-    """Check Python environment and dependencies."""
-    missing = check_dependencies()
+    """Check Python environment and dependencies (deep=True imports them)."""
+    deep = bool(data.get('deep'))
+    backend = data.get('backend') or 'pyannote'
+    missing, versions = check_dependencies(deep=deep, backend=backend)
 
     if missing:
-        output_json({
-            'success': False,
-            'error': f'Missing dependencies: {", ".join(missing)}',
-            'error_type': 'missing_dependencies',
-            'missing': missing
-        })
-    else:
-        # Try to verify HuggingFace token if provided
-        hf_token = data.get('huggingface_token') or os.environ.get('HUGGINGFACE_TOKEN')
-        token_status = 'provided' if hf_token else 'missing'
+        raise ActionError(
+            f'Missing dependencies: {", ".join(missing)}',
+            'missing_dependencies',
+            missing=missing
+        )
+
+    if backend in ('onnx', 'onnx-int8'):
+        model_path = onnx_model_path(data.get('onnx_model'), backend)
+        if not model_path.exists():
+            output_error(
+                f'ONNX model not found: {model_path} (create it with pyannote/onnx_export.py export)',
+                'model_not_found'
+            )
+
+    # Try to verify HuggingFace token if provided
+    hf_token = data.get('huggingface_token') or os.environ.get('HUGGINGFACE_TOKEN')
+    token_status = 'provided' if hf_token else 'missing'
+
+    return {
+        'success': True,
+        'python_version': sys.version,
+        'backend': backend,
+        'huggingface_token_status': token_status,
+        'versions': versions,
+        'deep': deep,
+        'startup_timings': dict(_timings)
+    }
 
-        output_json({
-            'success': True,
-            'python_version': sys.version,
-            'huggingface_token_status': token_status
-        })
 
+EMBEDDING_VERSION = 'pyannote/embedding@3.1'
+
+
+class WaveformModel:
+    """
+    Call/crop interface of pyannote's Inference for backends that embed NumPy
+    waveforms through embed_waveforms().
+    """
+
+    sample_rate = 16000
+
+    def __call__(self, file):
+        """Embed a whole file path or a {'waveform', 'sample_rate'} dict."""
+        if isinstance(file, dict):
+            waveform = file['waveform']
+        else:
+            waveform = AudioSource(file, self.sample_rate).waveform
+        return self.embed_waveforms([waveform])[0]
+
+    def crop(self, file, segment):
+        return self(AudioSource(file, self.sample_rate).crop(segment.start, segment.end))
+
+
+class StubEmbeddingModel(WaveformModel):
+    """
+    Deterministic offline embedding backend (NumPy only).
+
+    Embeds a waveform as its mean-removed log energies in log-spaced frequency
+    bands. It needs no token or weights, so benchmarks and tests can run the
+    whole identify pipeline; voices with different pitch and timbre (such as
+    the benchmark's synthetic speakers) land far apart.
+    """
+
+    version = 'stub/band-energy@1'
+    dimension = 64
+
+    def __init__(self):
+        import numpy as np
+
+        edges = np.geomspace(60.0, self.sample_rate / 2 * 0.95, self.dimension + 1)
+        self.band_edges = edges
 
-def get_model(hf_token=None):
-    """Load the Pyannote embedding model."""
-    from pyannote.audio import Inference
+    def embed_waveforms(self, waveforms):
+        """Embed a list of (channels, samples) or (samples,) arrays; returns (n, dimension)."""
+        import numpy as np
+
+        embeddings = np.zeros((len(waveforms), self.dimension), dtype=np.float32)
+        for row, waveform in enumerate(waveforms):
+            samples = np.asarray(waveform, dtype=np.float32).reshape(-1)
+            if samples.size == 0:
+                continue
+            spectrum = np.abs(np.fft.rfft(samples)) ** 2
+            frequencies = np.fft.rfftfreq(samples.size, 1.0 / self.sample_rate)
+            bins = np.searchsorted(self.band_edges, frequencies) - 1
+            valid = (bins >= 0) & (bins < self.dimension)
+            energies = np.bincount(bins[valid], weights=spectrum[valid], minlength=self.dimension)
+            features = np.log(energies + 1e-8)
+            embeddings[row] = features - features.mean()
+        return embeddings
+
+
+ONNX_MODEL_PATH = '~/.summarai/models/pyannote-embedding.onnx'
+
+
+def onnx_model_path(model_path=None, backend='onnx'):
+    """Exported model for an ONNX backend; onnx-int8 uses the .int8.onnx sibling."""
+    path = expand_path(model_path or ONNX_MODEL_PATH)
+    if backend == 'onnx-int8' and not path.name.endswith('.int8.onnx'):
+        path = path.with_name(path.stem + '.int8.onnx')
+    return path
+
+
+class OnnxEmbeddingModel(WaveformModel):
+    """
+    pyannote/embedding exported to ONNX (see onnx_export.py), run with
+    onnxruntime on CPU.
+
+    The graph takes (batch, 1, samples) float32 waveforms and has no padding
+    mask, so waveforms are batched only with others of the same length.
+    """
+
+    def __init__(self, model_path, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = int(threads)
+
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=['CPUExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+        # Sample rate recorded by the export step, if present
+        info_path = Path(str(model_path) + '.json')
+        if info_path.exists():
+            with open(info_path) as f:
+                self.sample_rate = int(json.load(f).get('sample_rate', self.sample_rate))
+
+    def embed_waveforms(self, waveforms):
+        """Embed a list of (channels, samples) or (samples,) arrays; returns (n, dimension)."""
+        import numpy as np
+
+        samples = [np.asarray(w, dtype=np.float32).reshape(-1, np.shape(w)[-1])[0] for w in waveforms]
+        embeddings = [None] * len(samples)
+
+        by_length = {}
+        for index, waveform in enumerate(samples):
+            by_length.setdefault(waveform.shape[0], []).append(index)
+
+        for indices in by_length.values():
+            batch = np.stack([samples[index] for index in indices])[:, None, :]
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+            for row, index in enumerate(indices):
+                embeddings[index] = outputs[row]
+
+        return np.stack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+
+
+EMBEDDING_BACKENDS = {
+    'pyannote': EMBEDDING_VERSION,
+    # Same weights as the torch model, so profiles and cached embeddings are shared
+    'onnx': EMBEDDING_VERSION,
+    'onnx-int8': EMBEDDING_VERSION + '+int8',
+    'stub': StubEmbeddingModel.version,
+}
+
+
+def backend_version(backend):
+    """Embedding version string for a backend (part of cache keys and profile metadata)."""
+    return EMBEDDING_BACKENDS.get(backend or 'pyannote', EMBEDDING_VERSION)
+
+
+def get_model(hf_token=None, backend='pyannote', onnx_model=None, threads=None):
+    """Load the embedding model for a backend (cached for the life of the process)."""
+    backend = backend or 'pyannote'
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f'Unknown embedding backend: {backend}')
+
+    if backend == 'stub':
+        if 'stub' not in _model_cache:
+            _model_cache['stub'] = StubEmbeddingModel()
+        return _model_cache['stub']
+
+    if backend in ('onnx', 'onnx-int8'):
+        model_path = onnx_model_path(onnx_model, backend)
+        key = ('onnx', str(model_path), threads)
+        if key in _model_cache:
+            return _model_cache[key]
+        if not model_path.exists():
+            raise ValueError(f'ONNX model not found: {model_path} (run pyannote/onnx_export.py export)')
+
+        started = time.perf_counter()
+        with metrics().stage('imports'):
+            import onnxruntime  # noqa: F401
+        _timings.setdefault('import_onnxruntime_seconds', round(time.perf_counter() - started, 3))
+
+        started = time.perf_counter()
+        with metrics().stage('model_load'):
+            model = OnnxEmbeddingModel(model_path, threads)
+        _timings['model_load_seconds'] = round(time.perf_counter() - started, 3)
+
+        _model_cache[key] = model
+        return model
 
     token = hf_token or os.environ.get('HUGGINGFACE_TOKEN')
     if not token:
         raise ValueError('HuggingFace token required. Set HUGGINGFACE_TOKEN environment variable.')
 
+    if token in _model_cache:
+        return _model_cache[token]
+
+    started = time.perf_counter()
+    with metrics().stage('imports'):
+        from pyannote.audio import Inference
+    _timings.setdefault('import_pyannote_seconds', round(time.perf_counter() - started, 3))
+
     # Use the speaker embedding model
-    model = Inference('pyannote/embedding', window='whole', use_auth_token=token)
+    started = time.perf_counter()
+    with metrics().stage('model_load'):
+        model = Inference('pyannote/embedding', window='whole', use_auth_token=token)
+    _timings['model_load_seconds'] = round(time.perf_counter() - started, 3)
+
+    _model_cache[token] = model
     return model
 
 
+def load_model(data):
+    """get_model() for the backend and model settings of a request."""
+    return get_model(
+        data.get('huggingface_token'),
+        data.get('backend'),
+        onnx_model=data.get('onnx_model'),
+        threads=data.get('onnx_threads')
+    )
+
+
 def extract_embedding(model, audio_path, start=None, end=None):
     """Extract embedding from audio file or segment."""
     import numpy as np
@@ -110,9 +444,7 @@ def extract_embedding(model, audio_path, start=None, end=None):
     if start is not None and end is not None:
         # Extract embedding from specific segment
         # Pyannote can handle file + segment specification
-        from pyannote.core import Segment
-        segment = Segment(start, end)
-        embedding = model.crop(audio_path, segment)
+        embedding = model.crop(audio_path, _segment(start, end))
     else:
         # Extract embedding from entire file
         embedding = model(audio_path)
@@ -120,30 +452,601 @@ def extract_embedding(model, audio_path, start=None, end=None):
     return np.array(embedding)
 
 
-def cosine_similarity(a, b):
-    """Calculate cosine similarity between two embeddings."""
+def get_model_sample_rate(model, default=16000):
+    """Sample rate the embedding model expects."""
+    for getter in (
+        lambda: model.sample_rate,
+        lambda: model.model.audio.sample_rate,
+        lambda: model.model.hparams.sample_rate,
+    ):
+        try:
+            value = getter()
+            if value:
+                return int(value)
+        except Exception:
+            continue
+    return default
+
+
+class AudioSource:
+    """
+    Audio decoded once for the duration of an identify call.
+
+    The whole file is decoded to a mono waveform at the model's sample rate and
+    kept in memory, so every segment crop is an array slice instead of another
+    decode/seek pass over the compressed file. Files whose decoded size would
+    exceed max_bytes fall back to windowed decoding of each requested segment.
+    """
+
+    BYTES_PER_SAMPLE = 4  # float32
+
+    def __init__(self, audio_path, sample_rate, max_bytes=None):
+        self.audio_path = str(audio_path)
+        self.sample_rate = sample_rate
+        self.waveform = None
+
+        try:
+            from pyannote.audio import Audio
+            self.audio = Audio(sample_rate=sample_rate, mono='downmix')
+        except ImportError:
+            # Without pyannote (e.g. the stub backend) only WAV files can be read
+            self.audio = WavReader(sample_rate)
+
+        try:
+            self.duration = self.audio.get_duration(self.audio_path)
+        except Exception:
+            self.duration = None
+
+        decoded_bytes = (self.duration or 0) * sample_rate * self.BYTES_PER_SAMPLE
+        if max_bytes is None or self.duration is None or decoded_bytes <= max_bytes:
+            waveform, _ = self.audio(self.audio_path)
+            self.waveform = waveform
+            self.duration = waveform.shape[-1] / sample_rate
+
+    @property
+    def in_memory(self):
+        return self.waveform is not None
+
+    def crop(self, start, end):
+        """Return a pyannote in-memory audio dict for [start, end) seconds."""
+        if self.in_memory:
+            total = self.waveform.shape[-1]
+            first = max(0, min(total, int(round(start * self.sample_rate))))
+            last = max(first, min(total, int(round(end * self.sample_rate))))
+            waveform = self.waveform[:, first:last]
+        else:
+            waveform, _ = self.audio.crop(self.audio_path, _segment(start, end))
+
+        return {'waveform': waveform, 'sample_rate': self.sample_rate}
+
+
+class PCMSource:
+    """
+    Raw PCM sidecar written by the Node ffmpeg step, memory-mapped.
+
+    The same crop() interface as AudioSource, but nothing is decoded: the file
+    is np.memmap-ed and each crop is converted from a slice of the mapping, so
+    long recordings never sit in the Python heap. as_tensor returns torch
+    tensors for backends that expect them.
+    """
+
+    FORMATS = {'s16le': ('<i2', 1.0 / 32768.0), 'f32le': ('<f4', 1.0)}
+
+    def __init__(self, pcm_path, sample_rate, pcm_format='s16le', as_tensor=False):
+        import numpy as np
+
+        if pcm_format not in self.FORMATS:
+            raise ValueError(f'Unsupported PCM format: {pcm_format}')
+        dtype, self.scale = self.FORMATS[pcm_format]
+
+        self.audio_path = str(pcm_path)
+        self.sample_rate = sample_rate
+        self.as_tensor = as_tensor
+        self.samples = np.memmap(pcm_path, dtype=dtype, mode='r')
+        self.duration = self.samples.shape[0] / sample_rate
+
+    @property
+    def in_memory(self):
+        # Crops are slices of the mapping, as cheap as an in-memory waveform
+        return True
+
+    def crop(self, start, end):
+        """Return an in-memory audio dict for [start, end) seconds."""
+        import numpy as np
+
+        total = self.samples.shape[0]
+        first = max(0, min(total, int(round(start * self.sample_rate))))
+        last = max(first, min(total, int(round(end * self.sample_rate))))
+        waveform = np.asarray(self.samples[first:last], dtype=np.float32)[None, :]
+        if self.scale != 1.0:
+            waveform *= self.scale
+        if self.as_tensor:
+            import torch
+            waveform = torch.from_numpy(waveform)
+
+        return {'waveform': waveform, 'sample_rate': self.sample_rate}
+
+
+def _segment(start, end):
+    """A pyannote Segment, or a plain stand-in when pyannote is not installed."""
+    try:
+        from pyannote.core import Segment
+    except ImportError:
+        from types import SimpleNamespace
+        return SimpleNamespace(start=start, end=end)
+    return Segment(start, end)
+
+
+class WavReader:
+    """
+    Minimal stand-in for pyannote.audio.Audio that reads PCM WAV files with the
+    standard library, downmixed to mono and linearly resampled. Other formats
+    are decoded by ffmpeg, which the Node side already requires.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def _is_wav(path):
+        return str(path).lower().endswith('.wav')
+
+    def get_duration(self, path):
+        import wave
+
+        if not self._is_wav(path):
+            import subprocess
+            probe = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                 '-of', 'default=noprint_wrappers=1:nokey=1', str(path)],
+                capture_output=True, text=True, check=True
+            )
+            return float(probe.stdout.strip())
+
+        with wave.open(str(path), 'rb') as wav:
+            return wav.getnframes() / wav.getframerate()
+
+    def _decode(self, path, start=None, end=None):
+        """Decode any format to mono float32 at the target rate with ffmpeg."""
+        import subprocess
+        import numpy as np
+
+        args = ['ffmpeg', '-v', 'error', '-nostdin']
+        if start:
+            args += ['-ss', f'{start:.3f}']
+        if end is not None:
+            args += ['-t', f'{max(0.0, end - (start or 0)):.3f}']
+        args += ['-i', str(path), '-vn', '-ac', '1', '-ar', str(self.sample_rate), '-f', 'f32le', '-']
+        decoded = subprocess.run(args, capture_output=True, check=True)
+        return np.frombuffer(decoded.stdout, dtype='<f4').astype(np.float32)[None, :], self.sample_rate
+
+    def _read(self, path, start=None, end=None):
+        import wave
+        import numpy as np
+
+        if not self._is_wav(path):
+            return self._decode(path, start, end)
+
+        with wave.open(str(path), 'rb') as wav:
+            rate = wav.getframerate()
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            first = int(round((start or 0) * rate))
+            last = wav.getnframes() if end is None else min(wav.getnframes(), int(round(end * rate)))
+            wav.setpos(min(first, wav.getnframes()))
+            raw = wav.readframes(max(0, last - first))
+
+        dtype = {1: np.uint8, 2: np.int16, 4: np.int32}.get(width)
+        if dtype is None:
+            raise ValueError(f'Unsupported WAV sample width: {width * 8} bits')
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+        if width == 1:
+            samples = (samples - 128.0) / 128.0
+        else:
+            samples /= float(2 ** (8 * width - 1))
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+        if rate != self.sample_rate and samples.size:
+            count = int(round(samples.size * self.sample_rate / rate))
+            samples = np.interp(
+                np.arange(count) * (rate / self.sample_rate),
+                np.arange(samples.size),
+                samples
+            ).astype(np.float32)
+
+        return samples[None, :], self.sample_rate
+
+    def __call__(self, path):
+        return self._read(path)
+
+    def crop(self, path, segment):
+        return self._read(path, segment.start, segment.end)
+
+
+class EnergyVAD:
+    """
+    Frame-energy voice activity detection over decoded audio (NumPy only).
+
+    Frames quieter than the recording's noise floor plus margin_db are
+    unvoiced. A window is trimmed to its voiced frames (keeping pad_seconds
+    around each, so short gaps survive and long pauses are cut out) and is
+    skipped entirely when less than min_speech_ratio of it is voiced. The
+    noise floor is measured once over the whole recording when it is decoded
+    in memory, otherwise per window.
+    """
+
+    def __init__(self, frame_seconds=0.03, margin_db=12.0, min_speech_ratio=0.3,
+                 pad_seconds=0.15, min_voiced_seconds=0.5, floor_db=-60.0):
+        self.frame_seconds = frame_seconds
+        self.margin_db = margin_db
+        self.min_speech_ratio = min_speech_ratio
+        self.pad_seconds = pad_seconds
+        self.min_voiced_seconds = min_voiced_seconds
+        self.floor_db = floor_db
+        self.threshold_db = None
+        self.input_seconds = 0.0
+        self.voiced_seconds = 0.0
+        self.windows_skipped = 0
+
+    @property
+    def version(self):
+        """Settings that change the embedded audio (part of the cache key)."""
+        return f'vad:{self.margin_db:g}/{self.min_speech_ratio:g}/{self.pad_seconds:g}'
+
+    def frame_energies(self, samples, sample_rate):
+        """Log energy (dBFS) of each complete frame of a mono sample array."""
+        import numpy as np
+
+        frame = max(1, int(self.frame_seconds * sample_rate))
+        count = samples.size // frame
+        if count == 0:
+            return np.zeros(0, dtype=np.float32), frame
+        frames = samples[:count * frame].reshape(count, frame)
+        power = np.einsum('ij,ij->i', frames, frames) / frame
+        return 10.0 * np.log10(power + 1e-12), frame
+
+    def threshold(self, energies):
+        """Voicing threshold: noise floor + margin, kept below the loud frames."""
+        import numpy as np
+
+        noise, loud = np.percentile(energies, [10, 95])
+        return max(self.floor_db, min(noise + self.margin_db, loud - 10.0))
+
+    def calibrate(self, source):
+        """Measure the noise floor over a whole in-memory recording."""
+        import numpy as np
+
+        if self.threshold_db is not None or not source.in_memory or not source.duration:
+            return
+
+        # A minute at a time, so memory-mapped sources are never copied whole
+        energies = []
+        for start in np.arange(0.0, source.duration, 60.0):
+            samples = np.asarray(source.crop(start, start + 60.0)['waveform'], dtype=np.float32)[0]
+            energies.append(self.frame_energies(samples, source.sample_rate)[0])
+        energies = np.concatenate(energies)
+        if energies.size:
+            self.threshold_db = self.threshold(energies)
+
+    def select(self, waveform, sample_rate):
+        """
+        Voiced part of a (channels, samples) waveform, in the waveform's own
+        type (NumPy or torch), or None if the window is mostly silence.
+        """
+        import numpy as np
+
+        samples = np.asarray(waveform, dtype=np.float32)[0]
+        self.input_seconds += samples.size / sample_rate
+        energies, frame = self.frame_energies(samples, sample_rate)
+        if energies.size == 0:
+            self.windows_skipped += 1
+            return None
+
+        threshold = self.threshold_db if self.threshold_db is not None else self.threshold(energies)
+        voiced = energies >= threshold
+        if voiced.mean() < self.min_speech_ratio:
+            self.windows_skipped += 1
+            return None
+
+        # Dilate voiced frames by the pad so speech onsets/offsets are kept
+        pad = int(round(self.pad_seconds / self.frame_seconds))
+        if pad:
+            voiced = np.convolve(voiced, np.ones(2 * pad + 1), mode='same') > 0
+
+        keep = np.zeros(samples.size, dtype=bool)
+        keep[:voiced.size * frame] = np.repeat(voiced, frame)
+        kept_seconds = float(keep.sum()) / sample_rate
+        if kept_seconds < self.min_voiced_seconds:
+            self.windows_skipped += 1
+            return None
+
+        self.voiced_seconds += kept_seconds
+        if hasattr(waveform, 'numpy'):
+            import torch
+            return waveform[:, torch.from_numpy(keep)]
+        return np.asarray(waveform)[:, keep]
+
+    def stats(self):
+        return {
+            'input_seconds': round(self.input_seconds, 2),
+            'voiced_seconds': round(self.voiced_seconds, 2),
+            'discarded_seconds': round(self.input_seconds - self.voiced_seconds, 2),
+            'windows_skipped': self.windows_skipped
+        }
+
+
+def get_vad(data):
+    """EnergyVAD configured from the request, or None when disabled."""
+    if not data.get('vad', True):
+        return None
+    return EnergyVAD(
+        margin_db=data.get('vad_margin_db', 12.0),
+        min_speech_ratio=data.get('vad_min_speech_ratio', 0.3)
+    )
+
+
+def embed_segments(model, source, spans, batch_size=8, vad=None, seconds=None):
+    """
+    Embed many (start, end) spans of an AudioSource in batches.
+
+    Spans are sorted by length and zero-padded to the longest span in each
+    batch; a per-sample weight mask keeps the padding out of the model's
+    statistics pooling. With a vad, each span is first cut down to its voiced
+    audio and mostly-silent spans are never embedded. Returns one embedding per
+    span, in input order, with None for spans that could not be embedded.
+
+    If seconds is a list aligned with spans, the entry of every span passed to
+    the model is set to the length of its audio after VAD trimming.
+    """
     import numpy as np
-    from scipy.spatial.distance import cosine
 
-    a = np.array(a).flatten()
-    b = np.array(b).flatten()
+    embeddings = [None] * len(spans)
+    if not spans:
+        return embeddings
+
+    crops = []
+    with metrics().stage('decode'):
+        for index, (start, end) in enumerate(spans):
+            try:
+                crops.append((index, source.crop(start, end)['waveform']))
+            except Exception as e:
+                sys.stderr.write(f'Warning: Failed to process segment {start}-{end}: {e}\n')
 
-    # cosine() returns distance, so similarity = 1 - distance
-    return 1 - cosine(a, b)
+    if vad is not None:
+        with metrics().stage('vad'):
+            voiced = [(index, vad.select(waveform, source.sample_rate)) for index, waveform in crops]
+        crops = [(index, waveform) for index, waveform in voiced if waveform is not None]
+        metrics().count('vad_windows_skipped', len(voiced) - len(crops))
+
+    if seconds is not None:
+        for index, waveform in crops:
+            seconds[index] = waveform.shape[-1] / source.sample_rate
+
+    # Group similar lengths together to keep padding small
+    crops.sort(key=lambda item: item[1].shape[-1])
+    batch_size = max(1, int(batch_size or 1))
+
+    if hasattr(model, 'embed_waveforms'):
+        # Non-torch backends embed a list of variable-length waveforms directly
+        for offset in range(0, len(crops), batch_size):
+            batch = crops[offset:offset + batch_size]
+            started = time.perf_counter()
+            with metrics().stage('inference'):
+                outputs = model.embed_waveforms([waveform for _, waveform in batch])
+            metrics().batches.append(time.perf_counter() - started)
+            metrics().count('segments_embedded', len(batch))
+            for row, (index, _) in enumerate(batch):
+                embeddings[index] = np.array(outputs[row])
+        return embeddings
+
+    import torch
+
+    network = getattr(model, 'model', None)
+    device = getattr(model, 'device', None) or torch.device('cpu')
+
+    for offset in range(0, len(crops), batch_size):
+        batch = crops[offset:offset + batch_size]
 
+        try:
+            if network is None:
+                raise RuntimeError('embedding network not exposed by model')
+
+            num_samples = max(waveform.shape[-1] for _, waveform in batch)
+            waveforms = torch.zeros(len(batch), 1, num_samples)
+            weights = torch.zeros(len(batch), num_samples)
+            for row, (_, waveform) in enumerate(batch):
+                waveform = torch.as_tensor(waveform, dtype=torch.float32)
+                length = waveform.shape[-1]
+                waveforms[row, :, :length] = waveform[:1]
+                weights[row, :length] = 1.0
+
+            started = time.perf_counter()
+            with metrics().stage('inference'), torch.inference_mode():
+                if all(waveform.shape[-1] == num_samples for _, waveform in batch):
+                    outputs = network(waveforms.to(device))
+                else:
+                    outputs = network(waveforms.to(device), weights=weights.to(device))
+            metrics().batches.append(time.perf_counter() - started)
+            metrics().count('segments_embedded', len(batch))
+
+            outputs = outputs.detach().cpu().numpy()
+            for row, (index, _) in enumerate(batch):
+                embeddings[index] = np.array(outputs[row])
+        except Exception:
+            # Fall back to one forward pass per segment for this batch
+            for index, waveform in batch:
+                start, end = spans[index]
+                try:
+                    started = time.perf_counter()
+                    with metrics().stage('inference'), torch.inference_mode():
+                        embeddings[index] = np.array(
+                            model({'waveform': waveform, 'sample_rate': source.sample_rate})
+                        )
+                    metrics().batches.append(time.perf_counter() - started)
+                    metrics().count('segments_embedded')
+                except Exception as e:
+                    sys.stderr.write(f'Warning: Failed to process segment {start}-{end}: {e}\n')
 
-def action_enroll(data):
-    """Enroll a new speaker profile."""
+    return embeddings
+
+
+def configure_threads(threads):
+    """Pin the number of CPU threads torch uses for inference."""
+    if not threads:
+        return
+
+    try:
+        import torch
+    except ImportError:
+        return
+
+    threads = int(threads)
+    if threads > 0 and torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+
+
+def normalize_rows(matrix):
+    """L2-normalize each row so cosine similarity becomes a dot product."""
+    import numpy as np
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+PROFILE_M2_FILE = 'embedding_m2.npy'
+AUDIO_EXTENSIONS = {'.wav', '.m4a', '.mp3', '.flac', '.ogg', '.aac', '.opus', '.mp4', '.webm'}
+
+
+def profile_id_for(name):
+    """Filesystem-safe profile ID for a speaker name."""
+    profile_id = name.lower().replace(' ', '_')
+    return ''.join(c for c in profile_id if c.isalnum() or c == '_')
+
+
+def expand_audio_paths(paths):
+    """Expand a list of files and directories into the audio files they name."""
+    files = []
+    for path in paths:
+        path = expand_path(str(path))
+        if path.is_dir():
+            files.extend(
+                sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS)
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def embed_files(model, audio_paths, workers=2):
+    """
+    Embed whole audio files for enrollment.
+
+    Files are decoded in a thread pool while the model embeds the ones already
+    decoded. Returns one (embedding, duration, error) tuple per path, in order.
+    """
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+
+    sample_rate = get_model_sample_rate(model)
+
+    def decode(audio_path):
+        if not audio_path.exists():
+            raise FileNotFoundError(f'Audio file not found: {audio_path}')
+        return AudioSource(audio_path, sample_rate)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        decodes = [pool.submit(decode, audio_path) for audio_path in audio_paths]
+
+        for decoded in decodes:
+            try:
+                with metrics().stage('decode'):
+                    source = decoded.result()
+                with metrics().stage('inference'):
+                    embedding = np.asarray(model(source.crop(0.0, source.duration)), dtype=np.float32)
+                metrics().count('files_embedded')
+                results.append((embedding.reshape(-1), source.duration, None))
+            except Exception as e:
+                results.append((None, None, str(e)))
+
+    return results
+
+
+def _save_atomic(path, write):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def fold_into_profile(profile_path, embeddings, metadata, duration=None):
+    """
+    Fold new sample embeddings into a profile's running centroid.
+
+    embedding.npy holds the mean of the L2-normalized sample embeddings and
+    embedding_m2.npy the per-dimension sum of squared deviations from it, so
+    the centroid, variance and sample count are updated by merging running
+    statistics (Chan et al.) without re-reading earlier audio. Profiles
+    enrolled before this layout count as a single sample. Writes the profile
+    files and returns the updated metadata.
+    """
     import numpy as np
     from datetime import datetime
 
-    name = data.get('name')
-    audio_path = data.get('audio_path')
-    profiles_dir = expand_path(data.get('profiles_dir', '~/.summarai/profiles'))
-    hf_token = data.get('huggingface_token')
+    samples = normalize_rows(np.stack([np.asarray(e, dtype=np.float32).reshape(-1) for e in embeddings]))
+    added = samples.shape[0]
+    mean_new = samples.mean(axis=0)
+    m2_new = ((samples - mean_new) ** 2).sum(axis=0)
+
+    count = 0
+    embedding_file = profile_path / 'embedding.npy'
+    if embedding_file.exists():
+        count = int(metadata.get('sample_count') or 1)
+        mean_old = np.load(embedding_file).astype(np.float32).reshape(-1)
+        m2_file = profile_path / PROFILE_M2_FILE
+        if 'sample_count' not in metadata:
+            mean_old = normalize_rows(mean_old)[0]
+        if m2_file.exists():
+            m2_old = np.load(m2_file).astype(np.float32).reshape(-1)
+        else:
+            m2_old = np.zeros_like(mean_old)
+        if mean_old.shape != mean_new.shape:
+            raise ValueError(
+                f'embedding dimension {mean_new.shape[0]} does not match profile ({mean_old.shape[0]})'
+            )
+
+    if count:
+        total = count + added
+        delta = mean_new - mean_old
+        mean = mean_old + delta * (added / total)
+        m2 = m2_old + m2_new + delta ** 2 * (count * added / total)
+    else:
+        total, mean, m2 = added, mean_new, m2_new
 
-    if not name:
-        output_error('Name is required for enrollment', 'validation_error')
+    _save_atomic(embedding_file, lambda f: np.save(f, mean.astype(np.float32)))
+    _save_atomic(profile_path / PROFILE_M2_FILE, lambda f: np.save(f, m2.astype(np.float32)))
+
+    metadata = dict(metadata)
+    metadata['sample_count'] = total
+    metadata['embedding_variance'] = round(float(m2.sum() / (total - 1)), 6) if total > 1 else 0.0
+    if duration:
+        metadata['sample_duration_seconds'] = (metadata.get('sample_duration_seconds') or 0) + duration
+    metadata['updated_at'] = datetime.utcnow().isoformat() + 'Z'
+
+    _save_atomic(
+        profile_path / 'metadata.json',
+        lambda f: f.write(json.dumps(metadata, indent=2).encode())
+    )
+    return metadata
+
+
+def action_enroll(data):
+    """Enroll a new speaker profile, or add a sample to it with append=true."""
+    audio_path = data.get('audio_path')
 
     if not audio_path:
         output_error('Audio path is required for enrollment', 'validation_error')
@@ -152,105 +1055,299 @@ def action_enroll(data):
     if not audio_path.exists():
         output_error(f'Audio file not found: {audio_path}', 'file_not_found')
 
-    # Create profiles directory if needed
-    profiles_dir.mkdir(parents=True, exist_ok=True)
+    return enroll_samples(data, [audio_path])
 
-    # Create profile directory (sanitize name for filesystem)
-    profile_id = name.lower().replace(' ', '_')
-    profile_id = ''.join(c for c in profile_id if c.isalnum() or c == '_')
-    profile_path = profiles_dir / profile_id
 
-    if profile_path.exists():
-        output_error(f'Profile "{name}" already exists', 'profile_exists')
+def action_enroll_bulk(data):
+    """
+    Enroll a speaker from several samples (files and/or directories of audio
+    files). Samples are decoded in parallel and folded into the profile in one
+    update; with append=true an existing profile is extended.
+    """
+    audio_paths = data.get('audio_paths') or []
+    if isinstance(audio_paths, str):
+        audio_paths = [audio_paths]
 
-    profile_path.mkdir(parents=True, exist_ok=True)
+    files = expand_audio_paths(audio_paths)
+    if not files:
+        output_error('No audio files to enroll', 'validation_error')
 
-    try:
-        # Load model and extract embedding
-        model = get_model(hf_token)
-        embedding = extract_embedding(model, audio_path)
+    return enroll_samples(data, files)
 
-        # Save embedding
-        np.save(profile_path / 'embedding.npy', embedding)
 
-        # Get audio duration for metadata
-        try:
-            from pyannote.audio import Audio
-            audio = Audio()
-            waveform, sample_rate = audio(str(audio_path))
-            duration = waveform.shape[1] / sample_rate
-        except Exception:
-            duration = None
+def enroll_samples(data, audio_paths):
+    """Shared body of enroll and enroll_bulk."""
+    import shutil
+    from datetime import datetime
+
+    name = data.get('name')
+    profiles_dir = expand_path(data.get('profiles_dir', '~/.summarai/profiles'))
+    backend = data.get('backend', 'pyannote')
+    append = bool(data.get('append'))
+
+    if not name:
+        output_error('Name is required for enrollment', 'validation_error')
+
+    # Create profiles directory if needed
+    profiles_dir.mkdir(parents=True, exist_ok=True)
+
+    profile_id = profile_id_for(name)
+    profile_path = profiles_dir / profile_id
+    created = not profile_path.exists()
 
-        # Save metadata
+    if created:
         metadata = {
             'name': name,
             'display_name': name,
             'profile_id': profile_id,
             'created_at': datetime.utcnow().isoformat() + 'Z',
-            'sample_duration_seconds': duration,
-            'embedding_version': 'pyannote/embedding@3.1',
-            'source_file': str(audio_path)
+            'sample_duration_seconds': None,
+            'embedding_version': backend_version(backend),
+            'source_files': []
         }
+    elif not append:
+        output_error(
+            f'Profile "{name}" already exists (use append to add samples)', 'profile_exists'
+        )
+    else:
+        try:
+            with open(profile_path / 'metadata.json') as f:
+                metadata = json.load(f)
+        except Exception as e:
+            output_error(f'Could not read profile "{name}": {e}', 'enrollment_error')
+        if metadata.get('embedding_version', EMBEDDING_VERSION) != backend_version(backend):
+            output_error(
+                f'Profile "{name}" was enrolled with {metadata.get("embedding_version", EMBEDDING_VERSION)}, '
+                f'not {backend_version(backend)}; delete and re-enroll it',
+                'enrollment_error'
+            )
+        if 'source_files' not in metadata:
+            metadata['source_files'] = [metadata['source_file']] if metadata.get('source_file') else []
 
-        with open(profile_path / 'metadata.json', 'w') as f:
-            json.dump(metadata, f, indent=2)
-
-        # Update index
-        update_profile_index(profiles_dir)
-
-        output_json({
+    try:
+        configure_threads(data.get('threads'))
+        model = load_model(data)
+        results = embed_files(model, audio_paths, data.get('decode_workers', 2))
+
+        embedded = [
+            (audio_path, embedding, duration)
+            for audio_path, (embedding, duration, _) in zip(audio_paths, results)
+            if embedding is not None
+        ]
+        failed = [
+            {'audio_path': str(audio_path), 'error': error}
+            for audio_path, (_, _, error) in zip(audio_paths, results)
+            if error is not None
+        ]
+        if not embedded:
+            raise RuntimeError(failed[0]['error'] if failed else 'no samples embedded')
+
+        duration = sum(d for _, _, d in embedded if d) or None
+        metadata['source_files'] = metadata['source_files'] + [str(p) for p, _, _ in embedded]
+        if created:
+            metadata['source_file'] = str(embedded[0][0])
+
+        profile_path.mkdir(parents=True, exist_ok=True)
+        with metrics().stage('io'):
+            metadata = fold_into_profile(
+                profile_path, [embedding for _, embedding, _ in embedded], metadata, duration
+            )
+            update_profile_index(profiles_dir, backend=backend)
+
+        return {
             'success': True,
             'profile_id': profile_id,
-            'name': name,
+            'name': metadata.get('name', name),
             'profile_path': str(profile_path),
-            'sample_duration_seconds': duration
-        })
+            'created': created,
+            'samples_added': len(embedded),
+            'sample_count': metadata['sample_count'],
+            'embedding_variance': metadata['embedding_variance'],
+            'sample_duration_seconds': metadata.get('sample_duration_seconds'),
+            'failed': failed
+        }
 
+    except ActionError:
+        raise
     except Exception as e:
-        # Clean up on failure
-        if profile_path.exists():
-            import shutil
+        # Clean up on failure; an existing profile is left as it was
+        if created and profile_path.exists():
             shutil.rmtree(profile_path, ignore_errors=True)
         output_error(f'Enrollment failed: {str(e)}', 'enrollment_error')
 
 
-def update_profile_index(profiles_dir):
-    """Update the profile index file."""
-    profiles_dir = Path(profiles_dir)
-    index = {
-        'version': '1.0',
-        'profiles': []
-    }
-
-    for profile_path in profiles_dir.iterdir():
-        if profile_path.is_dir():
-            metadata_file = profile_path / 'metadata.json'
-            if metadata_file.exists():
-                with open(metadata_file) as f:
-                    metadata = json.load(f)
-                index['profiles'].append({
-                    'id': metadata.get('profile_id', profile_path.name),
-                    'display_name': metadata.get('display_name', metadata.get('name')),
-                    'path': profile_path.name + '/',
-                    'created_at': metadata.get('created_at')
-                })
-
-    with open(profiles_dir / 'index.json', 'w') as f:
-        json.dump(index, f, indent=2)
-
-
-def load_profiles(profiles_dir):
-    """Load all enrolled profiles with their embeddings."""
+PROFILE_INDEX_VERSION = '2.0'
+PROFILE_MATRIX_FILE = 'embeddings.npy'
+ANN_INDEX_FILE = 'ivf.npz'
+ANN_MIN_PROFILES = 1024
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over the normalized profile matrix (pure NumPy).
+
+    Profiles are partitioned by spherical k-means into ~sqrt(N) lists. A query
+    scores the centroids, probes the nprobe closest lists using int8-quantized
+    codes, and the best `rerank` candidates are then re-scored exactly against
+    the float32 matrix. nprobe is the recall/latency knob.
+
+    Centroids are kept across rebuilds: enroll/delete only reassign rows to
+    their nearest centroid, and k-means is re-trained once the library has
+    halved or doubled since the last training.
+    """
+
+    def __init__(self, centroids, list_offsets, list_rows, codes, trained_on):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.codes = codes
+        self.trained_on = int(trained_on)
+
+    @property
+    def size(self):
+        return int(self.list_rows.shape[0])
+
+    @staticmethod
+    def train(matrix, lists, iterations=10, seed=0):
+        """Spherical k-means centroids for an L2-normalized matrix."""
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        centroids = np.array(matrix[rng.choice(matrix.shape[0], lists, replace=False)], dtype=np.float32)
+
+        for _ in range(iterations):
+            assignment = np.argmax(matrix @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, matrix)
+            empty = ~sums.any(axis=1)
+            if empty.any():
+                # Re-seed empty lists with random profiles
+                sums[empty] = matrix[rng.choice(matrix.shape[0], int(empty.sum()), replace=False)]
+            centroids = normalize_rows(sums)
+
+        return centroids
+
+    @classmethod
+    def build(cls, matrix, centroids=None, trained_on=None):
+        """Assign every row to its nearest centroid (training first if needed)."""
+        import numpy as np
+
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if centroids is None:
+            lists = max(1, min(4096, int(round(np.sqrt(matrix.shape[0])))))
+            centroids = cls.train(matrix, lists)
+            trained_on = matrix.shape[0]
+
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        list_rows = np.argsort(assignment, kind='stable').astype(np.int32)
+        counts = np.bincount(assignment, minlength=centroids.shape[0])
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        codes = np.clip(np.round(matrix[list_rows] * 127.0), -127, 127).astype(np.int8)
+
+        return cls(centroids, list_offsets, list_rows, codes, trained_on)
+
+    @classmethod
+    def update(cls, matrix, previous=None):
+        """Rebuild for a changed matrix, reusing centroids while they still fit."""
+        rows = matrix.shape[0]
+        if previous is not None and previous.centroids.shape[1] == matrix.shape[1] \
+                and previous.trained_on / 2 <= rows <= previous.trained_on * 2 \
+                and previous.centroids.shape[0] <= rows:
+            return cls.build(matrix, previous.centroids, previous.trained_on)
+        return cls.build(matrix)
+
+    def save(self, path):
+        import numpy as np
+
+        tmp = Path(str(path) + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                list_offsets=self.list_offsets,
+                list_rows=self.list_rows,
+                codes=self.codes,
+                trained_on=np.array(self.trained_on)
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+
+        with np.load(path) as data:
+            return cls(
+                data['centroids'],
+                data['list_offsets'],
+                data['list_rows'],
+                data['codes'],
+                int(data['trained_on'])
+            )
+
+    def search(self, queries, nprobe=8, rerank=50):
+        """Candidate profile rows for each normalized query (list of int arrays)."""
+        import numpy as np
+
+        nprobe = max(1, min(int(nprobe), self.centroids.shape[0]))
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        candidates = []
+        for query, lists in zip(queries, probes):
+            positions = np.concatenate([
+                np.arange(self.list_offsets[list_id], self.list_offsets[list_id + 1]) for list_id in lists
+            ])
+            if positions.size > rerank:
+                approx = self.codes[positions].astype(np.float32) @ query
+                positions = positions[np.argpartition(-approx, rerank - 1)[:rerank]]
+            candidates.append(self.list_rows[positions])
+        return candidates
+
+
+class ProfileStore:
+    """
+    Enrolled profiles as one L2-normalized float32 matrix plus an ID table.
+
+    Row i of `matrix` is the embedding of profile `ids[i]`, so matching a batch
+    of segment embeddings against every profile is a single matrix product.
+    """
+
+    def __init__(self, ids, display_names, matrix, metadata=None, ann=None):
+        self.ids = list(ids)
+        self.display_names = list(display_names)
+        self.matrix = matrix
+        self.metadata = metadata or {}
+        self.ann = ann
+
+    def __len__(self):
+        return len(self.ids)
+
+    def similarities(self, embeddings, nprobe=None, rerank=50):
+        """
+        Cosine similarity of each embedding (rows) against every profile (columns).
+
+        With nprobe set and an ANN index available, only the re-ranked
+        candidates are scored (exactly); every other cell is -1.
+        """
+        import numpy as np
+
+        queries = normalize_rows(embeddings)
+        if not nprobe or self.ann is None or self.ann.size != len(self):
+            return queries @ self.matrix.T
+
+        scores = np.full((queries.shape[0], len(self)), -1.0, dtype=np.float32)
+        for row, candidates in enumerate(self.ann.search(queries, nprobe, rerank)):
+            scores[row, candidates] = np.asarray(self.matrix[candidates]) @ queries[row]
+        return scores
+
+
+def _read_profile_dirs(profiles_dir):
+    """Read the per-directory layout (<id>/embedding.npy + metadata.json)."""
     import numpy as np
 
-    profiles_dir = Path(profiles_dir)
-    profiles = {}
-
-    if not profiles_dir.exists():
-        return profiles
+    profiles = []
 
-    for profile_path in profiles_dir.iterdir():
+    for profile_path in sorted(profiles_dir.iterdir()):
         if profile_path.is_dir():
             embedding_file = profile_path / 'embedding.npy'
             metadata_file = profile_path / 'metadata.json'
@@ -261,11 +1358,7 @@ def load_profiles(profiles_dir):
                     with open(metadata_file) as f:
                         metadata = json.load(f)
 
-                    profiles[profile_path.name] = {
-                        'embedding': embedding,
-                        'display_name': metadata.get('display_name', metadata.get('name')),
-                        'metadata': metadata
-                    }
+                    profiles.append((profile_path.name, embedding, metadata))
                 except Exception as e:
                     # Skip corrupted profiles
                     sys.stderr.write(f'Warning: Could not load profile {profile_path.name}: {e}\n')
@@ -274,15 +1367,638 @@ def load_profiles(profiles_dir):
     return profiles
 
 
-def action_identify(data):
-    """Identify speakers in transcript segments."""
+def _matching_profiles(profiles, backend):
+    """
+    Profiles whose embeddings the backend's embeddings can be compared with.
+
+    Profiles enrolled with another backend (a different embedding version or
+    dimension) stay on disk but are skipped, with a warning, until they are
+    re-enrolled or that backend is active again.
+    """
+    import numpy as np
+
+    version = backend_version(backend)
+    dimension = None
+    matching = []
+
+    for profile_dir, embedding, metadata in profiles:
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        profile_version = metadata.get('embedding_version', EMBEDDING_VERSION)
+        if profile_version != version:
+            sys.stderr.write(
+                f'Warning: Skipping profile {profile_dir}: enrolled with {profile_version}, not {version}\n'
+            )
+            continue
+        if dimension is not None and embedding.size != dimension:
+            sys.stderr.write(
+                f'Warning: Skipping profile {profile_dir}: {embedding.size}-d embedding, expected {dimension}-d\n'
+            )
+            continue
+
+        dimension = embedding.size
+        matching.append((profile_dir, embedding, metadata))
+
+    return matching
+
+
+def update_profile_index(profiles_dir, ann_min_profiles=ANN_MIN_PROFILES, backend=None):
+    """
+    Rebuild the profile index and the consolidated embedding matrix.
+
+    The per-profile directories stay the source of truth; index.json is the
+    ID/metadata table and embeddings.npy holds one normalized row per profile
+    in index order. Only profiles enrolled with the backend's embedding
+    version are indexed. Libraries of at least ann_min_profiles also get an
+    IVF index (ivf.npz).
+    """
+    import numpy as np
+
+    profiles_dir = Path(profiles_dir)
+    profiles = _matching_profiles(_read_profile_dirs(profiles_dir), backend)
+
+    index = {
+        'version': PROFILE_INDEX_VERSION,
+        'embedding_version': backend_version(backend),
+        'embeddings_file': PROFILE_MATRIX_FILE,
+        'dimension': None,
+        'profiles': []
+    }
+
+    rows = []
+    for row, (profile_dir, embedding, metadata) in enumerate(profiles):
+        rows.append(embedding)
+        index['profiles'].append({
+            'id': metadata.get('profile_id', profile_dir),
+            'display_name': metadata.get('display_name', metadata.get('name')),
+            'path': profile_dir + '/',
+            'created_at': metadata.get('created_at'),
+            'row': row
+        })
+
+    matrix = normalize_rows(np.stack(rows)) if rows else np.zeros((0, 0), dtype=np.float32)
+    index['dimension'] = int(matrix.shape[1]) if rows else None
+
+    ann_path = profiles_dir / ANN_INDEX_FILE
+    if len(rows) >= ann_min_profiles:
+        previous = None
+        if ann_path.exists():
+            try:
+                previous = IVFIndex.load(ann_path)
+            except Exception:
+                previous = None
+        ann = IVFIndex.update(matrix, previous)
+        ann.save(ann_path)
+        index['ann'] = {
+            'file': ANN_INDEX_FILE,
+            'lists': int(ann.centroids.shape[0]),
+            'trained_on': ann.trained_on
+        }
+    elif ann_path.exists():
+        ann_path.unlink()
+
+    # Write matrix first, then the index that refers to it; both atomically
+    matrix_tmp = profiles_dir / (PROFILE_MATRIX_FILE + '.tmp')
+    with open(matrix_tmp, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(matrix_tmp, profiles_dir / PROFILE_MATRIX_FILE)
+
+    index_tmp = profiles_dir / 'index.json.tmp'
+    with open(index_tmp, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(index_tmp, profiles_dir / 'index.json')
+
+    # Profiles changed on disk - drop any warm copy
+    _profiles_cache.pop(str(profiles_dir), None)
+
+
+def _profiles_signature(profiles_dir):
+    """Cheap change marker for a profiles directory (directory and index mtimes)."""
+    index_file = profiles_dir / 'index.json'
+    try:
+        index_mtime = index_file.stat().st_mtime_ns if index_file.exists() else None
+        return (profiles_dir.stat().st_mtime_ns, index_mtime)
+    except OSError:
+        return None
+
+
+def load_profiles(profiles_dir, backend=None):
+    """
+    Load the profiles enrolled with the backend's embedding version as a
+    ProfileStore (cached until they change).
+    """
+    profiles_dir = Path(profiles_dir)
+
+    if not profiles_dir.exists():
+        return ProfileStore([], [], None)
+
+    version = backend_version(backend)
+    signature = _profiles_signature(profiles_dir)
+    cached = _profiles_cache.get(str(profiles_dir))
+    if cached and signature is not None and cached[0] == (signature, version):
+        return cached[1]
+
+    profiles = _read_profile_store(profiles_dir, version)
+    if profiles is None:
+        # Legacy layout (no consolidated matrix yet) or an index built for
+        # another backend: rebuild the index so later loads are a single
+        # memory-mapped read, falling back to reading the directories
+        try:
+            update_profile_index(profiles_dir, backend=backend)
+            signature = _profiles_signature(profiles_dir)
+            profiles = _read_profile_store(profiles_dir, version)
+        except OSError as e:
+            sys.stderr.write(f'Warning: Could not write consolidated profile store: {e}\n')
+        if profiles is None:
+            profiles = _read_legacy_profiles(profiles_dir, backend)
+
+    _profiles_cache[str(profiles_dir)] = ((signature, version), profiles)
+    return profiles
+
+
+def _read_profile_store(profiles_dir, version=EMBEDDING_VERSION):
+    """Read the consolidated store, or None if it is missing, stale or built for another version."""
+    import numpy as np
+
+    index_file = profiles_dir / 'index.json'
+    if not index_file.exists():
+        return None
+
+    try:
+        with open(index_file) as f:
+            index = json.load(f)
+
+        if index.get('version') != PROFILE_INDEX_VERSION:
+            return None
+        if index.get('embedding_version', EMBEDDING_VERSION) != version:
+            return None
+
+        matrix = np.load(
+            profiles_dir / index.get('embeddings_file', PROFILE_MATRIX_FILE),
+            mmap_mode='r'
+        )
+        entries = sorted(index.get('profiles', []), key=lambda entry: entry['row'])
+        if matrix.shape[0] != len(entries):
+            return None
+    except Exception:
+        return None
+
+    ann = None
+    if index.get('ann'):
+        try:
+            ann = IVFIndex.load(profiles_dir / index['ann'].get('file', ANN_INDEX_FILE))
+        except Exception as e:
+            sys.stderr.write(f'Warning: Could not load ANN index, using exact search: {e}\n')
+
+    return ProfileStore(
+        [entry['path'].rstrip('/') for entry in entries],
+        [entry.get('display_name') for entry in entries],
+        matrix if entries else None,
+        {entry['path'].rstrip('/'): entry for entry in entries},
+        ann
+    )
+
+
+def _read_legacy_profiles(profiles_dir, backend=None):
+    """Build a ProfileStore from the per-directory layout."""
     import numpy as np
 
+    profiles = _matching_profiles(_read_profile_dirs(profiles_dir), backend)
+    if not profiles:
+        return ProfileStore([], [], None)
+
+    return ProfileStore(
+        [profile_dir for profile_dir, _, _ in profiles],
+        [metadata.get('display_name', metadata.get('name')) for _, _, metadata in profiles],
+        normalize_rows(np.stack([embedding for _, embedding, _ in profiles])),
+        {profile_dir: metadata for profile_dir, _, metadata in profiles}
+    )
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks."""
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded LRU store of segment embeddings in a local SQLite file.
+
+    Entries are keyed by (audio content hash, start, end, model version), so a
+    retried or reprocessed recording reuses the embeddings computed on the
+    previous run. Content hashes are themselves cached by (path, size, mtime)
+    to avoid re-reading unchanged files.
+    """
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024):
+        import sqlite3
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db = sqlite3.connect(str(self.cache_dir / 'embeddings.sqlite3'))
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            ' key TEXT PRIMARY KEY, dtype TEXT, data BLOB, size INTEGER, last_used REAL)'
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS file_hashes ('
+            ' path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used)')
+        # Audio seconds each embedding was computed from (added later; NULL on older rows)
+        columns = [row[1] for row in self.db.execute('PRAGMA table_info(embeddings)')]
+        if 'seconds' not in columns:
+            self.db.execute('ALTER TABLE embeddings ADD COLUMN seconds REAL')
+        self.db.commit()
+
+    def content_hash(self, audio_path):
+        """Content hash of an audio file, reusing the stored value if unchanged."""
+        audio_path = str(audio_path)
+        stat = os.stat(audio_path)
+
+        row = self.db.execute(
+            'SELECT size, mtime_ns, sha256 FROM file_hashes WHERE path = ?', (audio_path,)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = hash_file(audio_path)
+        self.db.execute(
+            'INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)',
+            (audio_path, stat.st_size, stat.st_mtime_ns, digest)
+        )
+        self.db.commit()
+        return digest
+
+    @staticmethod
+    def key(content_hash, start, end, model_version=EMBEDDING_VERSION):
+        return f'{content_hash}:{float(start):.3f}:{float(end):.3f}:{model_version}'
+
+    def get_many(self, keys, seconds=None):
+        """
+        Look up embeddings; returns a list aligned with keys (None for misses).
+
+        If seconds is a list aligned with keys, hits fill in the stored audio
+        seconds (None for entries written before that was recorded).
+        """
+        import time
+        import numpy as np
+
+        results = []
+        found = []
+        for position, key in enumerate(keys):
+            row = self.db.execute(
+                'SELECT dtype, data, seconds FROM embeddings WHERE key = ?', (key,)
+            ).fetchone()
+            if row:
+                results.append(np.frombuffer(row[1], dtype=row[0]).copy())
+                if seconds is not None:
+                    seconds[position] = row[2]
+                found.append(key)
+                self.hits += 1
+            else:
+                results.append(None)
+                self.misses += 1
+
+        if found:
+            now = time.time()
+            self.db.executemany(
+                'UPDATE embeddings SET last_used = ? WHERE key = ?',
+                [(now, key) for key in found]
+            )
+            self.db.commit()
+
+        return results
+
+    def put_many(self, items):
+        """
+        Store (key, embedding) or (key, embedding, seconds) tuples and evict
+        least recently used entries.
+        """
+        import time
+        import numpy as np
+
+        now = time.time()
+        rows = []
+        for key, embedding, *rest in items:
+            embedding = np.ascontiguousarray(embedding).reshape(-1)
+            data = embedding.tobytes()
+            rows.append((key, embedding.dtype.str, data, len(data), now, rest[0] if rest else None))
+
+        if rows:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO embeddings (key, dtype, data, size, last_used, seconds)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self.evict()
+            self.db.commit()
+
+    def evict(self):
+        """Drop least recently used entries until the store fits max_bytes."""
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM embeddings').fetchone()[0]
+        if not self.max_bytes or total <= self.max_bytes:
+            return
+
+        for key, size in self.db.execute(
+            'SELECT key, size FROM embeddings ORDER BY last_used ASC'
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.db.execute('DELETE FROM embeddings WHERE key = ?', (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self, since=None):
+        """Counters for the life of the process, or relative to an earlier stats() snapshot."""
+        counters = {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+        if since:
+            counters = {name: value - since.get(name, 0) for name, value in counters.items()}
+        return counters
+
+
+def get_embedding_cache(data):
+    """Embedding cache for a request, or None when caching is disabled."""
+    cache_dir = data.get('embedding_cache_dir')
+    if not cache_dir:
+        return None
+
+    cache_dir = expand_path(cache_dir)
+    max_mb = data.get('embedding_cache_max_mb', 64)
+
+    cache = _embedding_caches.get(str(cache_dir))
+    if cache is None:
+        cache = EmbeddingCache(cache_dir)
+        _embedding_caches[str(cache_dir)] = cache
+
+    cache.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+    return cache
+
+
+def merge_segments(segments, max_gap=0.5, max_window=15.0):
+    """
+    Merge consecutive same-speaker segments into longer windows.
+
+    Sentence-level segments are often shorter than the 1 s an embedding needs;
+    segments of one speaker separated by less than max_gap (and not interrupted
+    by another speaker) are joined into windows of at most max_window seconds.
+    Returns {speaker_id: [(start, end), ...]}.
+    """
+    windows = {}
+    current = None
+
+    def flush():
+        if current:
+            windows.setdefault(current[0], []).append((current[1], current[2]))
+
+    for segment in sorted(segments, key=lambda s: s.get('start', 0)):
+        speaker_id = segment.get('speaker_id') or segment.get('speaker', '').replace('Speaker ', 'speaker_')
+        start = segment.get('start', 0)
+        end = segment.get('end', 0)
+        if end <= start:
+            windows.setdefault(speaker_id, [])
+            continue
+
+        if current and current[0] == speaker_id and start - current[2] <= max_gap \
+                and max(end, current[2]) - current[1] <= max_window:
+            current = (speaker_id, current[1], max(end, current[2]))
+        else:
+            flush()
+            current = (speaker_id, start, end)
+
+    flush()
+    return windows
+
+
+def sampling_order(windows):
+    """
+    Order a speaker's windows for sampling: longest first, then spread across
+    the recording (each next window is the one farthest from those already
+    chosen, preferring longer windows on ties).
+    """
+    if not windows:
+        return []
+
+    remaining = sorted(windows, key=lambda w: (w[1] - w[0]), reverse=True)
+    ordered = [remaining.pop(0)]
+    chosen_midpoints = [(ordered[0][0] + ordered[0][1]) / 2]
+
+    while remaining:
+        best_index = max(
+            range(len(remaining)),
+            key=lambda i: (
+                min(abs((remaining[i][0] + remaining[i][1]) / 2 - m) for m in chosen_midpoints),
+                remaining[i][1] - remaining[i][0]
+            )
+        )
+        window = remaining.pop(best_index)
+        ordered.append(window)
+        chosen_midpoints.append((window[0] + window[1]) / 2)
+
+    return ordered
+
+
+def open_audio_source(data, audio_path, model, pcm=None):
+    """
+    Audio for the model: the raw PCM sidecar described by pcm (a job, or the
+    request itself) when there is one at the model's sample rate, otherwise a
+    decode honouring the request's max_decode_mb cap.
+    """
+    sample_rate = get_model_sample_rate(model)
+    pcm = pcm if pcm is not None else data
+    if pcm.get('pcm_path') and pcm.get('pcm_sample_rate', 16000) == sample_rate:
+        try:
+            source = PCMSource(
+                expand_path(pcm['pcm_path']),
+                sample_rate,
+                pcm.get('pcm_format', 's16le'),
+                as_tensor=not hasattr(model, 'embed_waveforms')
+            )
+            metrics().count('pcm_sidecar')
+            return source
+        except Exception as e:
+            sys.stderr.write(f'Warning: Could not map PCM sidecar, decoding instead: {e}\n')
+
+    max_decode_mb = data.get('max_decode_mb', 512)
+    return AudioSource(
+        audio_path,
+        sample_rate,
+        max_bytes=max_decode_mb * 1024 * 1024 if max_decode_mb else None
+    )
+
+
+class SegmentEmbedder:
+    """
+    Embeds spans of one recording, consulting the embedding cache first.
+
+    The model and the decoded audio are only loaded once a span actually
+    misses the cache.
+    """
+
+    def __init__(self, data, audio_path, cache=None, source_loader=None):
+        self.data = data
+        self.audio_path = audio_path
+        self.cache = cache
+        self.source_loader = source_loader
+        self.vad = get_vad(data)
+        self.content_hash = None
+        self.model = None
+        self.source = None
+
+        if cache is not None:
+            with metrics().stage('io'):
+                self.content_hash = cache.content_hash(audio_path)
+
+    def _load(self):
+        if self.model is not None:
+            return
+
+        configure_threads(self.data.get('threads'))
+
+        try:
+            self.model = load_model(self.data)
+        except Exception as e:
+            output_error(f'Failed to load model: {str(e)}', 'model_error')
+
+        # Decode the recording once; segment crops are then slices of this waveform
+        try:
+            with metrics().stage('decode'):
+                if self.source_loader is not None:
+                    self.source = self.source_loader()
+                else:
+                    self.source = open_audio_source(self.data, self.audio_path, self.model)
+        except Exception as e:
+            output_error(f'Failed to decode audio: {str(e)}', 'audio_error')
+
+        if self.vad is not None:
+            with metrics().stage('vad'):
+                self.vad.calibrate(self.source)
+
+    def embed(self, spans):
+        """
+        One embedding (or None) per (start, end) span, in order, and the audio
+        seconds each embedding was computed from after VAD trimming.
+        """
+        embeddings = [None] * len(spans)
+        seconds = [None] * len(spans)
+        keys = []
+
+        if self.cache is not None and spans:
+            version = backend_version(self.data.get('backend'))
+            if self.vad is not None:
+                version = f'{version}+{self.vad.version}'
+            keys = [self.cache.key(self.content_hash, start, end, version) for start, end in spans]
+            try:
+                with metrics().stage('io'):
+                    embeddings = self.cache.get_many(keys, seconds)
+                metrics().count('cache_hits', sum(1 for e in embeddings if e is not None))
+            except Exception as e:
+                sys.stderr.write(f'Warning: Embedding cache lookup failed: {e}\n')
+
+        # Cache entries from before seconds were stored count the whole span
+        for index, (start, end) in enumerate(spans):
+            if embeddings[index] is not None and seconds[index] is None:
+                seconds[index] = end - start
+
+        pending = [index for index, embedding in enumerate(embeddings) if embedding is None]
+        if not pending:
+            return embeddings, seconds
+
+        self._load()
+        computed_seconds = [None] * len(pending)
+        computed = embed_segments(
+            self.model,
+            self.source,
+            [spans[index] for index in pending],
+            batch_size=self.data.get('batch_size', 8),
+            vad=self.vad,
+            seconds=computed_seconds
+        )
+        for index, embedding, embedded_seconds in zip(pending, computed, computed_seconds):
+            embeddings[index] = embedding
+            seconds[index] = embedded_seconds if embedding is not None else None
+
+        if self.cache is not None:
+            try:
+                with metrics().stage('io'):
+                    self.cache.put_many([
+                        (keys[index], embeddings[index], seconds[index])
+                        for index in pending if embeddings[index] is not None
+                    ])
+            except Exception as e:
+                sys.stderr.write(f'Warning: Could not update embedding cache: {e}\n')
+
+        return embeddings, seconds
+
+
+def similarity_report(similarity, speaker_ids, profile_names, max_profiles=100):
+    """
+    JSON form of the speakers x profiles matrix. Large libraries only report
+    the columns that rank in some speaker's top 5.
+    """
+    import numpy as np
+
+    columns = np.arange(similarity.shape[1])
+    if max_profiles and similarity.shape[1] > max_profiles:
+        top = min(5, similarity.shape[1])
+        columns = np.unique(np.argsort(-similarity, axis=1)[:, :top])
+
+    return {
+        'speakers': speaker_ids,
+        'profiles': [profile_names[column] for column in columns],
+        'scores': np.round(similarity[:, columns].astype(np.float64), 3).tolist()
+    }
+
+
+def assign_speakers(similarity, threshold):
+    """
+    One-to-one speaker -> profile assignment maximizing total similarity.
+
+    Pairs below the threshold never count towards the total and are dropped
+    from the result, so a profile is used for at most one speaker and a
+    speaker may stay unassigned. Returns {speaker_row: profile_row}.
+    """
+    import numpy as np
+    from scipy.optimize import linear_sum_assignment
+
+    if similarity.size == 0:
+        return {}
+
+    gains = np.where(similarity >= threshold, similarity, 0.0)
+    speaker_rows, profile_rows = linear_sum_assignment(gains, maximize=True)
+
+    return {
+        int(speaker_row): int(profile_row)
+        for speaker_row, profile_row in zip(speaker_rows, profile_rows)
+        if similarity[speaker_row, profile_row] >= threshold
+    }
+
+
+def action_identify(data):
+    """
+    Identify speakers in transcript segments.
+
+    pcm_path (with pcm_sample_rate and pcm_format) may name a raw PCM copy of
+    the recording, which is memory-mapped instead of decoding audio_path.
+    Segments are merged into per-speaker windows and sampled in rounds (one
+    window per unresolved speaker per round, batched together). A speaker stops
+    being sampled once a window clears threshold + early_exit_margin, its
+    audio-seconds budget is spent, or it runs out of windows. Labels come from
+    a joint one-to-one assignment over the speakers x profiles matrix.
+    """
     audio_path = data.get('audio_path')
     segments = data.get('segments', [])
     profiles_dir = expand_path(data.get('profiles_dir', '~/.summarai/profiles'))
-    threshold = data.get('threshold', 0.70)
-    hf_token = data.get('huggingface_token')
 
     if not audio_path:
         output_error('Audio path is required', 'validation_error')
@@ -292,81 +2008,578 @@ def action_identify(data):
         output_error(f'Audio file not found: {audio_path}', 'file_not_found')
 
     # Load enrolled profiles
-    profiles = load_profiles(profiles_dir)
+    with metrics().stage('io'):
+        profiles = load_profiles(profiles_dir, data.get('backend'))
 
     if not profiles:
         # No profiles enrolled - return empty mapping (will use generic labels)
-        output_json({
+        return {
             'success': True,
             'speaker_mapping': {},
             'confidence_scores': {},
             'message': 'No speaker profiles enrolled'
-        })
-        return
+        }
+
+    return identify_recording(data, audio_path, segments, profiles)
+
+
+def identify_recording(data, audio_path, segments, profiles, source_loader=None):
+    """
+    Identify the speakers of one recording against loaded profiles.
+
+    source_loader, if given, returns the decoded AudioSource (used by
+    identify_batch to hand over audio decoded ahead of time).
+    """
+    import numpy as np
 
+    threshold = data.get('threshold', 0.70)
+    early_exit_margin = data.get('early_exit_margin', 0.15)
+    budget_seconds = data.get('budget_seconds', 30.0)
+    min_window = data.get('min_window_seconds', 1.0)
+    ann_nprobe = data.get('ann_nprobe', 8) if data.get('ann') else None
+    ann_rerank = data.get('ann_rerank', 50)
+
+    # Reuse embeddings computed on earlier runs over the same audio content
+    cache = None
+    cache_before = None
     try:
-        model = get_model(hf_token)
+        cache = get_embedding_cache(data)
+        cache_before = cache.stats() if cache is not None else None
+        embedder = SegmentEmbedder(data, audio_path, cache, source_loader)
     except Exception as e:
-        output_error(f'Failed to load model: {str(e)}', 'model_error')
+        sys.stderr.write(f'Warning: Embedding cache unavailable: {e}\n')
+        cache = None
+        embedder = SegmentEmbedder(data, audio_path, source_loader=source_loader)
+
+    speaker_windows = merge_segments(
+        segments,
+        max_gap=data.get('merge_gap_seconds', 0.5),
+        max_window=data.get('max_window_seconds', 15.0)
+    )
+    queues = {
+        speaker_id: [w for w in sampling_order(windows) if w[1] - w[0] >= min_window]
+        for speaker_id, windows in speaker_windows.items()
+    }
 
-    # Group segments by speaker_id
-    speaker_segments = {}
-    for segment in segments:
-        speaker_id = segment.get('speaker_id') or segment.get('speaker', '').replace('Speaker ', 'speaker_')
-        if speaker_id not in speaker_segments:
-            speaker_segments[speaker_id] = []
-        speaker_segments[speaker_id].append(segment)
+    # speakers x profiles similarity, aggregated as the best score over each
+    # speaker's sampled windows
+    speaker_ids = list(speaker_windows)
+    similarity = np.full((len(speaker_ids), len(profiles)), -1.0, dtype=np.float32)
+    speaker_rows = {speaker_id: row for row, speaker_id in enumerate(speaker_ids)}
+    embedded_seconds = {speaker_id: 0.0 for speaker_id in speaker_windows}
+    # Running sum of each speaker's normalized window embeddings (for feedback)
+    speaker_sums = {}
+    early_exit_score = threshold + early_exit_margin
+
+    while True:
+        # Next window for every speaker that is still undecided and within budget
+        batch = []
+        for speaker_id, queue in queues.items():
+            if not queue or similarity[speaker_rows[speaker_id]].max() >= early_exit_score:
+                continue
+            remaining = budget_seconds - embedded_seconds[speaker_id] if budget_seconds else None
+            if remaining is not None and remaining < min_window:
+                continue
+
+            start, end = queue.pop(0)
+            if remaining is not None and end - start > remaining:
+                # Trim around the window's centre to fit the budget
+                middle = (start + end) / 2
+                start, end = middle - remaining / 2, middle + remaining / 2
+            batch.append((speaker_id, start, end))
+
+        if not batch:
+            break
+
+        embeddings, seconds = embedder.embed([(start, end) for _, start, end in batch])
+        metrics().count('windows_sampled', len(batch))
+
+        # Count only audio that produced an embedding, after VAD trimming
+        embedded = [index for index, embedding in enumerate(embeddings) if embedding is not None]
+        for index in embedded:
+            embedded_seconds[batch[index][0]] += seconds[index]
+        if not embedded:
+            continue
+
+        # Compare every segment against every profile in one matrix product
+        with metrics().stage('matching'):
+            queries = normalize_rows(np.stack([
+                np.asarray(embeddings[index], dtype=np.float32).reshape(-1) for index in embedded
+            ]))
+            scores = profiles.similarities(queries, nprobe=ann_nprobe, rerank=ann_rerank)
+
+            for row, index in enumerate(embedded):
+                speaker_id = batch[index][0]
+                speaker_row = speaker_rows[speaker_id]
+                np.maximum(similarity[speaker_row], scores[row], out=similarity[speaker_row])
+                total, count = speaker_sums.get(speaker_id, (0.0, 0))
+                speaker_sums[speaker_id] = (total + queries[row], count + 1)
+        metrics().count('profiles_compared', len(embedded) * len(profiles))
+
+    with metrics().stage('matching'):
+        assignment = assign_speakers(similarity, threshold)
 
     speaker_mapping = {}
     confidence_scores = {}
 
-    for speaker_id, segs in speaker_segments.items():
-        # Get a representative segment for this speaker
-        # Use the longest segment or middle segment for better sample
-        segs_sorted = sorted(segs, key=lambda s: (s.get('end', 0) - s.get('start', 0)), reverse=True)
+    for speaker_row, speaker_id in enumerate(speaker_ids):
+        profile_row = assignment.get(speaker_row)
+        if profile_row is not None:
+            speaker_mapping[speaker_id] = profiles.display_names[profile_row]
+            confidence_scores[speaker_id] = round(float(similarity[speaker_row, profile_row]), 3)
+        else:
+            # Keep generic label (null in mapping means no change)
+            best_score = float(similarity[speaker_row].max()) if len(profiles) else 0
+            speaker_mapping[speaker_id] = None
+            confidence_scores[speaker_id] = round(best_score, 3) if best_score > 0 else 0
 
-        best_match = None
-        best_score = 0
+    feedback = {}
+    if data.get('feedback'):
+        feedback = feed_back_matches(
+            data, speaker_ids, assignment, similarity, profiles, speaker_sums
+        )
 
-        # Try up to 3 segments to get a good match
-        for seg in segs_sorted[:3]:
-            start = seg.get('start', 0)
-            end = seg.get('end', 0)
+    unknown_speakers = {}
+    if data.get('unknown_dir'):
+        unknown_speakers = remember_unknown_speakers(data, speaker_ids, assignment, speaker_sums)
 
-            # Skip very short segments
-            if end - start < 1.0:
+    response = {
+        'success': True,
+        'speaker_mapping': speaker_mapping,
+        'confidence_scores': confidence_scores,
+        'feedback': feedback,
+        'unknown_speakers': unknown_speakers,
+        'embedded_seconds': {
+            speaker_id: round(seconds, 2) for speaker_id, seconds in embedded_seconds.items()
+        },
+        'similarity_matrix': similarity_report(
+            similarity, speaker_ids, profiles.display_names, data.get('matrix_max_profiles', 100)
+        )
+    }
+    if cache is not None:
+        response['embedding_cache'] = cache.stats(since=cache_before)
+    if embedder.vad is not None:
+        response['vad'] = embedder.vad.stats()
+    return response
+
+
+def feed_back_matches(data, speaker_ids, assignment, similarity, profiles, speaker_sums):
+    """
+    Fold confidently identified speakers back into their profiles.
+
+    A speaker whose assigned score clears feedback_threshold contributes the
+    mean of its already-computed window embeddings as one new sample, so
+    profiles improve from normal runs without any extra inference. Returns
+    {speaker_id: display_name} for the profiles that were updated.
+    """
+    profiles_dir = expand_path(data.get('profiles_dir', '~/.summarai/profiles'))
+    feedback_threshold = data.get('feedback_threshold', 0.85)
+    version = backend_version(data.get('backend'))
+    updated = {}
+
+    for speaker_row, profile_row in assignment.items():
+        speaker_id = speaker_ids[speaker_row]
+        if similarity[speaker_row, profile_row] < feedback_threshold or speaker_id not in speaker_sums:
+            continue
+
+        profile_path = profiles_dir / profiles.ids[profile_row]
+        try:
+            with open(profile_path / 'metadata.json') as f:
+                metadata = json.load(f)
+            if metadata.get('embedding_version', EMBEDDING_VERSION) != version:
                 continue
 
-            try:
-                # Extract embedding for this segment
-                segment_embedding = extract_embedding(model, audio_path, start, end)
+            total, count = speaker_sums[speaker_id]
+            metadata['feedback_samples'] = metadata.get('feedback_samples', 0) + 1
+            fold_into_profile(profile_path, [total / count], metadata)
+            updated[speaker_id] = profiles.display_names[profile_row]
+        except Exception as e:
+            sys.stderr.write(f'Warning: Could not update profile {profile_path.name}: {e}\n')
+
+    if updated:
+        with metrics().stage('io'):
+            update_profile_index(profiles_dir, backend=data.get('backend'))
+        metrics().count('profiles_updated', len(updated))
+
+    return updated
+
+
+def action_identify_batch(data):
+    """
+    Identify speakers for several recordings in one call.
+
+    Profiles and the model are loaded once. While one file is being embedded,
+    the next files are decoded in a thread pool. Each file's result is emitted
+    as soon as it finishes (server mode streams it as a 'result' event); the
+    final response summarizes the batch.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    jobs = data.get('jobs') or []
+    profiles_dir = expand_path(data.get('profiles_dir', '~/.summarai/profiles'))
+    decode_workers = max(1, int(data.get('decode_workers', 2)))
+    prefetch = decode_workers + 1
 
-                # Compare against all profiles
-                for profile_id, profile_data in profiles.items():
-                    similarity = cosine_similarity(segment_embedding, profile_data['embedding'])
+    if not isinstance(jobs, list):
+        output_error('jobs must be a list of {audio_path, segments}', 'validation_error')
 
-                    if similarity > best_score:
-                        best_score = similarity
-                        best_match = profile_data['display_name']
+    with metrics().stage('io'):
+        profiles = load_profiles(profiles_dir, data.get('backend'))
 
+    model = None
+    if profiles and jobs:
+        configure_threads(data.get('threads'))
+        try:
+            model = load_model(data)
+        except Exception as e:
+            output_error(f'Failed to load model: {str(e)}', 'model_error')
+
+    audio_paths = [
+        expand_path(job['audio_path']) if isinstance(job, dict) and job.get('audio_path') else None
+        for job in jobs
+    ]
+
+    results = []
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=decode_workers) as pool:
+        decodes = {}
+
+        def schedule(index):
+            if model is None or index >= len(jobs) or index in decodes:
+                return
+            audio_path = audio_paths[index]
+            if audio_path is not None and audio_path.exists():
+                decodes[index] = pool.submit(open_audio_source, data, audio_path, model, jobs[index])
+
+        for index in range(min(prefetch, len(jobs))):
+            schedule(index)
+
+        for index, job in enumerate(jobs):
+            schedule(index + prefetch)
+            audio_path = audio_paths[index]
+            decode = decodes.pop(index, None)
+
+            try:
+                if audio_path is None:
+                    output_error('Audio path is required', 'validation_error')
+                if not audio_path.exists():
+                    output_error(f'Audio file not found: {audio_path}', 'file_not_found')
+
+                if not profiles:
+                    result = {
+                        'success': True,
+                        'speaker_mapping': {},
+                        'confidence_scores': {},
+                        'message': 'No speaker profiles enrolled'
+                    }
+                else:
+                    result = identify_recording(
+                        data,
+                        audio_path,
+                        job.get('segments', []),
+                        profiles,
+                        source_loader=decode.result if decode is not None else None
+                    )
+            except ActionError as e:
+                result = e.to_response()
             except Exception as e:
-                sys.stderr.write(f'Warning: Failed to process segment {start}-{end}: {e}\n')
-                continue
+                result = ActionError(f'Unexpected error: {str(e)}', 'unexpected_error').to_response()
+            finally:
+                if decode is not None:
+                    decode.cancel()
+
+            if result.get('success') is False:
+                failed += 1
 
-        # Apply match if above threshold
-        if best_match and best_score >= threshold:
-            speaker_mapping[speaker_id] = best_match
-            confidence_scores[speaker_id] = round(best_score, 3)
+            result.update({'index': index, 'audio_path': str(audio_path) if audio_path else None})
+            if _emit is not None:
+                _emit(dict(result, event='result'))
+            else:
+                results.append(result)
+
+    response = {
+        'success': True,
+        'count': len(jobs),
+        'failed': failed
+    }
+    if _emit is None:
+        response['results'] = results
+    return response
+
+
+UNKNOWN_INDEX_VERSION = '1.0'
+UNKNOWN_DIR = '~/.summarai/unknown-speakers'
+
+
+class UnknownSpeakerStore:
+    """
+    Embeddings of speakers that no profile matched, clustered incrementally.
+
+    index.json lists the entries ({id, recording, speaker_id, cluster,
+    outputs, label}) and clusters ({id, count, label}); embeddings.npy holds
+    one normalized row per entry and centroids.npy the running sum of each
+    cluster's members. A new embedding joins the cluster whose centroid is most
+    similar if that clears cluster_threshold, otherwise it starts a cluster.
+    """
+
+    def __init__(self, directory, embedding_version):
+        import numpy as np
+
+        self.directory = Path(directory)
+        self.index = {
+            'version': UNKNOWN_INDEX_VERSION,
+            'embedding_version': embedding_version,
+            'entries': [],
+            'clusters': []
+        }
+        self.embeddings = None
+        self.centroids = None
+
+        index_file = self.directory / 'index.json'
+        if index_file.exists():
+            with open(index_file) as f:
+                self.index = json.load(f)
+            if self.index['entries']:
+                self.embeddings = np.load(self.directory / 'embeddings.npy')
+                self.centroids = np.load(self.directory / 'centroids.npy')
+
+    @property
+    def compatible(self):
+        return self.index.get('version') == UNKNOWN_INDEX_VERSION
+
+    def entry(self, entry_id):
+        return next((e for e in self.index['entries'] if e['id'] == entry_id), None)
+
+    def cluster_similarities(self, embedding):
+        """Cosine similarity of one embedding to every cluster centroid."""
+        import numpy as np
+
+        if self.centroids is None:
+            return np.zeros(0, dtype=np.float32)
+        return normalize_rows(self.centroids) @ normalize_rows(embedding)[0]
+
+    def add(self, embedding, speaker_id, cluster_threshold=0.75, exclude=()):
+        """
+        Store one unmatched speaker's embedding; returns its entry. Clusters in
+        exclude (already used by another speaker of the same recording, whom
+        diarization says is someone else) are never joined.
+        """
+        import numpy as np
+        from datetime import datetime
+
+        row = normalize_rows(embedding)
+        similarities = self.cluster_similarities(row)
+        for cluster_row, cluster in enumerate(self.index['clusters']):
+            if cluster['id'] in exclude:
+                similarities[cluster_row] = -1.0
+
+        if similarities.size and similarities.max() >= cluster_threshold:
+            cluster_row = int(similarities.argmax())
+            self.centroids[cluster_row] += row[0]
+            cluster = self.index['clusters'][cluster_row]
+            cluster['count'] += 1
         else:
-            # Keep generic label (null in mapping means no change)
-            speaker_mapping[speaker_id] = None
-            confidence_scores[speaker_id] = round(best_score, 3) if best_score > 0 else 0
+            cluster = {'id': f'cluster_{len(self.index["clusters"]):05d}', 'count': 1, 'label': None}
+            self.index['clusters'].append(cluster)
+            self.centroids = row.copy() if self.centroids is None else np.vstack([self.centroids, row])
+
+        entry = {
+            'id': f'unknown_{len(self.index["entries"]):06d}',
+            'speaker_id': speaker_id,
+            'cluster': cluster['id'],
+            'recording': None,
+            'outputs': [],
+            'label': None,
+            'created_at': datetime.utcnow().isoformat() + 'Z'
+        }
+        self.index['entries'].append(entry)
+        self.embeddings = row.copy() if self.embeddings is None else np.vstack([self.embeddings, row])
+        return entry
+
+    def save(self):
+        import numpy as np
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.embeddings is not None:
+            _save_atomic(self.directory / 'embeddings.npy', lambda f: np.save(f, self.embeddings))
+            _save_atomic(self.directory / 'centroids.npy', lambda f: np.save(f, self.centroids))
+        _save_atomic(
+            self.directory / 'index.json',
+            lambda f: f.write(json.dumps(self.index, indent=2).encode())
+        )
+
+
+def remember_unknown_speakers(data, speaker_ids, assignment, speaker_sums):
+    """
+    Persist the mean window embedding of every speaker left unassigned, so a
+    later relabel can name them without re-embedding. Returns
+    {speaker_id: entry_id}; Node links the entries to the output files.
+    """
+    store_dir = expand_path(data['unknown_dir'])
+    version = backend_version(data.get('backend'))
+    unassigned = [
+        speaker_id for row, speaker_id in enumerate(speaker_ids)
+        if row not in assignment and speaker_id in speaker_sums
+    ]
+    if not unassigned:
+        return {}
 
-    output_json({
+    try:
+        store = UnknownSpeakerStore(store_dir, version)
+        if not store.compatible or store.index.get('embedding_version') != version:
+            sys.stderr.write(f'Warning: Unknown speaker store {store_dir} uses another embedding version\n')
+            return {}
+
+        entries = {}
+        used_clusters = set()
+        for speaker_id in unassigned:
+            total, count = speaker_sums[speaker_id]
+            entry = store.add(
+                total / count, speaker_id, data.get('unknown_cluster_threshold', 0.75), used_clusters
+            )
+            used_clusters.add(entry['cluster'])
+            entries[speaker_id] = entry['id']
+        with metrics().stage('io'):
+            store.save()
+        metrics().count('unknown_speakers_stored', len(entries))
+        return entries
+    except Exception as e:
+        sys.stderr.write(f'Warning: Could not store unknown speakers: {e}\n')
+        return {}
+
+
+def action_link_unknown(data):
+    """Attach a recording and its output files to stored unknown-speaker entries."""
+    store_dir = expand_path(data.get('unknown_dir', UNKNOWN_DIR))
+    entry_ids = data.get('entries') or []
+
+    store = UnknownSpeakerStore(store_dir, backend_version(data.get('backend')))
+    linked = 0
+    for entry_id in entry_ids:
+        entry = store.entry(entry_id)
+        if entry is None:
+            continue
+        entry['recording'] = data.get('recording')
+        entry['outputs'] = sorted(set(entry['outputs']) | {str(p) for p in data.get('outputs') or []})
+        linked += 1
+
+    if linked:
+        store.save()
+    return {'success': True, 'linked': linked}
+
+
+# "[00:01.250 - 00:04.000] Speaker 0: text" lines written by createSegmentsContent
+SEGMENT_LINE_PREFIX = r'^(\[\d+:\d{2}\.\d{3} - \d+:\d{2}\.\d{3}\] )'
+
+
+def relabel_output(path, speaker_id, label):
+    """Rename one generic speaker in a segments/markdown file; returns lines changed."""
+    import re
+
+    generic = speaker_id.replace('speaker_', 'Speaker ', 1)
+    pattern = re.compile(SEGMENT_LINE_PREFIX + re.escape(generic) + ': ', re.MULTILINE)
+
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    content, changed = pattern.subn(lambda match: f'{match.group(1)}{label}: ', content)
+    if changed:
+        _save_atomic(Path(path), lambda f: f.write(content.encode('utf-8')))
+    return changed
+
+
+def action_relabel(data):
+    """
+    Name past unknown speakers after an enrolled profile.
+
+    Every unknown-speaker cluster whose centroid clears the threshold against
+    the profile's embedding is labelled with the profile, and its entries'
+    generic labels are rewritten in their linked _segments.txt/markdown
+    outputs. No audio is decoded or embedded.
+    """
+    name = data.get('name')
+    profiles_dir = expand_path(data.get('profiles_dir', '~/.summarai/profiles'))
+    store_dir = expand_path(data.get('unknown_dir', UNKNOWN_DIR))
+    threshold = data.get('threshold', 0.70)
+    dry_run = bool(data.get('dry_run'))
+
+    if not name:
+        output_error('Name is required for relabel', 'validation_error')
+
+    profiles = load_profiles(profiles_dir, data.get('backend'))
+    wanted = {profile_id_for(name), name.lower()}
+    rows = [
+        row for row, (profile_id, display_name) in enumerate(zip(profiles.ids, profiles.display_names))
+        if profile_id in wanted or (display_name or '').lower() in wanted
+    ]
+    if not rows:
+        output_error(f'Profile "{name}" not found', 'profile_not_found')
+    label = profiles.display_names[rows[0]]
+
+    if not (store_dir / 'index.json').exists():
+        return {'success': True, 'name': label, 'clusters': [], 'entries_relabelled': 0,
+                'files_rewritten': [], 'dry_run': dry_run}
+
+    version = backend_version(data.get('backend'))
+    store = UnknownSpeakerStore(store_dir, version)
+    if not store.compatible or store.index.get('embedding_version') != version:
+        output_error(
+            f'Unknown speakers in {store_dir} were recorded with embedding version '
+            f'{store.index.get("embedding_version")} (format {store.index.get("version")}), '
+            f'not {version}',
+            'incompatible_unknown_store'
+        )
+    similarities = store.cluster_similarities(profiles.matrix[rows[0]])
+
+    # Best clusters first; a person is one speaker per recording, so a cluster
+    # sharing a recording with an already chosen one is someone else
+    candidates = sorted(
+        (
+            (float(similarities[cluster_row]), cluster)
+            for cluster_row, cluster in enumerate(store.index['clusters'])
+            if similarities[cluster_row] >= threshold and cluster.get('label') in (None, label)
+        ),
+        key=lambda item: -item[0]
+    )
+
+    clusters = []
+    relabelled = 0
+    rewritten = set()
+    chosen_recordings = set()
+    for similarity, cluster in candidates:
+        members = [e for e in store.index['entries'] if e['cluster'] == cluster['id']]
+        recordings = {e['recording'] for e in members if e['recording']}
+        if recordings & chosen_recordings:
+            continue
+        chosen_recordings |= recordings
+
+        entries = [e for e in members if e['label'] != label]
+        clusters.append({'id': cluster['id'], 'similarity': round(similarity, 3), 'entries': len(entries)})
+        if dry_run:
+            continue
+
+        cluster['label'] = label
+        for entry in entries:
+            for output in entry['outputs']:
+                try:
+                    if relabel_output(output, entry['speaker_id'], label):
+                        rewritten.add(output)
+                except OSError as e:
+                    sys.stderr.write(f'Warning: Could not relabel {output}: {e}\n')
+            entry['label'] = label
+            relabelled += 1
+
+    if relabelled:
+        store.save()
+
+    return {
         'success': True,
-        'speaker_mapping': speaker_mapping,
-        'confidence_scores': confidence_scores
-    })
+        'name': label,
+        'clusters': clusters,
+        'entries_relabelled': relabelled,
+        'files_rewritten': sorted(rewritten),
+        'dry_run': dry_run
+    }
 
 
 def action_list(data):
@@ -388,16 +2601,17 @@ def action_list(data):
                             'name': metadata.get('name'),
                             'display_name': metadata.get('display_name'),
                             'created_at': metadata.get('created_at'),
-                            'sample_duration_seconds': metadata.get('sample_duration_seconds')
+                            'sample_duration_seconds': metadata.get('sample_duration_seconds'),
+                            'sample_count': metadata.get('sample_count', 1)
                         })
                     except Exception:
                         continue
 
-    output_json({
+    return {
         'success': True,
         'profiles': profiles,
         'count': len(profiles)
-    })
+    }
 
 
 def action_delete(data):
@@ -411,9 +2625,7 @@ def action_delete(data):
         output_error('Name is required for deletion', 'validation_error')
 
     # Try to find profile by name or id
-    profile_id = name.lower().replace(' ', '_')
-    profile_id = ''.join(c for c in profile_id if c.isalnum() or c == '_')
-    profile_path = profiles_dir / profile_id
+    profile_path = profiles_dir / profile_id_for(name)
 
     if not profile_path.exists():
         # Try to find by display_name
@@ -438,48 +2650,124 @@ def action_delete(data):
 
     try:
         shutil.rmtree(profile_path)
-        update_profile_index(profiles_dir)
+        update_profile_index(profiles_dir, backend=data.get('backend'))
 
-        output_json({
+        return {
             'success': True,
             'deleted': name,
             'profile_path': str(profile_path)
-        })
+        }
     except Exception as e:
         output_error(f'Failed to delete profile: {str(e)}', 'delete_error')
 
 
-def main():
-    """Main entry point - read JSON from stdin, execute action, output JSON."""
+ACTIONS = {
+    'check': action_check,
+    'enroll': action_enroll,
+    'enroll_bulk': action_enroll_bulk,
+    'identify': action_identify,
+    'identify_batch': action_identify_batch,
+    'list': action_list,
+    'delete': action_delete,
+    'link_unknown': action_link_unknown,
+    'relabel': action_relabel
+}
+
+
+def handle_request(input_data, emit=None):
+    """
+    Parse one JSON request, run its action and return the response dict.
+
+    Every response (including errors) carries the request's stage timings and
+    counters. emit, if given, receives partial results from streaming actions
+    before the final response.
+    """
+    global _metrics, _emit
+    _metrics = RequestMetrics()
+    _emit = emit
+
     try:
-        # Read input from stdin
-        input_data = sys.stdin.read()
+        response = _run_request(input_data)
+    finally:
+        _emit = None
+    response.update(_metrics.to_dict())
+    return response
 
+
+def _run_request(input_data):
+    """Route a raw request to its action handler."""
+    try:
         if not input_data.strip():
             output_error('No input data provided', 'input_error')
 
-        data = json.loads(input_data)
+        try:
+            with metrics().stage('io'):
+                data = json.loads(input_data)
+        except json.JSONDecodeError as e:
+            output_error(f'Invalid JSON input: {str(e)}', 'json_error')
+
         action = data.get('action', 'check')
 
         # Route to appropriate action handler
-        actions = {
-            'check': action_check,
-            'enroll': action_enroll,
-            'identify': action_identify,
-            'list': action_list,
-            'delete': action_delete
-        }
-
-        handler = actions.get(action)
+        handler = ACTIONS.get(action)
         if not handler:
             output_error(f'Unknown action: {action}', 'unknown_action')
 
-        handler(data)
+        return handler(data)
 
-    except json.JSONDecodeError as e:
-        output_error(f'Invalid JSON input: {str(e)}', 'json_error')
+    except ActionError as e:
+        return e.to_response()
     except Exception as e:
-        output_error(f'Unexpected error: {str(e)}', 'unexpected_error')
+        return ActionError(f'Unexpected error: {str(e)}', 'unexpected_error').to_response()
+
+
+def serve():
+    """Server mode - answer newline-delimited JSON requests until stdin closes."""
+    # Keep the protocol stream clean: anything libraries print goes to stderr
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    output_json({
+        'id': None,
+        'event': 'ready',
+        'pid': os.getpid(),
+        'timings': dict(_timings)
+    }, protocol_out)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            request = {}
+        request_id = request.get('id') if isinstance(request, dict) else None
+
+        if isinstance(request, dict) and request.get('action') == 'shutdown':
+            output_json({'id': request_id, 'success': True}, protocol_out)
+            break
+
+        def emit(event, request_id=request_id):
+            output_json(dict(event, id=request_id), protocol_out)
+
+        response = handle_request(line, emit=emit)
+        response['id'] = request_id
+        output_json(response, protocol_out)
+
+
+def main():
+    """Main entry point - read JSON from stdin, execute action, output JSON."""
+    _timings['startup_seconds'] = round(time.perf_counter() - _process_started, 3)
+
+    if '--server' in sys.argv[1:]:
+        serve()
+        return
+
+    response = handle_request(sys.stdin.read())
+    output_json(response)
+    if response.get('success') is False:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
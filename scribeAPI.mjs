@@ -3,6 +3,8 @@ import path from 'path';
 import { startSpinner } from './utils.mjs';
 import { ElevenLabsClient } from '@elevenlabs/elevenlabs-js';
 import { retryWithBackoff, defaultShouldRetry } from './retryUtils.mjs';
+import { withLimit } from './src/rateLimiter.mjs';
+import { withTranscriptionCache } from './src/transcriptionCache.mjs';
 import { loadConfig, getConfigValue } from './configLoader.mjs';
 import logger, { LogCategory, LogStatus } from './src/logger.mjs';
 import { checkAndLogSubscription } from './elevenLabsMonitor.mjs';
@@ -182,14 +184,18 @@ export async function transcribeWithScribe(audioFilePath, options = {}) {
     };
 
     // Call with retry logic
-    const result = await retryWithBackoff(async () => {
-      return await elevenlabs.speechToText.convert({
-        ...callSpecificOptions, // Use the modified options for testing
-        file: audioBlob, // Pass the Blob object
-      }, {
-        timeoutInSeconds: timeoutInSeconds // Use timeoutInSeconds directly
-      });
-    }, retryOptions);
+    // Identical audio + options reuse a cached response instead of paying again;
+    // each attempt takes an ElevenLabs slot (api.rateLimits.elevenlabs)
+    const result = await withTranscriptionCache(audioFilePath, { service: 'scribe', ...callSpecificOptions }, () =>
+      retryWithBackoff(async () => {
+        return await withLimit('elevenlabs', () => elevenlabs.speechToText.convert({
+          ...callSpecificOptions, // Use the modified options for testing
+          file: audioBlob, // Pass the Blob object
+        }, {
+          timeoutInSeconds: timeoutInSeconds // Use timeoutInSeconds directly
+        }), path.basename(audioFilePath));
+      }, retryOptions)
+    );
     
     stopSpinner();
 
@@ -228,35 +234,6 @@ async function formatScribeResult(result, verbose = false, audioFilePath = null)
   // Use sentence-based segmentation instead of speaker-based
   const segments = createSentenceSegments(words);
 
-  // Apply speaker identification if enabled and audio path is available
-  const speakerIdEnabled = getConfigValue(config, 'speakerIdentification.enabled', false);
-
-  if (speakerIdEnabled && audioFilePath && segments.length > 0) {
-    try {
-      // Get speaker mapping from Pyannote
-      const speakerMapping = await identifySpeakersWithFallback(audioFilePath, segments, {
-        threshold: getConfigValue(config, 'speakerIdentification.threshold', 0.70)
-      });
-
-      // Apply speaker names to segments
-      if (speakerMapping && Object.keys(speakerMapping).length > 0) {
-        segments.forEach(segment => {
-          // Convert "Speaker 0" to "speaker_0" for lookup
-          const speakerId = segment.speaker.replace('Speaker ', 'speaker_');
-          const identifiedName = speakerMapping[speakerId];
-
-          // Only update if we got a match (null means no match, keep generic)
-          if (identifiedName) {
-            segment.speaker = identifiedName;
-          }
-        });
-      }
-    } catch (error) {
-      // Speaker identification errors should never block transcription
-      logger.warn(LogCategory.PROCESSING, `Speaker identification skipped: ${error.message}`);
-    }
-  }
-
   // Create a formatted result compatible with our application
   const formatted = {
     text,
@@ -267,6 +244,21 @@ async function formatScribeResult(result, verbose = false, audioFilePath = null)
     duration: calculateDuration(words)
   };
 
+  // Apply speaker identification if enabled and audio path is available
+  const speakerIdEnabled = getConfigValue(config, 'speakerIdentification.enabled', false);
+
+  if (speakerIdEnabled && audioFilePath && segments.length > 0) {
+    const identification = labelSpeakers(formatted, audioFilePath);
+
+    // overlapped: return now and let the caller summarize while identification
+    // runs; it must await pendingSpeakerMapping before writing segments
+    if (getConfigValue(config, 'speakerIdentification.mode', 'blocking') === 'overlapped') {
+      formatted.pendingSpeakerMapping = identification;
+    } else {
+      await identification;
+    }
+  }
+
   // If verbose mode is enabled, include all original data
   if (verbose) {
     formatted.raw = result;
@@ -276,6 +268,54 @@ async function formatScribeResult(result, verbose = false, audioFilePath = null)
   return formatted;
 }
 
+/**
+ * Identify speakers and rename the formatted result's segments in place
+ * Never rejects - identification errors should never block transcription
+ * @param {Object} formatted - Formatted Scribe result (segments are updated)
+ * @param {string} audioFilePath - Audio the segments were transcribed from
+ * @returns {Promise<Object>} - Speaker mapping (speaker_id -> name or null)
+ */
+async function labelSpeakers(formatted, audioFilePath) {
+  try {
+    // Get speaker mapping from Pyannote
+    const speakerMapping = await identifySpeakersWithFallback(audioFilePath, formatted.segments, {
+      threshold: getConfigValue(config, 'speakerIdentification.threshold', 0.70),
+      // Unmatched speakers stored for a later relabel (linked to the outputs once written)
+      onUnknownSpeakers: (entries) => { formatted.unknownSpeakers = entries; }
+    }) || {};
+
+    // Apply speaker names to segments
+    formatted.segments.forEach(segment => {
+      // Convert "Speaker 0" to "speaker_0" for lookup
+      const speakerId = segment.speaker.replace('Speaker ', 'speaker_');
+      const identifiedName = speakerMapping[speakerId];
+
+      // Only update if we got a match (null means no match, keep generic)
+      if (identifiedName) {
+        segment.speaker = identifiedName;
+      }
+    });
+
+    formatted.identifiedSpeakers = [...new Set(Object.values(speakerMapping).filter(Boolean))];
+    return speakerMapping;
+  } catch (error) {
+    logger.warn(LogCategory.PROCESSING, `Speaker identification skipped: ${error.message}`);
+    return {};
+  }
+}
+
+/**
+ * Note naming the identified speakers, prepended to the transcript sent for
+ * summarization (only possible when identification finished first)
+ * @param {Object} transcriptionData - Formatted transcription result
+ * @returns {string} - Note, or '' when no speaker was identified
+ */
+export function speakerPromptNote(transcriptionData) {
+  const names = transcriptionData?.identifiedSpeakers || [];
+  if (names.length === 0) return '';
+  return `Speakers identified in this recording: ${names.join(', ')}\n\n`;
+}
+
 /**
  * Create sentence-based segments from word-level timestamps
  * @param {Array} words - Words array from API response
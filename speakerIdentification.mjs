@@ -5,6 +5,8 @@ import os from 'os';
 import { fileURLToPath } from 'url';
 import { loadConfig, getConfigValue } from './configLoader.mjs';
 import logger, { LogCategory, LogStatus } from './src/logger.mjs';
+import { resolveHistoryPath } from './src/processHistory.mjs';
+import { pcmSidecarPath, PCM_SIDECAR_SAMPLE_RATE } from './audioProcessing.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -45,36 +47,418 @@ function expandPath(pathStr) {
   return pathStr;
 }
 
+/**
+ * Resolve python/script paths and the full request payload for an action
+ * @param {string} action - Action to perform
+ * @param {Object} inputData - Data to pass to Python script
+ * @param {Object} options - Execution options
+ * @returns {Object} - { pythonPath, timeoutMs, scriptPath, fullInputData }
+ */
+function prepareRequest(action, inputData, options = {}) {
+  const pythonPath = options.pythonPath ||
+    getConfigValue(config, 'speakerIdentification.python.path', 'python3');
+  const timeoutMs = options.timeout ||
+    getConfigValue(config, 'speakerIdentification.python.timeout', 60000);
+  const scriptPath = path.join(getBaseDir(), 'pyannote', 'speaker_id.py');
+
+  const backend = options.backend ||
+    getConfigValue(config, 'speakerIdentification.backend', 'pyannote');
+
+  // ONNX Runtime backends: exported model file and intra-op threads
+  const onnxSettings = backend.startsWith('onnx')
+    ? {
+      onnx_model: expandPath(
+        getConfigValue(config, 'speakerIdentification.onnx.model', '~/.summarai/models/pyannote-embedding.onnx')
+      ),
+      onnx_threads: getConfigValue(config, 'speakerIdentification.onnx.threads',
+        getConfigValue(config, 'speakerIdentification.python.threads', null))
+    }
+    : {};
+
+  // Add action to input data
+  const fullInputData = {
+    action,
+    backend,
+    ...onnxSettings,
+    ...inputData,
+    huggingface_token: inputData.huggingface_token ||
+      process.env.HUGGINGFACE_TOKEN ||
+      getConfigValue(config, 'speakerIdentification.huggingfaceToken', null)
+  };
+
+  return { pythonPath, timeoutMs, scriptPath, fullInputData };
+}
+
+/**
+ * Build an Error from a failed Python JSON response
+ * @param {Object} result - Parsed response with success === false
+ * @returns {Error} - Error carrying errorType
+ */
+function responseError(result) {
+  const error = new Error(result.error || 'Python script returned error');
+  error.errorType = result.error_type;
+  error.timings = result.timings;
+  error.counters = result.counters;
+  return error;
+}
+
+/**
+ * Resolve the speaker metrics NDJSON file (next to the process history by default)
+ * @returns {string|null} - Metrics file path, or null when metrics are disabled
+ */
+function resolveMetricsPath() {
+  if (!getConfigValue(config, 'speakerIdentification.metrics.enabled', false)) {
+    return null;
+  }
+  const file = getConfigValue(config, 'speakerIdentification.metrics.file', null);
+  if (file) {
+    return path.isAbsolute(file) ? file : path.resolve(process.cwd(), expandPath(file));
+  }
+  return path.join(path.dirname(resolveHistoryPath(config)), 'speaker_metrics.ndjson');
+}
+
+/**
+ * Log the per-stage timings and counters a speaker_id.py response carries,
+ * and append them to the metrics file when enabled
+ * @param {string} action - Action that was run
+ * @param {Object} timings - Stage timings in seconds
+ * @param {Object} counters - Work counters
+ * @param {boolean} success - Whether the action succeeded
+ */
+function recordMetrics(action, timings, counters, success) {
+  if (!timings) return;
+
+  const stages = Object.entries(timings)
+    .filter(([stage, seconds]) => stage !== 'total' && typeof seconds === 'number' && seconds > 0)
+    .map(([stage, seconds]) => `${stage} ${seconds}s`);
+  const counts = Object.entries(counters || {}).map(([name, value]) => `${name}=${value}`);
+  logger.debug(LogCategory.PROCESSING,
+    `Speaker ${action} took ${timings.total}s${stages.length ? ` (${stages.join(', ')})` : ''}` +
+    `${counts.length ? ` [${counts.join(', ')}]` : ''}`);
+
+  const metricsPath = resolveMetricsPath();
+  if (!metricsPath) return;
+
+  try {
+    fs.mkdirSync(path.dirname(metricsPath), { recursive: true });
+    fs.appendFileSync(metricsPath, JSON.stringify({
+      timestamp: new Date().toISOString(),
+      action,
+      success,
+      timings,
+      counters: counters || {}
+    }) + '\n');
+  } catch (error) {
+    logger.debug(LogCategory.PROCESSING, `Could not write speaker metrics: ${error.message}`);
+  }
+}
+
+/**
+ * Long-lived speaker_id.py process running in --server mode.
+ * Spawned lazily on first request, restarted on the next request after a crash,
+ * and shut down after an idle period so the model is only loaded once per session.
+ *
+ * The server answers requests one at a time, so concurrent callers (queue
+ * workers) wait in a FIFO here and each request is only written - and its
+ * timeout only started - once the previous one has finished.
+ */
+class SpeakerWorker {
+  constructor() {
+    this.child = null;
+    this.pythonPath = null;
+    this.queue = []; // requests not yet sent
+    this.active = null; // { id, resolve, reject, timeoutHandle, ... } being worked on
+    this.nextId = 1;
+    this.stdoutBuffer = '';
+    this.stderrTail = '';
+    this.idleTimer = null;
+  }
+
+  /**
+   * Spawn the server process if it is not already running
+   * @param {string} pythonPath - Python interpreter
+   * @param {string} scriptPath - Path to speaker_id.py
+   */
+  ensureStarted(pythonPath, scriptPath) {
+    if (this.child && this.pythonPath === pythonPath) return;
+    if (this.child) this.kill(new Error('Speaker worker restarted with a different Python'));
+
+    const child = spawn(pythonPath, [scriptPath, '--server'], {
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+    this.child = child;
+    this.pythonPath = pythonPath;
+    this.stdoutBuffer = '';
+    this.stderrTail = '';
+
+    // The worker must never keep the process alive on its own; pending
+    // request timers do that while work is in flight
+    child.unref();
+    child.stdin.unref?.();
+    child.stdout.unref?.();
+    child.stderr.unref?.();
+
+    child.stdout.on('data', (data) => this.handleStdout(data));
+
+    // Writes to a worker that just died surface through 'exit' instead
+    child.stdin.on('error', (error) => {
+      logger.debug(LogCategory.PROCESSING, `Speaker worker stdin error: ${error.message}`);
+    });
+
+    child.stderr.on('data', (data) => {
+      const text = data.toString();
+      this.stderrTail = (this.stderrTail + text).slice(-2000);
+      logger.debug(LogCategory.PROCESSING, `Speaker worker: ${text.trim()}`);
+    });
+
+    child.on('error', (error) => {
+      const message = error.code === 'ENOENT'
+        ? `Python not found at '${pythonPath}'. Install Python 3.8+ or configure speakerIdentification.python.path`
+        : `Python spawn error: ${error.message}`;
+      this.handleExit(child, new Error(message));
+      this.pump();
+    });
+
+    child.on('exit', (code, signal) => {
+      const detail = this.stderrTail.trim();
+      this.handleExit(child, new Error(
+        `Speaker worker exited (${signal || `code ${code}`})${detail ? `: ${detail}` : ''}`
+      ));
+      this.pump();
+    });
+
+    logger.debug(LogCategory.PROCESSING, `Started speaker worker (${pythonPath} ${scriptPath} --server)`);
+  }
+
+  /**
+   * Parse newline-delimited JSON responses and settle pending requests
+   * @param {Buffer} data - Raw stdout chunk
+   */
+  handleStdout(data) {
+    this.stdoutBuffer += data.toString();
+    let newlineIndex;
+    while ((newlineIndex = this.stdoutBuffer.indexOf('\n')) !== -1) {
+      const line = this.stdoutBuffer.slice(0, newlineIndex).trim();
+      this.stdoutBuffer = this.stdoutBuffer.slice(newlineIndex + 1);
+      if (!line) continue;
+
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        logger.debug(LogCategory.PROCESSING, `Speaker worker sent non-JSON output: ${line}`);
+        continue;
+      }
+
+      if (message.event === 'ready') {
+        const startup = message.timings?.startup_seconds;
+        logger.debug(LogCategory.PROCESSING,
+          `Speaker worker ready (PID ${message.pid}${startup !== undefined ? `, ${startup}s startup` : ''})`);
+        continue;
+      }
+
+      const entry = this.active;
+      if (!entry || entry.id !== message.id) continue;
+
+      // Partial result from a streaming action - the request stays pending
+      if (message.event === 'result') {
+        entry.armTimeout();
+        try {
+          entry.onEvent?.(message);
+        } catch (error) {
+          logger.debug(LogCategory.PROCESSING, `Speaker result handler failed: ${error.message}`);
+        }
+        continue;
+      }
+
+      this.active = null;
+      clearTimeout(entry.timeoutHandle);
+
+      if (message.success === false) {
+        entry.reject(responseError(message));
+      } else {
+        entry.resolve(message);
+      }
+      this.pump();
+      this.scheduleIdleShutdown();
+    }
+  }
+
+  /**
+   * Reject the request being worked on when the worker dies; queued requests
+   * stay queued and respawn it
+   * @param {ChildProcess} child - The process that exited
+   * @param {Error} error - Reason reported to the active caller
+   */
+  handleExit(child, error) {
+    if (this.child !== child) return;
+    this.child = null;
+
+    const entry = this.active;
+    this.active = null;
+    if (entry) {
+      logger.warn(LogCategory.PROCESSING, `${error.message} - will restart on next request`);
+      clearTimeout(entry.timeoutHandle);
+      entry.reject(error);
+    }
+    this.clearIdleTimer();
+  }
+
+  /**
+   * Queue a request for the worker
+   * The timeout starts when the request is sent, and for streaming actions
+   * restarts on every partial result
+   * @param {Object} payload - Full request payload (including action)
+   * @param {Object} options - { pythonPath, scriptPath, timeoutMs, onEvent }
+   * @returns {Promise<Object>} - Parsed response
+   */
+  request(payload, { pythonPath, scriptPath, timeoutMs, onEvent }) {
+    this.clearIdleTimer();
+
+    return new Promise((resolve, reject) => {
+      const entry = {
+        id: this.nextId++,
+        payload,
+        pythonPath,
+        scriptPath,
+        resolve,
+        reject,
+        onEvent,
+        timeoutHandle: null
+      };
+      entry.armTimeout = () => {
+        clearTimeout(entry.timeoutHandle);
+        entry.timeoutHandle = setTimeout(() => {
+          if (this.active !== entry) return;
+          // The worker is still busy with this request - replace it so the
+          // requests queued behind it can run
+          this.kill(new Error(`Python script timed out after ${timeoutMs}ms`));
+          this.pump();
+        }, timeoutMs);
+      };
+
+      this.queue.push(entry);
+      this.pump();
+    });
+  }
+
+  /**
+   * Send the next queued request if the worker is free
+   */
+  pump() {
+    if (this.active || this.queue.length === 0) return;
+
+    const entry = this.queue.shift();
+    this.ensureStarted(entry.pythonPath, entry.scriptPath);
+    this.active = entry;
+    entry.armTimeout();
+    this.child.stdin.write(JSON.stringify({ id: entry.id, ...entry.payload }) + '\n');
+  }
+
+  scheduleIdleShutdown() {
+    if (this.active || this.queue.length > 0) return;
+    this.clearIdleTimer();
+    const idleTimeoutMs = getConfigValue(config, 'speakerIdentification.python.idleTimeout', 300000);
+    this.idleTimer = setTimeout(() => {
+      logger.debug(LogCategory.PROCESSING, 'Stopping idle speaker worker');
+      this.stop();
+    }, idleTimeoutMs);
+    this.idleTimer.unref?.();
+  }
+
+  clearIdleTimer() {
+    if (this.idleTimer) {
+      clearTimeout(this.idleTimer);
+      this.idleTimer = null;
+    }
+  }
+
+  /**
+   * Stop the worker, rejecting queued requests too (it is respawned lazily on the next request)
+   */
+  stop() {
+    const error = new Error('Speaker worker stopped');
+    for (const entry of this.queue.splice(0)) {
+      entry.reject(error);
+    }
+    this.kill(error);
+  }
+
+  /**
+   * Kill the worker process, failing only the request it was working on
+   * @param {Error} error - Reason reported to the active caller
+   */
+  kill(error) {
+    const child = this.child;
+    if (!child) return;
+    this.handleExit(child, error);
+    try {
+      child.stdin.end();
+    } catch {
+      // Ignore - process may already be gone
+    }
+    child.kill('SIGTERM');
+  }
+}
+
+const worker = new SpeakerWorker();
+process.on('exit', () => worker.stop());
+
+/**
+ * Stop the persistent speaker worker, if one is running
+ */
+export function shutdownSpeakerWorker() {
+  worker.stop();
+}
+
 /**
  * Execute Python speaker identification script
+ * Uses the persistent worker unless speakerIdentification.python.persistent is false
  * @param {string} action - Action to perform (check, enroll, identify, list, delete)
  * @param {Object} inputData - Data to pass to Python script
  * @param {Object} options - Execution options
  * @returns {Promise<Object>} - Result from Python script
  */
 function executePythonScript(action, inputData, options = {}) {
-  return new Promise((resolve, reject) => {
-    const pythonPath = options.pythonPath ||
-      getConfigValue(config, 'speakerIdentification.python.path', 'python3');
-    const timeoutMs = options.timeout ||
-      getConfigValue(config, 'speakerIdentification.python.timeout', 60000);
-    const scriptPath = path.join(getBaseDir(), 'pyannote', 'speaker_id.py');
-
-    // Check if script exists
-    if (!fs.existsSync(scriptPath)) {
-      reject(new Error(`Python script not found: ${scriptPath}`));
-      return;
-    }
+  const { pythonPath, timeoutMs, scriptPath, fullInputData } = prepareRequest(action, inputData, options);
 
-    // Add action to input data
-    const fullInputData = {
-      action,
-      ...inputData,
-      huggingface_token: inputData.huggingface_token ||
-        process.env.HUGGINGFACE_TOKEN ||
-        getConfigValue(config, 'speakerIdentification.huggingfaceToken', null)
-    };
+  // Check if script exists
+  if (!fs.existsSync(scriptPath)) {
+    return Promise.reject(new Error(`Python script not found: ${scriptPath}`));
+  }
 
+  const persistent = options.persistent ??
+    getConfigValue(config, 'speakerIdentification.python.persistent', true);
+
+  const pending = persistent
+    ? worker.request(fullInputData, { pythonPath, scriptPath, timeoutMs, onEvent: options.onEvent })
+    : executePythonOnce(fullInputData, {
+      pythonPath,
+      scriptPath,
+      // One-shot batches only answer at the end, so allow the timeout per job
+      timeoutMs: timeoutMs * Math.max(1, fullInputData.jobs?.length || 1)
+    });
+
+  return pending.then(
+    (result) => {
+      recordMetrics(action, result.timings, result.counters, true);
+      return result;
+    },
+    (error) => {
+      recordMetrics(action, error.timings, error.counters, false);
+      throw error;
+    }
+  );
+}
+
+/**
+ * Run speaker_id.py once for a single request (one process per call)
+ * @param {Object} fullInputData - Full request payload (including action)
+ * @param {Object} options - { pythonPath, scriptPath, timeoutMs }
+ * @returns {Promise<Object>} - Result from Python script
+ */
+function executePythonOnce(fullInputData, { pythonPath, scriptPath, timeoutMs }) {
+  return new Promise((resolve, reject) => {
     const python = spawn(pythonPath, [scriptPath], {
       stdio: ['pipe', 'pipe', 'pipe']
     });
@@ -109,9 +493,7 @@ function executePythonScript(action, inputData, options = {}) {
         try {
           const result = JSON.parse(stdout);
           if (result.success === false) {
-            const error = new Error(result.error || 'Python script returned error');
-            error.errorType = result.error_type;
-            reject(error);
+            reject(responseError(result));
           } else {
             resolve(result);
           }
@@ -123,9 +505,7 @@ function executePythonScript(action, inputData, options = {}) {
         try {
           const result = JSON.parse(stdout);
           if (result.error) {
-            const error = new Error(result.error);
-            error.errorType = result.error_type;
-            reject(error);
+            reject(responseError(result));
             return;
           }
         } catch (e) {
@@ -150,30 +530,60 @@ function executePythonScript(action, inputData, options = {}) {
   });
 }
 
+// Fast environment checks are cached for the life of the process
+let environmentCheckPromise = null;
+
 /**
- * Check Python environment and dependencies
- * @param {boolean} verbose - Enable verbose logging
- * @returns {Promise<Object>} - Environment status
+ * Check if Python environment is properly configured
+ * The default check only resolves installed packages (no torch import) and is
+ * cached per process; pass { deep: true } to import everything as a diagnostic
+ * @param {boolean} verbose - Log detailed information
+ * @param {Object} options - { deep: boolean }
+ * @returns {Promise<Object>} - Environment check result
  */
-export async function checkPythonEnvironment(verbose = false) {
-  try {
-    const result = await executePythonScript('check', {});
+export async function checkPythonEnvironment(verbose = false, options = {}) {
+  const deep = options.deep === true;
+
+  let result;
+  if (deep) {
+    result = await runEnvironmentCheck(true);
+  } else {
+    if (!environmentCheckPromise) {
+      environmentCheckPromise = runEnvironmentCheck(false);
+    }
+    result = await environmentCheckPromise;
+  }
 
-    if (verbose) {
-      logger.info(LogCategory.SYSTEM, `Python environment: ${result.python_version}`);
-      logger.info(LogCategory.SYSTEM, `HuggingFace token: ${result.huggingface_token_status}`);
+  if (verbose) {
+    if (result.available) {
+      logger.info(LogCategory.SYSTEM, `Python environment: ${result.pythonVersion}`);
+      logger.info(LogCategory.SYSTEM, `HuggingFace token: ${result.huggingfaceTokenStatus}`);
+    } else {
+      logger.warn(LogCategory.SYSTEM, `Speaker identification unavailable: ${result.error}`);
     }
+  }
+
+  return result;
+}
+
+/**
+ * Run the Python-side check action
+ * @param {boolean} deep - Import the packages instead of only resolving them
+ * @returns {Promise<Object>} - Environment check result
+ */
+async function runEnvironmentCheck(deep) {
+  try {
+    const result = await executePythonScript('check', { deep });
 
     return {
       available: true,
       pythonVersion: result.python_version,
-      huggingfaceTokenStatus: result.huggingface_token_status
+      backend: result.backend,
+      huggingfaceTokenStatus: result.huggingface_token_status,
+      versions: result.versions || {},
+      timings: result.startup_timings || {}
     };
   } catch (error) {
-    if (verbose) {
-      logger.warn(LogCategory.SYSTEM, `Speaker identification unavailable: ${error.message}`);
-    }
-
     return {
       available: false,
       error: error.message,
@@ -183,42 +593,64 @@ export async function checkPythonEnvironment(verbose = false) {
 }
 
 /**
- * Enroll a new speaker profile
+ * Enroll a speaker profile, or add samples to an existing one
  * @param {string} name - Display name for the speaker
- * @param {string} audioPath - Path to audio sample (10-60 seconds recommended)
+ * @param {string|Array<string>} audioPaths - Audio sample(s) or directories of samples
+ *   (10-60 seconds per sample recommended)
  * @param {Object} options - Enrollment options
+ * @param {boolean} [options.append] - Fold the samples into an existing profile
  * @returns {Promise<Object>} - Enrollment result
  */
-export async function enrollSpeaker(name, audioPath, options = {}) {
+export async function enrollSpeaker(name, audioPaths, options = {}) {
   const profilesDir = expandPath(
     options.profilesDir ||
     getConfigValue(config, 'speakerIdentification.profilesDir', '~/.summarai/profiles')
   );
 
-  // Validate audio file exists
-  const expandedAudioPath = expandPath(audioPath);
-  if (!fs.existsSync(expandedAudioPath)) {
-    throw new Error(`Audio file not found: ${expandedAudioPath}`);
+  // Validate audio files exist
+  const expandedPaths = (Array.isArray(audioPaths) ? audioPaths : [audioPaths]).map(expandPath);
+  for (const audioPath of expandedPaths) {
+    if (!fs.existsSync(audioPath)) {
+      throw new Error(`Audio file not found: ${audioPath}`);
+    }
   }
 
-  logger.processing(LogCategory.PROCESSING, `Enrolling speaker "${name}"...`);
+  // A single file goes through enroll; several files or a directory through
+  // enroll_bulk, which decodes them in parallel
+  const bulk = expandedPaths.length > 1 || fs.statSync(expandedPaths[0]).isDirectory();
+
+  logger.processing(LogCategory.PROCESSING,
+    `${options.append ? 'Adding samples to' : 'Enrolling'} speaker "${name}"...`);
 
   try {
-    const result = await executePythonScript('enroll', {
+    const result = await executePythonScript(bulk ? 'enroll_bulk' : 'enroll', {
       name,
-      audio_path: expandedAudioPath,
-      profiles_dir: profilesDir
+      ...(bulk ? { audio_paths: expandedPaths } : { audio_path: expandedPaths[0] }),
+      profiles_dir: profilesDir,
+      append: Boolean(options.append),
+      decode_workers: options.decodeWorkers ??
+        getConfigValue(config, 'speakerIdentification.python.decodeWorkers', 2)
     }, options);
 
+    for (const failure of result.failed || []) {
+      logger.warn(LogCategory.PROCESSING, `Skipped ${failure.audio_path}: ${failure.error}`);
+    }
+
     logger.success(LogCategory.PROCESSING,
-      `Enrolled speaker "${name}" (${result.sample_duration_seconds?.toFixed(1) || '?'}s sample)`);
+      `${result.created ? 'Enrolled' : 'Updated'} speaker "${name}" ` +
+      `(${result.samples_added} sample(s) added, ${result.sample_count} total)`);
 
     return {
       success: true,
       profileId: result.profile_id,
       name: result.name,
       profilePath: result.profile_path,
-      sampleDuration: result.sample_duration_seconds
+      created: result.created,
+      samplesAdded: result.samples_added,
+      sampleCount: result.sample_count,
+      embeddingVariance: result.embedding_variance,
+      sampleDuration: result.sample_duration_seconds,
+      failed: result.failed || []
     };
   } catch (error) {
     logger.failure(LogCategory.PROCESSING, `Failed to enroll speaker: ${error.message}`);
@@ -294,13 +726,19 @@ export async function deleteProfile(name, options = {}) {
 }
 
 /**
- * Identify speakers in transcript segments
- * @param {string} audioPath - Path to the audio file
- * @param {Array} segments - Transcript segments with speaker_id, start, end
+ * Directory of the unknown-speaker store
+ * @returns {string} - Expanded path
+ */
+function unknownSpeakersDir() {
+  return expandPath(getConfigValue(config, 'speakerIdentification.unknownSpeakers.dir', '~/.summarai/unknown-speakers'));
+}
+
+/**
+ * Settings shared by identify and identify_batch requests
  * @param {Object} options - Identification options
- * @returns {Promise<Object>} - Speaker mapping (speaker_id -> display_name)
+ * @returns {Object} - Request fields for speaker_id.py
  */
-export async function identifySpeakers(audioPath, segments, options = {}) {
+function identifySettings(options = {}) {
   const profilesDir = expandPath(
     options.profilesDir ||
     getConfigValue(config, 'speakerIdentification.profilesDir', '~/.summarai/profiles')
@@ -309,38 +747,171 @@ export async function identifySpeakers(audioPath, segments, options = {}) {
   const threshold = options.threshold ||
     getConfigValue(config, 'speakerIdentification.threshold', 0.70);
 
-  // Validate audio file exists
-  const expandedAudioPath = expandPath(audioPath);
-  if (!fs.existsSync(expandedAudioPath)) {
-    throw new Error(`Audio file not found: ${expandedAudioPath}`);
-  }
+  const maxDecodeMB = options.maxDecodeMB ??
+    getConfigValue(config, 'speakerIdentification.python.maxDecodeMB', 512);
+  const threads = options.threads ??
+    getConfigValue(config, 'speakerIdentification.python.threads', null);
+  const batchSize = options.batchSize ??
+    getConfigValue(config, 'speakerIdentification.python.batchSize', 8);
+
+  // Segment embeddings are cached by audio content so retries skip inference
+  const cacheEnabled = options.embeddingCache ??
+    getConfigValue(config, 'speakerIdentification.embeddingCache.enabled', true);
+  const cacheDir = cacheEnabled
+    ? expandPath(getConfigValue(config, 'speakerIdentification.embeddingCache.dir', '~/.summarai/embedding-cache'))
+    : null;
+  const cacheMaxMB = getConfigValue(config, 'speakerIdentification.embeddingCache.maxMB', 64);
+
+  // Adaptive sampling: stop early on a confident match, otherwise spend up to
+  // budgetSeconds of audio per speaker
+  const sampling = {
+    early_exit_margin: getConfigValue(config, 'speakerIdentification.sampling.earlyExitMargin', 0.15),
+    budget_seconds: getConfigValue(config, 'speakerIdentification.sampling.budgetSeconds', 30),
+    merge_gap_seconds: getConfigValue(config, 'speakerIdentification.sampling.mergeGapSeconds', 0.5),
+    max_window_seconds: getConfigValue(config, 'speakerIdentification.sampling.maxWindowSeconds', 15)
+  };
 
-  // Convert segments to format expected by Python
-  const pythonSegments = segments.map(seg => ({
+  // Unmatched speakers are kept (clustered) so a later relabel can name them
+  const unknownEnabled = getConfigValue(config, 'speakerIdentification.unknownSpeakers.enabled', true);
+  const unknown = {
+    unknown_dir: unknownEnabled ? unknownSpeakersDir() : null,
+    unknown_cluster_threshold: getConfigValue(config, 'speakerIdentification.unknownSpeakers.clusterThreshold', 0.75)
+  };
+
+  // Energy VAD: trim windows to voiced audio and skip mostly-silent ones
+  // before inference
+  const vad = {
+    vad: getConfigValue(config, 'speakerIdentification.vad.enabled', true),
+    vad_min_speech_ratio: getConfigValue(config, 'speakerIdentification.vad.minSpeechRatio', 0.3),
+    vad_margin_db: getConfigValue(config, 'speakerIdentification.vad.marginDb', 12)
+  };
+
+  // Approximate search over large profile libraries (index built from 1024 profiles)
+  const ann = {
+    ann: getConfigValue(config, 'speakerIdentification.ann.enabled', false),
+    ann_nprobe: getConfigValue(config, 'speakerIdentification.ann.nprobe', 8),
+    ann_rerank: getConfigValue(config, 'speakerIdentification.ann.rerank', 50)
+  };
+
+  // Fold confidently identified speakers back into their profiles
+  const feedback = {
+    feedback: options.feedback ??
+      getConfigValue(config, 'speakerIdentification.feedback.enabled', false),
+    feedback_threshold: getConfigValue(config, 'speakerIdentification.feedback.threshold', 0.85)
+  };
+
+  return {
+    profiles_dir: profilesDir,
+    threshold,
+    ...ann,
+    ...feedback,
+    ...unknown,
+    ...vad,
+    max_decode_mb: maxDecodeMB,
+    threads,
+    batch_size: batchSize,
+    embedding_cache_dir: cacheDir,
+    embedding_cache_max_mb: cacheMaxMB,
+    ...sampling
+  };
+}
+
+/**
+ * Convert transcript segments to the format expected by Python
+ * @param {Array} segments - Transcript segments with speaker_id, start, end
+ * @returns {Array} - Python segments
+ */
+function toPythonSegments(segments) {
+  return segments.map(seg => ({
     speaker_id: seg.speaker?.replace('Speaker ', 'speaker_') || seg.speaker_id,
     start: seg.start,
     end: seg.end,
     text: seg.text
   }));
+}
+
+/**
+ * Log the details of one identify result and return its speaker mapping
+ * @param {Object} result - identify result from speaker_id.py
+ * @param {string} label - Prefix for log lines (e.g. file name)
+ * @returns {Object} - Speaker mapping (speaker_id -> display_name)
+ */
+function summarizeIdentifyResult(result, label = '') {
+  const prefix = label ? `${label}: ` : '';
+
+  if (result.embedded_seconds) {
+    const perSpeaker = Object.entries(result.embedded_seconds)
+      .map(([speakerId, seconds]) => `${speakerId}=${seconds}s`);
+    logger.debug(LogCategory.PROCESSING, `${prefix}Embedded audio per speaker: ${perSpeaker.join(', ')}`);
+  }
+
+  if (result.embedding_cache) {
+    const { hits, misses, evictions } = result.embedding_cache;
+    logger.debug(LogCategory.PROCESSING,
+      `${prefix}Embedding cache: ${hits} hit(s), ${misses} miss(es), ${evictions} eviction(s)`);
+  }
+
+  if (result.vad) {
+    const { input_seconds, discarded_seconds, windows_skipped } = result.vad;
+    logger.debug(LogCategory.PROCESSING,
+      `${prefix}VAD: discarded ${discarded_seconds}s of ${input_seconds}s, skipped ${windows_skipped} window(s)`);
+  }
+
+  // Log identification results
+  const identified = Object.entries(result.speaker_mapping || {})
+    .filter(([_, name]) => name !== null);
+
+  if (identified.length > 0) {
+    logger.info(LogCategory.PROCESSING,
+      `${prefix}Identified ${identified.length} speaker(s): ${identified.map(([_, n]) => n).join(', ')}`);
+  }
+
+  const updated = Object.values(result.feedback || {});
+  if (updated.length > 0) {
+    logger.debug(LogCategory.PROCESSING, `${prefix}Updated profile(s) from this recording: ${updated.join(', ')}`);
+  }
+
+  return result.speaker_mapping || {};
+}
+
+/**
+ * Request fields pointing speaker_id.py at the raw PCM sidecar written by
+ * convertToTempAAC, so it memory-maps that instead of decoding the audio again
+ * @param {string} audioPath - Expanded audio path
+ * @returns {Object} - pcm_* fields, or {} when there is no sidecar
+ */
+function pcmSidecarFields(audioPath) {
+  const pcmPath = pcmSidecarPath(audioPath);
+  if (!fs.existsSync(pcmPath)) return {};
+  return { pcm_path: pcmPath, pcm_sample_rate: PCM_SIDECAR_SAMPLE_RATE, pcm_format: 's16le' };
+}
+
+/**
+ * Identify speakers in transcript segments
+ * @param {string} audioPath - Path to the audio file
+ * @param {Array} segments - Transcript segments with speaker_id, start, end
+ * @param {Object} options - Identification options
+ * @returns {Promise<Object>} - Speaker mapping (speaker_id -> display_name)
+ */
+export async function identifySpeakers(audioPath, segments, options = {}) {
+  // Validate audio file exists
+  const expandedAudioPath = expandPath(audioPath);
+  if (!fs.existsSync(expandedAudioPath)) {
+    throw new Error(`Audio file not found: ${expandedAudioPath}`);
+  }
 
   try {
     const result = await executePythonScript('identify', {
       audio_path: expandedAudioPath,
-      segments: pythonSegments,
-      profiles_dir: profilesDir,
-      threshold
+      segments: toPythonSegments(segments),
+      ...pcmSidecarFields(expandedAudioPath),
+      ...identifySettings(options)
     }, options);
 
-    // Log identification results
-    const identified = Object.entries(result.speaker_mapping || {})
-      .filter(([_, name]) => name !== null);
-
-    if (identified.length > 0) {
-      logger.info(LogCategory.PROCESSING,
-        `Identified ${identified.length} speaker(s): ${identified.map(([_, n]) => n).join(', ')}`);
+    if (Object.keys(result.unknown_speakers || {}).length > 0) {
+      options.onUnknownSpeakers?.(result.unknown_speakers);
     }
-
-    return result.speaker_mapping || {};
+    return summarizeIdentifyResult(result);
   } catch (error) {
     // Don't throw - speaker identification failures should not block transcription
     logger.warn(LogCategory.PROCESSING, `Speaker identification failed: ${error.message}`);
@@ -348,6 +919,207 @@ export async function identifySpeakers(audioPath, segments, options = {}) {
   }
 }
 
+/**
+ * Identify speakers for several recordings in one worker call
+ * The model and profiles are loaded once and upcoming files are decoded while
+ * the current one is embedded. Each file's mapping is passed to onResult as
+ * soon as it is ready, so callers can start downstream work early.
+ * @param {Array} jobs - [{ audioPath, segments }]
+ * @param {Object} options - Identification options plus onResult(index, mapping, job)
+ * @returns {Promise<Array>} - Speaker mapping per job ({} when a file failed)
+ */
+export async function identifySpeakersBatch(jobs, options = {}) {
+  const mappings = jobs.map(() => ({}));
+  if (jobs.length === 0) return mappings;
+
+  const decodeWorkers = options.decodeWorkers ??
+    getConfigValue(config, 'speakerIdentification.python.decodeWorkers', 2);
+
+  const handleResult = (result) => {
+    const job = jobs[result.index];
+    if (!job) return;
+
+    const label = path.basename(job.audioPath);
+    if (result.success === false) {
+      logger.warn(LogCategory.PROCESSING, `Speaker identification failed for ${label}: ${result.error}`);
+    } else {
+      mappings[result.index] = summarizeIdentifyResult(result, label);
+      if (Object.keys(result.unknown_speakers || {}).length > 0) {
+        options.onUnknownSpeakers?.(result.unknown_speakers, job);
+      }
+    }
+    options.onResult?.(result.index, mappings[result.index], job);
+  };
+
+  try {
+    const response = await executePythonScript('identify_batch', {
+      jobs: jobs.map(job => ({
+        audio_path: expandPath(job.audioPath),
+        segments: toPythonSegments(job.segments),
+        ...pcmSidecarFields(expandPath(job.audioPath))
+      })),
+      decode_workers: decodeWorkers,
+      ...identifySettings(options)
+    }, { ...options, onEvent: handleResult });
+
+    // One-shot mode returns everything at the end instead of streaming
+    for (const result of response.results || []) {
+      handleResult(result);
+    }
+  } catch (error) {
+    // Don't throw - speaker identification failures should not block transcription
+    logger.warn(LogCategory.PROCESSING, `Batch speaker identification failed: ${error.message}`);
+  }
+
+  return mappings;
+}
+
+/**
+ * Identification requests collected while a backlog is processed
+ * Files are queued by identifySpeakersWithFallback and sent together through
+ * identifySpeakersBatch; each caller's promise resolves as soon as its own
+ * file's result streams back.
+ */
+class SpeakerBatch {
+  constructor() {
+    this.pending = [];   // queued jobs not yet sent to the worker
+    this.queued = 0;     // jobs queued since the batch was opened
+    this.waiters = [];   // { count, resolve } from waitForQueued
+    this.running = [];   // identifySpeakersBatch calls in flight
+  }
+
+  /**
+   * Queue one file
+   * @returns {Promise<Object>} - Speaker mapping, once the batch containing it is identified
+   */
+  add(audioPath, segments, options = {}) {
+    return new Promise(resolve => {
+      // Copied now: the caller remaps segment times to the original recording
+      // before the batch is sent, but the audio is still the converted file
+      this.pending.push({ audioPath, segments: toPythonSegments(segments), options, resolve });
+      this.queued++;
+      this.waiters = this.waiters.filter(waiter => {
+        if (this.queued < waiter.count) return true;
+        waiter.resolve();
+        return false;
+      });
+    });
+  }
+
+  /**
+   * @param {number} count - Total number of queued jobs to wait for
+   * @returns {Promise<void>} - Resolves once that many jobs were queued (or the batch closes)
+   */
+  waitForQueued(count) {
+    if (this.queued >= count) return Promise.resolve();
+    return new Promise(resolve => this.waiters.push({ count, resolve }));
+  }
+
+  /**
+   * Send the queued jobs to the worker as one identify_batch call
+   * @returns {Promise<void>} - Resolves once every job in the call has its mapping
+   */
+  flush() {
+    const jobs = this.pending;
+    this.pending = [];
+    if (jobs.length === 0) return Promise.resolve();
+
+    logger.info(LogCategory.PROCESSING, `Identifying speakers for ${jobs.length} file(s) in one batch`);
+    const run = identifySpeakersBatch(jobs, {
+      ...jobs[0].options,
+      onUnknownSpeakers: (entries, job) => job.options.onUnknownSpeakers?.(entries),
+      onResult: (index, mapping) => jobs[index].resolve(mapping)
+    }).then(mappings => {
+      // Files without a streamed result (batch failed) fall back to no names
+      jobs.forEach((job, index) => job.resolve(mappings[index]));
+    });
+    this.running.push(run);
+    return run;
+  }
+
+  /**
+   * Stop queueing, send what is left and wait for every outstanding call
+   */
+  async close() {
+    if (speakerBatch === this) speakerBatch = null;
+    this.flush();
+    this.waiters.forEach(waiter => waiter.resolve());
+    this.waiters = [];
+    await Promise.all(this.running);
+  }
+}
+
+let speakerBatch = null;
+
+/**
+ * Start batching speaker identification for backlog processing
+ * Until close(), identifySpeakersWithFallback queues files on the returned
+ * batch instead of calling the worker per file. The caller decides when to
+ * flush(); a file waiting on its mapping only continues after that.
+ * @returns {SpeakerBatch} - The open batch
+ */
+export function openSpeakerBatch() {
+  speakerBatch = new SpeakerBatch();
+  return speakerBatch;
+}
+
+/**
+ * Attach a recording's output files to the unknown speakers stored while
+ * identifying it, so relabelSpeaker can rewrite them later
+ * @param {Object} unknownSpeakers - speaker_id -> entry id, from identification
+ * @param {string} recording - Source recording path
+ * @param {Array<string>} outputs - Files containing the generic speaker labels
+ * @returns {Promise<number>} - Number of entries linked (0 on any error)
+ */
+export async function linkUnknownSpeakers(unknownSpeakers, recording, outputs, options = {}) {
+  const entries = Object.values(unknownSpeakers || {});
+  if (entries.length === 0 || outputs.length === 0) return 0;
+
+  try {
+    const result = await executePythonScript('link_unknown', {
+      unknown_dir: unknownSpeakersDir(),
+      entries,
+      recording,
+      outputs: outputs.map(output => path.resolve(output))
+    }, options);
+    return result.linked;
+  } catch (error) {
+    logger.warn(LogCategory.PROCESSING, `Could not record unknown speakers: ${error.message}`);
+    return 0;
+  }
+}
+
+/**
+ * Name past unknown speakers after an enrolled profile, rewriting their
+ * generic labels in earlier _segments.txt/markdown outputs (no audio is reprocessed)
+ * @param {string} name - Enrolled profile name
+ * @param {Object} options - { dryRun, threshold, profilesDir }
+ * @returns {Promise<Object>} - Matched clusters and rewritten files
+ */
+export async function relabelSpeaker(name, options = {}) {
+  const profilesDir = expandPath(
+    options.profilesDir ||
+    getConfigValue(config, 'speakerIdentification.profilesDir', '~/.summarai/profiles')
+  );
+
+  const result = await executePythonScript('relabel', {
+    name,
+    profiles_dir: profilesDir,
+    unknown_dir: unknownSpeakersDir(),
+    threshold: options.threshold || getConfigValue(config, 'speakerIdentification.threshold', 0.70),
+    dry_run: Boolean(options.dryRun)
+  }, options);
+
+  return {
+    success: true,
+    name: result.name,
+    clusters: result.clusters,
+    entriesRelabelled: result.entries_relabelled,
+    filesRewritten: result.files_rewritten,
+    dryRun: result.dry_run
+  };
+}
+
 /**
  * Check if speaker identification is available and enabled
  * @returns {Promise<boolean>} - True if speaker ID can be used
@@ -379,6 +1151,11 @@ export async function identifySpeakersWithFallback(audioPath, segments, options
       return {};
     }
 
+    // Backlog processing: identified together with the other queued files
+    if (speakerBatch) {
+      return await speakerBatch.add(audioPath, segments, options);
+    }
+
     return await identifySpeakers(audioPath, segments, options);
   } catch (error) {
     logger.warn(LogCategory.PROCESSING, `Speaker identification unavailable: ${error.message}`);
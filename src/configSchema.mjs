@@ -43,6 +43,7 @@ export const watchSchema = z.object({
   }).optional(),
   stability: watchStabilitySchema,
   queue: z.object({
+    concurrency: z.number().int().positive().optional(),
     delayBetweenFiles: z.number().positive().optional(),
     initialDelay: z.number().positive().optional()
   }).optional()
@@ -81,6 +82,12 @@ export const transcriptionSchema = z.object({
     diarize: z.boolean().optional(),
     maxSpeakers: z.number().nullable().optional(),
     timeoutSeconds: z.number().optional()
+  }).optional(),
+  cache: z.object({
+    enabled: z.boolean().optional(),
+    dir: z.string().optional(),
+    maxSizeMB: z.number().positive().optional(),
+    maxAgeDays: z.number().positive().optional()
   }).optional()
 }).optional();
 
@@ -108,11 +115,21 @@ export const configSchema = z.object({
   fileProcessing: fileProcessingSchema,
   audio: z.object({
     compression: z.object({}).passthrough().optional(),
-    processing: z.object({}).passthrough().optional(),
+    processing: z.object({
+      silenceRemoval: z.object({
+        enabled: z.boolean().optional(),
+        threshold: z.number().optional(),
+        duration: z.number().positive().optional(),
+        keep: z.number().min(0).optional()
+      }).optional()
+    }).passthrough().optional(),
     chunking: z.object({
       enabled: z.boolean().optional(),
       maxSizeMB: z.number().optional(),
-      chunkPrefix: z.string().optional()
+      chunkPrefix: z.string().optional(),
+      splitAtSilence: z.boolean().optional(),
+      silenceThreshold: z.number().optional(),
+      silenceMinDuration: z.number().positive().optional()
     }).optional()
   }).passthrough().optional(),
   processing: z.object({
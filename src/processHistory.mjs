@@ -1,7 +1,16 @@
 import fs from 'fs';
 import path from 'path';
+import crypto from 'crypto';
 import { getConfigValue } from '../configLoader.mjs';
 
+// Bytes before the indexed offset that must be unchanged for an index or
+// snapshot to be reused (detects a rotated, truncated or rewritten log)
+const FINGERPRINT_BYTES = 4096;
+const SNAPSHOT_VERSION = 1;
+
+// ndjsonPath -> { offset, fingerprint, sinceSnapshot, bySourceName, bySourcePath, failedFiles }
+const indexCache = new Map();
+
 function resolveHistoryPath(config) {
   const file = getConfigValue(config, 'fileProcessing.history.file', './processed_log.ndjson');
   const p = path.isAbsolute(file) ? file : path.resolve(process.cwd(), file);
@@ -109,6 +118,8 @@ function migrateLegacyIfPresent(config) {
   }
 }
 
+// Records are appended with one synchronous O_APPEND write per line, so files
+// finishing concurrently in the queue (or in another instance) never interleave
 function appendRecord(config, record) {
   const ndjsonPath = resolveHistoryPath(config);
   ensureDir(ndjsonPath);
@@ -155,57 +166,202 @@ function appendFailureRecord(config, record) {
   }
 }
 
+/**
+ * Apply one history record to an index (later records supersede earlier ones)
+ * @param {Object} index - { bySourceName, bySourcePath, failedFiles }
+ * @param {Object} obj - Parsed NDJSON record
+ */
+function applyRecord(index, obj) {
+  const { bySourceName, bySourcePath, failedFiles } = index;
+  // Accept records with either sourcePath OR sourceName
+  if (!obj || (!obj.sourcePath && !obj.sourceName)) return;
+
+  const status = obj.status || 'success'; // default for backward compatibility
+  // Use sourcePath as primary key, fall back to sourceName for legacy records
+  const recordKey = obj.sourcePath || obj.sourceName;
+
+  if (status === 'success') {
+    // Successfully processed - add to success Sets and remove from failures
+    if (obj.sourceName) bySourceName.add(obj.sourceName);
+    if (obj.sourcePath) bySourcePath.add(obj.sourcePath);
+    failedFiles.delete(recordKey);
+  } else if (status === 'failed') {
+    // Failed - track in failedFiles Map (unless later succeeded)
+    const isAlreadySuccessful = obj.sourcePath
+      ? bySourcePath.has(obj.sourcePath)
+      : bySourceName.has(obj.sourceName);
+
+    if (!isAlreadySuccessful) {
+      failedFiles.set(recordKey, {
+        error: obj.error || null,
+        attemptNumber: obj.attemptNumber || 1,
+        lastAttemptAt: obj.processedAt || null,
+        sourceName: obj.sourceName || (obj.sourcePath ? path.basename(obj.sourcePath) : null)
+      });
+    }
+  }
+}
+
+function emptyIndex() {
+  return {
+    offset: 0,
+    fingerprint: null,
+    sinceSnapshot: 0,
+    bySourceName: new Set(),
+    bySourcePath: new Set(),
+    failedFiles: new Map()
+  };
+}
+
+/**
+ * Hash of the bytes just before offset
+ * @param {number} fd - Open history file
+ * @param {number} offset - Indexed offset
+ * @returns {string|null}
+ */
+function fingerprintAt(fd, offset) {
+  if (offset === 0) return null;
+  const length = Math.min(FINGERPRINT_BYTES, offset);
+  const buffer = Buffer.alloc(length);
+  fs.readSync(fd, buffer, 0, length, offset - length);
+  return crypto.createHash('sha1').update(buffer).digest('hex');
+}
+
+function resolveSnapshotPath(ndjsonPath) {
+  return `${ndjsonPath}.index.json`;
+}
+
+/**
+ * Load the compacted index written by writeSnapshot, if it still matches the log
+ * @param {string} ndjsonPath - History file
+ * @param {number} fd - Open history file
+ * @param {number} size - Current history size
+ * @returns {Object|null} - Index positioned at the snapshot's offset
+ */
+function readSnapshot(ndjsonPath, fd, size) {
+  try {
+    const snapshot = JSON.parse(fs.readFileSync(resolveSnapshotPath(ndjsonPath), 'utf8'));
+    if (snapshot.version !== SNAPSHOT_VERSION || snapshot.offset > size) return null;
+    if (fingerprintAt(fd, snapshot.offset) !== snapshot.fingerprint) return null;
+
+    return {
+      ...emptyIndex(),
+      offset: snapshot.offset,
+      fingerprint: snapshot.fingerprint,
+      bySourceName: new Set(snapshot.bySourceName),
+      bySourcePath: new Set(snapshot.bySourcePath),
+      failedFiles: new Map(snapshot.failedFiles)
+    };
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Compact the index into a snapshot so a restart only tails newer records
+ * @param {string} ndjsonPath - History file
+ * @param {Object} index - Index to persist
+ */
+function writeSnapshot(ndjsonPath, index) {
+  const snapshotPath = resolveSnapshotPath(ndjsonPath);
+  const tempPath = `${snapshotPath}.${process.pid}.tmp`;
+  try {
+    fs.writeFileSync(tempPath, JSON.stringify({
+      version: SNAPSHOT_VERSION,
+      offset: index.offset,
+      fingerprint: index.fingerprint,
+      bySourceName: [...index.bySourceName],
+      bySourcePath: [...index.bySourcePath],
+      failedFiles: [...index.failedFiles]
+    }));
+    fs.renameSync(tempPath, snapshotPath);
+    index.sinceSnapshot = 0;
+  } catch (err) {
+    // The snapshot is only an optimization; the NDJSON log stays authoritative
+    try { fs.unlinkSync(tempPath); } catch { /* ignore */ }
+    console.warn(`Warning: Could not write history snapshot: ${err.message}`);
+  }
+}
+
+/**
+ * Load the processed/failed index for the NDJSON history
+ *
+ * The index is kept in memory per history file and only the bytes appended
+ * since the last call are parsed. A compacted snapshot
+ * (<history>.index.json) is rewritten every fileProcessing.history.snapshotEvery
+ * records so a fresh process starts from it instead of the whole log.
+ * The returned Sets/Map are shared with the cache - treat them as read-only.
+ * @param {Object} config - Configuration
+ * @returns {{bySourceName: Set, bySourcePath: Set, failedFiles: Map}}
+ */
 function loadIndex(config) {
   migrateLegacyIfPresent(config);
   const ndjsonPath = resolveHistoryPath(config);
-  const bySourceName = new Set();
-  const bySourcePath = new Set();
-  const failedFiles = new Map(); // sourcePath or sourceName -> { error, attemptNumber, lastAttemptAt }
 
-  if (!fs.existsSync(ndjsonPath)) return { bySourceName, bySourcePath, failedFiles };
+  if (!fs.existsSync(ndjsonPath)) {
+    indexCache.delete(ndjsonPath);
+    const { bySourceName, bySourcePath, failedFiles } = emptyIndex();
+    return { bySourceName, bySourcePath, failedFiles };
+  }
 
+  let index = indexCache.get(ndjsonPath);
+  let fd;
   try {
-    const data = fs.readFileSync(ndjsonPath, 'utf8');
-    const lines = data.split(/\r?\n/);
-    for (const line of lines) {
-      if (!line.trim()) continue;
-      try {
-        const obj = JSON.parse(line);
-        // Accept records with either sourcePath OR sourceName
-        if (!obj || (!obj.sourcePath && !obj.sourceName)) continue;
-
-        const status = obj.status || 'success'; // default for backward compatibility
-        // Use sourcePath as primary key, fall back to sourceName for legacy records
-        const recordKey = obj.sourcePath || obj.sourceName;
-
-        if (status === 'success') {
-          // Successfully processed - add to success Sets and remove from failures
-          if (obj.sourceName) bySourceName.add(obj.sourceName);
-          if (obj.sourcePath) bySourcePath.add(obj.sourcePath);
-          failedFiles.delete(recordKey);
-        } else if (status === 'failed') {
-          // Failed - track in failedFiles Map (unless later succeeded)
-          const isAlreadySuccessful = obj.sourcePath
-            ? bySourcePath.has(obj.sourcePath)
-            : bySourceName.has(obj.sourceName);
-
-          if (!isAlreadySuccessful) {
-            failedFiles.set(recordKey, {
-              error: obj.error || null,
-              attemptNumber: obj.attemptNumber || 1,
-              lastAttemptAt: obj.processedAt || null,
-              sourceName: obj.sourceName || (obj.sourcePath ? path.basename(obj.sourcePath) : null)
-            });
-          }
+    fd = fs.openSync(ndjsonPath, 'r');
+    const { size } = fs.fstatSync(fd);
+
+    // Reuse the cached index only if the log grew past it unchanged
+    if (index && (index.offset > size || fingerprintAt(fd, index.offset) !== index.fingerprint)) {
+      index = null;
+    }
+    if (!index) {
+      index = readSnapshot(ndjsonPath, fd, size) || emptyIndex();
+    }
+
+    if (size > index.offset) {
+      const buffer = Buffer.alloc(size - index.offset);
+      fs.readSync(fd, buffer, 0, buffer.length, index.offset);
+      let consumed = buffer.lastIndexOf(0x0a) + 1;
+      const lines = buffer.toString('utf8', 0, consumed).split(/\r?\n/);
+
+      // A trailing line without a newline is either still being written (picked
+      // up next time) or a complete record from a hand-edited file
+      const trailing = buffer.toString('utf8', consumed);
+      if (trailing.trim()) {
+        try {
+          JSON.parse(trailing);
+          lines.push(trailing);
+          consumed = buffer.length;
+        } catch {
+          // incomplete - leave it for the next call
         }
-      } catch {
-        // skip malformed lines
       }
+
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        try {
+          applyRecord(index, JSON.parse(line));
+          index.sinceSnapshot++;
+        } catch {
+          // skip malformed lines
+        }
+      }
+      index.offset += consumed;
+      index.fingerprint = fingerprintAt(fd, index.offset);
     }
   } catch (err) {
     console.warn(`Warning: Could not read NDJSON history: ${err.message}`);
+    return index || emptyIndex();
+  } finally {
+    if (fd !== undefined) fs.closeSync(fd);
+  }
+
+  indexCache.set(ndjsonPath, index);
+  if (index.sinceSnapshot >= getConfigValue(config, 'fileProcessing.history.snapshotEvery', 500)) {
+    writeSnapshot(ndjsonPath, index);
   }
 
+  const { bySourceName, bySourcePath, failedFiles } = index;
   return { bySourceName, bySourcePath, failedFiles };
 }
 
@@ -0,0 +1,219 @@
+import os from 'os';
+import { loadConfig, getConfigValue } from '../configLoader.mjs';
+import logger, { LogCategory } from './logger.mjs';
+
+/**
+ * Shared concurrency and rate limits for remote APIs and CPU-bound work.
+ *
+ * Every limiter is a concurrency cap plus an optional token bucket
+ * (requests per minute with a burst allowance). The queue in summarai.mjs
+ * runs several files at once; these limits keep each service within its
+ * quota no matter how many files are in flight.
+ */
+
+// Defaults per limiter; overridden by api.rateLimits.<name> / audio.ffmpeg
+const DEFAULT_LIMITS = {
+  elevenlabs: { maxConcurrent: 3, requestsPerMinute: 30, burst: 3 },
+  openai: { maxConcurrent: 3, requestsPerMinute: 50, burst: 5 },
+  anthropic: { maxConcurrent: 2, requestsPerMinute: 40, burst: 2 },
+  ffmpeg: { maxConcurrent: Math.max(1, Math.floor(os.cpus().length / 2)), requestsPerMinute: null, burst: null }
+};
+
+// Waits at least this long are logged at info level, shorter ones at debug
+const NOTABLE_WAIT_MS = 1000;
+
+let config;
+try {
+  config = loadConfig();
+} catch (error) {
+  config = null;
+}
+
+/**
+ * Token bucket refilled continuously at requestsPerMinute
+ */
+export class TokenBucket {
+  /**
+   * @param {number} requestsPerMinute - Sustained rate
+   * @param {number} burst - Bucket capacity (requests allowed back to back)
+   */
+  constructor(requestsPerMinute, burst = 1) {
+    this.ratePerMs = requestsPerMinute / 60000;
+    this.capacity = Math.max(1, burst);
+    this.tokens = this.capacity;
+    this.updatedAt = Date.now();
+  }
+
+  refill() {
+    const now = Date.now();
+    this.tokens = Math.min(this.capacity, this.tokens + (now - this.updatedAt) * this.ratePerMs);
+    this.updatedAt = now;
+  }
+
+  /**
+   * Wait for and consume one token
+   * @returns {Promise<void>}
+   */
+  async take() {
+    for (;;) {
+      this.refill();
+      if (this.tokens >= 1) {
+        this.tokens -= 1;
+        return;
+      }
+      const waitMs = Math.ceil((1 - this.tokens) / this.ratePerMs);
+      await new Promise(resolve => setTimeout(resolve, waitMs));
+    }
+  }
+}
+
+/**
+ * Counting semaphore with FIFO hand-off
+ */
+export class Semaphore {
+  /**
+   * @param {number} limit - Maximum holders at once
+   */
+  constructor(limit) {
+    this.limit = Math.max(1, limit);
+    this.active = 0;
+    this.waiters = [];
+  }
+
+  get waiting() {
+    return this.waiters.length;
+  }
+
+  /**
+   * @returns {Promise<void>} - Resolves once a slot is held
+   */
+  acquire() {
+    if (this.active < this.limit) {
+      this.active++;
+      return Promise.resolve();
+    }
+    return new Promise(resolve => this.waiters.push(resolve));
+  }
+
+  release() {
+    const next = this.waiters.shift();
+    if (next) {
+      // Slot passes straight to the next waiter; active count is unchanged
+      next();
+    } else {
+      this.active = Math.max(0, this.active - 1);
+    }
+  }
+}
+
+/**
+ * Concurrency cap + optional token bucket, with wait-time statistics
+ */
+export class Limiter {
+  /**
+   * @param {string} name - Limiter name used in logs
+   * @param {Object} options
+   * @param {number} options.maxConcurrent - Calls allowed in flight
+   * @param {number|null} options.requestsPerMinute - Sustained rate (null = unlimited)
+   * @param {number|null} options.burst - Token bucket capacity (default: maxConcurrent)
+   */
+  constructor(name, { maxConcurrent = 1, requestsPerMinute = null, burst = null } = {}) {
+    this.name = name;
+    this.semaphore = new Semaphore(maxConcurrent);
+    this.bucket = requestsPerMinute > 0
+      ? new TokenBucket(requestsPerMinute, burst || maxConcurrent)
+      : null;
+    this.stats = { calls: 0, waited: 0, totalWaitMs: 0, maxWaitMs: 0 };
+  }
+
+  get active() {
+    return this.semaphore.active;
+  }
+
+  get waiting() {
+    return this.semaphore.waiting;
+  }
+
+  /**
+   * Run fn once a slot (and token) is available
+   * @param {Function} fn - Async function to run
+   * @param {string} label - What is waiting, for logs
+   * @returns {Promise<*>} - fn's result
+   */
+  async run(fn, label = '') {
+    const queuedAt = Date.now();
+    await this.semaphore.acquire();
+    try {
+      if (this.bucket) await this.bucket.take();
+      this.recordWait(Date.now() - queuedAt, label);
+      return await fn();
+    } finally {
+      this.semaphore.release();
+    }
+  }
+
+  recordWait(waitMs, label) {
+    this.stats.calls++;
+    if (waitMs <= 0) return;
+    this.stats.waited++;
+    this.stats.totalWaitMs += waitMs;
+    this.stats.maxWaitMs = Math.max(this.stats.maxWaitMs, waitMs);
+
+    const message = `Waited ${(waitMs / 1000).toFixed(1)}s for ${this.name}${label ? ` (${label})` : ''} ` +
+      `- ${this.active} in flight, ${this.waiting} waiting`;
+    if (waitMs >= NOTABLE_WAIT_MS) {
+      logger.info(LogCategory.QUEUE, message);
+    } else {
+      logger.debug(LogCategory.QUEUE, message);
+    }
+  }
+}
+
+const limiters = new Map();
+
+/**
+ * Limits for a named limiter from config, falling back to the defaults
+ * @param {string} name - elevenlabs, openai, anthropic or ffmpeg
+ * @returns {Object} - { maxConcurrent, requestsPerMinute, burst }
+ */
+export function limitSettings(name) {
+  const defaults = DEFAULT_LIMITS[name] || { maxConcurrent: 1, requestsPerMinute: null, burst: null };
+  const key = name === 'ffmpeg' ? 'audio.ffmpeg' : `api.rateLimits.${name}`;
+  const configured = config ? getConfigValue(config, key, {}) || {} : {};
+  return { ...defaults, ...configured };
+}
+
+/**
+ * Shared limiter for a service (created on first use)
+ * @param {string} name - elevenlabs, openai, anthropic or ffmpeg
+ * @returns {Limiter}
+ */
+export function getLimiter(name) {
+  if (!limiters.has(name)) {
+    limiters.set(name, new Limiter(name, limitSettings(name)));
+  }
+  return limiters.get(name);
+}
+
+/**
+ * Run fn under the named limiter
+ * @param {string} name - Limiter name
+ * @param {Function} fn - Async function to run
+ * @param {string} label - What is waiting, for logs
+ * @returns {Promise<*>}
+ */
+export function withLimit(name, fn, label = '') {
+  return getLimiter(name).run(fn, label);
+}
+
+/**
+ * Wait statistics for every limiter used so far
+ * @returns {Object} - name -> { calls, waited, totalWaitMs, maxWaitMs, active, waiting }
+ */
+export function limiterStats() {
+  const stats = {};
+  for (const [name, limiter] of limiters) {
+    stats[name] = { ...limiter.stats, active: limiter.active, waiting: limiter.waiting };
+  }
+  return stats;
+}
@@ -0,0 +1,99 @@
+import { performance } from 'perf_hooks';
+
+/**
+ * Startup timing for --trace-startup.
+ *
+ * summarai loads its heavier modules per command; each lazy import and
+ * initialization step is recorded here and printed as a table once startup
+ * is complete (or when the process exits first). Times are milliseconds
+ * since the process started. This module has no imports of its own so it
+ * can be loaded before anything else.
+ */
+
+const enabled = process.argv.includes('--trace-startup');
+const steps = [];
+let lastEnd = 0;
+let finished = false;
+
+/**
+ * @returns {boolean} - True when --trace-startup was passed
+ */
+export function isStartupTraceEnabled() {
+  return enabled;
+}
+
+function record(label, start) {
+  const end = performance.now();
+  steps.push({ label, start, duration: end - start });
+  lastEnd = Math.max(lastEnd, end);
+}
+
+/**
+ * Record the time since the previous step (or process start) under a label
+ * @param {string} label - What ran in that interval
+ */
+export function traceMark(label) {
+  if (enabled) record(label, lastEnd);
+}
+
+/**
+ * Time an import
+ * @param {string} label - Module name for the table
+ * @param {Function} load - Returns the import() promise (a literal specifier keeps bundlers happy)
+ * @returns {Promise<Object>} - The module namespace
+ */
+export async function traceImport(label, load) {
+  if (!enabled) return load();
+  const start = performance.now();
+  try {
+    return await load();
+  } finally {
+    record(`import ${label}`, start);
+  }
+}
+
+/**
+ * Time an initialization step (sync or async)
+ * @param {string} label - Step name for the table
+ * @param {Function} fn - Step to run
+ * @returns {*} - fn's result
+ */
+export function traceStep(label, fn) {
+  if (!enabled) return fn();
+  const start = performance.now();
+  let result;
+  try {
+    result = fn();
+  } catch (error) {
+    record(label, start);
+    throw error;
+  }
+  if (result && typeof result.then === 'function') {
+    return result.finally(() => record(label, start));
+  }
+  record(label, start);
+  return result;
+}
+
+/**
+ * Print the timing table (once); called when startup completes
+ * @param {string} [reached='exit'] - Where startup ended, for the footer
+ */
+export function finishStartupTrace(reached = 'exit') {
+  if (!enabled || finished) return;
+  finished = true;
+
+  const rows = steps.map(step => `${step.start.toFixed(1).padStart(9)} ${step.duration.toFixed(1).padStart(9)}  ${step.label}`);
+  console.error([
+    '',
+    'Startup trace (ms since process start)',
+    `${'at'.padStart(9)} ${'took'.padStart(9)}  step`,
+    ...rows,
+    `${performance.now().toFixed(1).padStart(9)} ${''.padStart(9)}  ${reached}`,
+    ''
+  ].join('\n'));
+}
+
+if (enabled) {
+  process.on('exit', () => finishStartupTrace('exit'));
+}
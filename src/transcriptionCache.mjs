@@ -0,0 +1,229 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import zlib from 'zlib';
+import crypto from 'crypto';
+import { loadConfig, getConfigValue } from '../configLoader.mjs';
+import logger, { LogCategory } from './logger.mjs';
+
+/**
+ * Local cache of raw transcription API responses.
+ *
+ * Entries are keyed by a SHA-256 of the normalized audio (the converted temp
+ * file or chunk actually uploaded) plus the service, model and request
+ * options, and stored gzipped under transcription.cache.dir. A retry after a
+ * later failure, or the same recording arriving from two watch directories,
+ * reuses the stored response instead of paying for another transcription.
+ */
+
+const CACHE_VERSION = 1;
+const DEFAULT_CACHE_DIR = path.join(os.homedir(), '.summarai', 'cache', 'transcriptions');
+
+let config;
+try {
+  config = loadConfig();
+} catch (error) {
+  config = null;
+}
+
+// Cleared by --no-cache
+let cacheAllowed = true;
+
+/**
+ * Enable or disable the cache for this process (--no-cache)
+ * @param {boolean} enabled
+ */
+export function setTranscriptionCacheEnabled(enabled) {
+  cacheAllowed = enabled;
+}
+
+/**
+ * @returns {boolean} - True when lookups and stores are active
+ */
+export function isTranscriptionCacheEnabled() {
+  return cacheAllowed && (config ? getConfigValue(config, 'transcription.cache.enabled', true) : true);
+}
+
+function expandHome(p) {
+  return p.startsWith('~') ? path.join(os.homedir(), p.slice(1)) : p;
+}
+
+function cacheDir() {
+  const dir = config ? getConfigValue(config, 'transcription.cache.dir', DEFAULT_CACHE_DIR) : DEFAULT_CACHE_DIR;
+  return path.resolve(expandHome(dir));
+}
+
+/**
+ * Streaming SHA-256 of a file
+ * @param {string} filePath - File to hash
+ * @returns {Promise<string>} - Hex digest
+ */
+export function hashFile(filePath) {
+  return new Promise((resolve, reject) => {
+    const hash = crypto.createHash('sha256');
+    fs.createReadStream(filePath)
+      .on('data', chunk => hash.update(chunk))
+      .on('end', () => resolve(hash.digest('hex')))
+      .on('error', reject);
+  });
+}
+
+/**
+ * JSON with sorted object keys, so option order never changes a key
+ */
+function stableStringify(value) {
+  if (Array.isArray(value)) return `[${value.map(stableStringify).join(',')}]`;
+  if (value && typeof value === 'object') {
+    return `{${Object.keys(value).sort()
+      .filter(key => value[key] !== undefined)
+      .map(key => `${JSON.stringify(key)}:${stableStringify(value[key])}`)
+      .join(',')}}`;
+  }
+  return JSON.stringify(value);
+}
+
+/**
+ * Cache key for an audio file and the request that would transcribe it
+ * @param {string} audioPath - Normalized audio to be uploaded
+ * @param {Object} params - Service, model and options affecting the result
+ * @returns {Promise<string>}
+ */
+export async function transcriptionCacheKey(audioPath, params) {
+  const audioHash = await hashFile(audioPath);
+  return crypto.createHash('sha256')
+    .update(`v${CACHE_VERSION}\n${audioHash}\n${stableStringify(params)}`)
+    .digest('hex');
+}
+
+function entryPath(key) {
+  return path.join(cacheDir(), key.slice(0, 2), `${key}.json.gz`);
+}
+
+/**
+ * Read a cached response
+ * @param {string} key - Cache key
+ * @returns {Object|null} - Stored response, or null on a miss
+ */
+export function getCachedTranscription(key) {
+  const file = entryPath(key);
+  try {
+    const entry = JSON.parse(zlib.gunzipSync(fs.readFileSync(file)).toString('utf8'));
+    // Refresh the modification time so eviction drops least recently used entries first
+    const now = new Date();
+    fs.utimesSync(file, now, now);
+    return entry.response;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Store a response, then evict entries over the age/size limits
+ * @param {string} key - Cache key
+ * @param {Object} response - Raw API response (JSON-serializable)
+ * @param {Object} params - Request parameters, stored for inspection
+ */
+export function putCachedTranscription(key, response, params = {}) {
+  const file = entryPath(key);
+  const tempFile = `${file}.${process.pid}.tmp`;
+  try {
+    fs.mkdirSync(path.dirname(file), { recursive: true });
+    const entry = { version: CACHE_VERSION, createdAt: new Date().toISOString(), params, response };
+    fs.writeFileSync(tempFile, zlib.gzipSync(JSON.stringify(entry)));
+    fs.renameSync(tempFile, file);
+  } catch (err) {
+    try { fs.unlinkSync(tempFile); } catch { /* ignore */ }
+    logger.warn(LogCategory.PROCESSING, `Could not write transcription cache entry: ${err.message}`);
+    return;
+  }
+  evictTranscriptionCache();
+}
+
+/**
+ * Drop entries older than transcription.cache.maxAgeDays, then the least
+ * recently used until the cache fits in transcription.cache.maxSizeMB
+ * @returns {number} - Entries removed
+ */
+export function evictTranscriptionCache() {
+  const maxAgeDays = config ? getConfigValue(config, 'transcription.cache.maxAgeDays', 90) : 90;
+  const maxSizeMB = config ? getConfigValue(config, 'transcription.cache.maxSizeMB', 500) : 500;
+  const root = cacheDir();
+  if (!fs.existsSync(root)) return 0;
+
+  const entries = [];
+  for (const shard of fs.readdirSync(root)) {
+    const shardDir = path.join(root, shard);
+    let names;
+    try {
+      names = fs.readdirSync(shardDir);
+    } catch {
+      continue;
+    }
+    for (const name of names) {
+      if (!name.endsWith('.json.gz')) continue;
+      const file = path.join(shardDir, name);
+      try {
+        const stats = fs.statSync(file);
+        entries.push({ file, size: stats.size, usedAt: stats.mtimeMs });
+      } catch {
+        // Removed concurrently
+      }
+    }
+  }
+
+  const cutoff = Date.now() - maxAgeDays * 24 * 60 * 60 * 1000;
+  let budget = maxSizeMB * 1024 * 1024;
+  let removed = 0;
+
+  // Newest first: keep entries while they fit the size budget
+  entries.sort((a, b) => b.usedAt - a.usedAt);
+  for (const entry of entries) {
+    if (entry.usedAt >= cutoff && entry.size <= budget) {
+      budget -= entry.size;
+      continue;
+    }
+    try {
+      fs.unlinkSync(entry.file);
+      removed++;
+    } catch {
+      // Removed concurrently
+    }
+  }
+
+  if (removed > 0) {
+    logger.debug(LogCategory.PROCESSING, `Evicted ${removed} transcription cache entr${removed === 1 ? 'y' : 'ies'}`);
+  }
+  return removed;
+}
+
+/**
+ * Return the cached response for this audio and request, or run transcribe and cache its result
+ * @param {string} audioPath - Normalized audio to be uploaded
+ * @param {Object} params - Service, model and options affecting the result
+ * @param {Function} transcribe - Async function performing the paid API call
+ * @returns {Promise<Object>} - Raw API response
+ */
+export async function withTranscriptionCache(audioPath, params, transcribe) {
+  if (!isTranscriptionCacheEnabled()) {
+    return transcribe();
+  }
+
+  let key = null;
+  try {
+    key = await transcriptionCacheKey(audioPath, params);
+    const cached = getCachedTranscription(key);
+    if (cached) {
+      logger.info(LogCategory.PROCESSING, `Using cached ${params.service || 'transcription'} result for ${path.basename(audioPath)} (use --no-cache to re-transcribe)`);
+      return cached;
+    }
+  } catch (err) {
+    // Cache problems never block transcription
+    logger.warn(LogCategory.PROCESSING, `Transcription cache lookup failed: ${err.message}`);
+  }
+
+  const response = await transcribe();
+  if (key) {
+    putCachedTranscription(key, response, params);
+  }
+  return response;
+}
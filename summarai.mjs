@@ -1,15 +1,36 @@
 #!/usr/bin/env node
 
+// Startup timing (--trace-startup) - no dependencies, so it loads before anything it measures
+import { traceMark, traceImport, traceStep, finishStartupTrace } from './src/startupTrace.mjs';
 // Load environment variables FIRST
 import './env.mjs';
 
-// Parse command line arguments FIRST, before other imports
+// Only light modules are imported statically. Each command loads what it
+// needs (transcription clients, speaker identification, chokidar) on demand,
+// so short commands like --help or `speaker list` don't pay for the rest.
+import path from 'path';
+import fs from 'fs';
+import os from 'os';
+import { fileURLToPath } from 'url';
+import { createInterface } from 'readline';
+import { cleanupStaleTempDirs, previewSilenceRemoval } from './audioProcessing.mjs';
+import { loadConfig, getConfigValue, getLastConfigPath } from './configLoader.mjs';
+import logger, { LogCategory, LogStatus } from './src/logger.mjs';
+import { appendRecord, appendFailureRecord, loadIndex } from './src/processHistory.mjs';
+import { limiterStats } from './src/rateLimiter.mjs';
+import { ValidationError } from './src/validation.mjs';
+import { isYouTubeUrl } from './utils.mjs';
+
+traceMark('runtime + static imports');
+
+// Parse command line arguments
 const args = process.argv.slice(2);
 const cleanoutMode = args.includes('--cleanout');
 const dryRunMode = args.includes('--dry-run');
 const showHelp = args.includes('--help') || args.includes('-h');
 const showVersion = args.includes('--version') || args.includes('-v');
 const silencePreviewMode = args.includes('--silence-preview');
+const noCacheMode = args.includes('--no-cache');
 
 // Parse --directory argument
 const directoryIndex = args.findIndex(arg => arg === '--directory');
@@ -47,9 +68,7 @@ function getVersionInfo() {
   }
 }
 
-// Version check will be handled after imports
-
-// Show help immediately if requested, before any imports
+// Show help immediately if requested
 if (showHelp) {
   logger.raw(`
 Usage: summarai [options] [command] [youtube-url]
@@ -64,13 +83,17 @@ Options:
                                             (no date = last 120 days)
   --dry-run                         Show what would be processed without actually processing
   --low-quality, -l                 Use lower quality audio for faster processing
+  --no-cache                        Re-transcribe even if a cached transcription exists
+  --trace-startup                   Print how long each module import and startup step took
   --version, -v                     Show version information
   --help, -h                        Show this help message
 
 Speaker Identification Commands:
-  speaker enroll <name> <audio-file>  Enroll a new speaker profile from audio sample
+  speaker enroll <name> <audio>...    Enroll a speaker from audio files/directories
+                                      (--append adds samples to an existing profile)
   speaker list                        List all enrolled speaker profiles
   speaker delete <name>               Delete a speaker profile
+  speaker relabel <name> [--dry-run]  Name past unknown speakers after an enrolled profile
   speaker check                       Check Python environment for speaker identification
 
 This tool watches for new audio/video files in:
@@ -103,29 +126,23 @@ Examples:
   process.exit(0);
 }
 
-import chokidar from 'chokidar';
-import path from 'path';
-import fs from 'fs';
-import os from 'os';
-import { fileURLToPath } from 'url';
-import { createInterface } from 'readline';
-import { processVoiceMemo, processYouTubeUrl, isYouTubeUrl } from './transcribe.mjs';
-import { cleanupTempDir, cleanupStaleTempDirs, previewSilenceRemoval } from './audioProcessing.mjs';
-import { loadConfig, getConfigValue, getLastConfigPath } from './configLoader.mjs';
-import logger, { LogCategory, LogStatus } from './src/logger.mjs';
-import { appendRecord, appendFailureRecord, loadIndex } from './src/processHistory.mjs';
-import { ValidationError } from './src/validation.mjs';
-import {
-  checkPythonEnvironment,
-  enrollSpeaker,
-  listProfiles,
-  deleteProfile
-} from './speakerIdentification.mjs';
-
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
-// Show version immediately if requested, after imports
+/**
+ * Load the transcription pipeline (Scribe, Whisper, Claude, YouTube handling)
+ * @returns {Promise<Object>} - transcribe.mjs exports
+ */
+async function loadTranscriber() {
+  const transcriber = await traceImport('transcribe.mjs', () => import('./transcribe.mjs'));
+  if (noCacheMode) {
+    const { setTranscriptionCacheEnabled } = await traceImport('transcriptionCache.mjs', () => import('./src/transcriptionCache.mjs'));
+    setTranscriptionCacheEnabled(false);
+  }
+  return transcriber;
+}
+
+// Show version immediately if requested
 if (showVersion) {
   const versionInfo = getVersionInfo();
   console.log(`summarai v${versionInfo.version.replace(/"/g, '')}`);
@@ -188,12 +205,12 @@ const speakerIndex = args.findIndex(arg => arg === 'speaker');
 const isSpeakerMode = speakerIndex !== -1;
 
 if (isSpeakerMode) {
-  handleSpeakerCommand(args.slice(speakerIndex + 1)).then(exitCode => {
-    process.exit(exitCode);
-  }).catch(err => {
+  try {
+    process.exit(await handleSpeakerCommand(args.slice(speakerIndex + 1)));
+  } catch (err) {
     console.error('Error:', err.message);
     process.exit(1);
-  });
+  }
 }
 
 // Check for YouTube URL in arguments - process and exit if found
@@ -206,23 +223,26 @@ const potentialYouTubeArg = args.find(arg =>
 
 if (potentialYouTubeArg) {
   // YouTube mode - process video and exit
-  (async () => {
-    try {
-      logger.info(LogCategory.PROCESSING, `Processing YouTube video: ${potentialYouTubeArg}`);
-      const result = await processYouTubeUrl(potentialYouTubeArg, {
-        lowQuality: lowQualityMode,
-        transcriptionService: 'scribe'
-      });
-      logger.success(LogCategory.PROCESSING, `YouTube video processed successfully`);
-      logger.info(LogCategory.PROCESSING, `Output: ${result.mdFilePath}`);
-      process.exit(0);
-    } catch (error) {
-      logger.failure(LogCategory.PROCESSING, `Failed to process YouTube video: ${error.message}`);
-      process.exit(1);
-    }
-  })();
+  try {
+    logger.info(LogCategory.PROCESSING, `Processing YouTube video: ${potentialYouTubeArg}`);
+    const { processYouTubeUrl } = await loadTranscriber();
+    finishStartupTrace('processing YouTube video');
+    const result = await processYouTubeUrl(potentialYouTubeArg, {
+      lowQuality: lowQualityMode,
+      transcriptionService: 'scribe'
+    });
+    logger.success(LogCategory.PROCESSING, `YouTube video processed successfully`);
+    logger.info(LogCategory.PROCESSING, `Output: ${result.mdFilePath}`);
+    process.exit(0);
+  } catch (error) {
+    logger.failure(LogCategory.PROCESSING, `Failed to process YouTube video: ${error.message}`);
+    process.exit(1);
+  }
 }
 
+// Watch and directory modes from here on (every one-shot command above has exited)
+const { processVoiceMemo, processYouTubeUrl } = await loadTranscriber();
+
 /**
  * Handle speaker subcommands (enroll, list, delete, check)
  * @param {Array} subArgs - Arguments after 'speaker'
@@ -233,30 +253,45 @@ async function handleSpeakerCommand(subArgs) {
 
   if (!subCommand) {
     console.log('Speaker identification commands:');
-    console.log('  speaker enroll <name> <audio-file>  - Enroll a new speaker profile');
+    console.log('  speaker enroll <name> <audio>...    - Enroll a speaker from files/directories');
+    console.log('                                        (--append adds samples to an existing profile)');
     console.log('  speaker list                        - List all enrolled speakers');
     console.log('  speaker delete <name>               - Delete a speaker profile');
+    console.log('  speaker relabel <name> [--dry-run]  - Relabel past recordings for an enrolled speaker');
     console.log('  speaker check                       - Check Python environment');
     return 0;
   }
 
+  const {
+    checkPythonEnvironment,
+    enrollSpeaker,
+    listProfiles,
+    deleteProfile,
+    relabelSpeaker
+  } = await traceImport('speakerIdentification.mjs', () => import('./speakerIdentification.mjs'));
+
   switch (subCommand) {
     case 'enroll': {
-      const name = subArgs[1];
-      const audioFile = subArgs[2];
+      const append = subArgs.includes('--append');
+      const [name, ...audioFiles] = subArgs.slice(1).filter(arg => arg !== '--append');
 
-      if (!name || !audioFile) {
-        console.error('Usage: summarai speaker enroll <name> <audio-file>');
+      if (!name || audioFiles.length === 0) {
+        console.error('Usage: summarai speaker enroll <name> <audio-file|directory>... [--append]');
         console.error('Example: summarai speaker enroll "Jared" ~/voice-sample.wav');
+        console.error('         summarai speaker enroll "Jared" ~/more-samples/ --append');
         return 1;
       }
 
       try {
-        const result = await enrollSpeaker(name, audioFile);
-        console.log(`\nSuccessfully enrolled speaker "${result.name}"`);
+        const result = await enrollSpeaker(name, audioFiles, { append });
+        console.log(`\nSuccessfully ${result.created ? 'enrolled' : 'updated'} speaker "${result.name}"`);
         console.log(`  Profile ID: ${result.profileId}`);
+        console.log(`  Samples: ${result.sampleCount} (${result.samplesAdded} added)`);
         console.log(`  Sample duration: ${result.sampleDuration?.toFixed(1) || 'unknown'}s`);
         console.log(`  Profile path: ${result.profilePath}`);
+        for (const failure of result.failed) {
+          console.log(`  Skipped: ${failure.audio_path} (${failure.error})`);
+        }
         return 0;
       } catch (error) {
         console.error(`\nFailed to enroll speaker: ${error.message}`);
@@ -281,7 +316,8 @@ async function handleSpeakerCommand(subArgs) {
               ? new Date(profile.created_at).toLocaleDateString()
               : 'unknown date';
             console.log(`  ${index + 1}. ${profile.display_name || profile.name}`);
-            console.log(`     ID: ${profile.id}, Created: ${created}, ${duration}`);
+            const samples = profile.sample_count > 1 ? `, ${profile.sample_count} samples` : '';
+            console.log(`     ID: ${profile.id}, Created: ${created}, ${duration}${samples}`);
           });
         }
         return 0;
@@ -309,18 +345,58 @@ async function handleSpeakerCommand(subArgs) {
       }
     }
 
+    case 'relabel': {
+      const dryRun = subArgs.includes('--dry-run');
+      const name = subArgs.slice(1).find(arg => arg !== '--dry-run');
+
+      if (!name) {
+        console.error('Usage: summarai speaker relabel <name> [--dry-run]');
+        return 1;
+      }
+
+      try {
+        const result = await relabelSpeaker(name, { dryRun });
+        if (result.clusters.length === 0) {
+          console.log(`\nNo past unknown speakers match "${result.name}".`);
+          return 0;
+        }
+
+        console.log(`\n${dryRun ? 'Would relabel' : 'Relabelled'} unknown speakers as "${result.name}":`);
+        for (const cluster of result.clusters) {
+          console.log(`  ${cluster.id}: ${cluster.entries} recording speaker(s), similarity ${cluster.similarity}`);
+        }
+        for (const file of result.filesRewritten) {
+          console.log(`  Updated: ${file}`);
+        }
+        return 0;
+      } catch (error) {
+        console.error(`\nFailed to relabel speaker: ${error.message}`);
+        return 1;
+      }
+    }
+
     case 'check': {
       console.log('\nChecking speaker identification environment...\n');
 
       try {
-        const result = await checkPythonEnvironment(true);
+        const result = await checkPythonEnvironment(true, { deep: true });
 
         if (result.available) {
           console.log('\nSpeaker identification is available!');
           console.log(`  Python: ${result.pythonVersion}`);
+          console.log(`  Backend: ${result.backend || 'pyannote'}`);
           console.log(`  HuggingFace token: ${result.huggingfaceTokenStatus}`);
+          for (const [pkg, version] of Object.entries(result.versions)) {
+            console.log(`  ${pkg}: ${version || 'unknown version'}`);
+          }
+          const importTimes = Object.entries(result.timings)
+            .filter(([key]) => key.startsWith('import_'))
+            .map(([key, seconds]) => `${key.slice('import_'.length, -'_seconds'.length)} ${seconds}s`);
+          if (importTimes.length > 0) {
+            console.log(`  Import time: ${importTimes.join(', ')}`);
+          }
 
-          if (result.huggingfaceTokenStatus !== 'provided') {
+          if (result.huggingfaceTokenStatus !== 'provided' && !result.backend?.startsWith('onnx')) {
             console.log('\nNote: Set HUGGINGFACE_TOKEN environment variable to use speaker ID.');
             console.log('  1. Create account at https://huggingface.co');
             console.log('  2. Accept model terms at https://huggingface.co/pyannote/embedding');
@@ -344,7 +420,7 @@ async function handleSpeakerCommand(subArgs) {
 
     default:
       console.error(`Unknown speaker command: ${subCommand}`);
-      console.log('Available commands: enroll, list, delete, check');
+      console.log('Available commands: enroll, list, delete, relabel, check');
       return 1;
   }
 }
@@ -428,6 +504,69 @@ function getFileDirectoryConfig(filePath, directoryConfigs) {
   return null;
 }
 
+// Timestamp prefixes identifying a recording: "20251214_145415" or "DV-2025-12-14-140308"
+const TIMESTAMP_PREFIX_PATTERN = /(\d{8}_\d{6})|(DV-\d{4}-\d{2}-\d{2}-\d{6})/g;
+
+// processedPath -> Map(timestamp prefix -> Set of filenames carrying it). Each
+// directory is read once, then kept current by watchProcessedDirs and moveToProcessed
+const processedPrefixIndex = new Map();
+
+/**
+ * All timestamp prefixes appearing in a filename
+ * @param {string} filename - File name
+ * @returns {string[]}
+ */
+function timestampPrefixes(filename) {
+  return [...filename.matchAll(TIMESTAMP_PREFIX_PATTERN)].map(match => match[0]);
+}
+
+/**
+ * Prefix index for a processed directory, built on first use
+ * @param {string} processedPath - Processed directory
+ * @returns {Map<string, Set<string>>}
+ */
+function processedPrefixes(processedPath) {
+  let prefixes = processedPrefixIndex.get(processedPath);
+  if (!prefixes) {
+    prefixes = new Map();
+    if (fs.existsSync(processedPath)) {
+      for (const filename of fs.readdirSync(processedPath)) {
+        addProcessedPrefixes(prefixes, filename);
+      }
+    }
+    processedPrefixIndex.set(processedPath, prefixes);
+  }
+  return prefixes;
+}
+
+function addProcessedPrefixes(prefixes, filename) {
+  for (const prefix of timestampPrefixes(filename)) {
+    if (!prefixes.has(prefix)) prefixes.set(prefix, new Set());
+    prefixes.get(prefix).add(filename);
+  }
+}
+
+/**
+ * Record a file added to or removed from a processed directory
+ * @param {string} filePath - Path of the file in the processed directory
+ * @param {boolean} [removed=false] - True when the file was deleted
+ */
+function noteProcessedFile(filePath, removed = false) {
+  const prefixes = processedPrefixIndex.get(path.dirname(filePath));
+  if (!prefixes) return; // Not indexed yet - the first lookup reads the directory
+  const filename = path.basename(filePath);
+
+  if (!removed) {
+    addProcessedPrefixes(prefixes, filename);
+    return;
+  }
+  for (const prefix of timestampPrefixes(filename)) {
+    const files = prefixes.get(prefix);
+    files?.delete(filename);
+    if (files?.size === 0) prefixes.delete(prefix);
+  }
+}
+
 /**
  * Check if a file with the same timestamp prefix has already been processed
  * Prevents reprocessing the same audio file multiple times
@@ -439,16 +578,13 @@ function hasAlreadyBeenProcessed(filePath, dirConfig) {
   if (!dirConfig?.processedPath) return false;
 
   const filename = path.basename(filePath);
-  // Extract timestamp prefix: "20251214_145415" or "DV-2025-12-14-140308"
   const timestampMatch = filename.match(/^(\d{8}_\d{6})|^(DV-\d{4}-\d{2}-\d{2}-\d{6})/);
   if (!timestampMatch) return false;
 
   const prefix = timestampMatch[0];
 
   try {
-    if (!fs.existsSync(dirConfig.processedPath)) return false;
-    const processedFiles = fs.readdirSync(dirConfig.processedPath);
-    const alreadyProcessed = processedFiles.some(f => f.startsWith(prefix) || f.includes(prefix));
+    const alreadyProcessed = processedPrefixes(dirConfig.processedPath).has(prefix);
     if (alreadyProcessed) {
       logger.info(LogCategory.PROCESSING, `Skipping ${filename} - already processed (found matching timestamp prefix: ${prefix})`);
     }
@@ -461,7 +597,7 @@ function hasAlreadyBeenProcessed(filePath, dirConfig) {
 // Load configuration
 let config;
 try {
-  config = loadConfig();
+  config = traceStep('load config', () => loadConfig());
   logger.configStatus('Configuration loaded successfully', true);
   const loadedConfigPath = getLastConfigPath?.();
   if (loadedConfigPath) {
@@ -699,9 +835,11 @@ class TTLCache {
 const processedCacheTtlMs = getConfigValue(config, 'watch.queue.processedCacheTtlMs', 3600000);
 const processed = new TTLCache(processedCacheTtlMs);
 
-// Processing queue to ensure sequential file processing
+// Processing queue drained by up to watch.queue.concurrency workers; remote APIs
+// and ffmpeg are additionally throttled per service (src/rateLimiter.mjs)
 const processingQueue = [];
-let isProcessingQueue = false;
+const inFlight = new Set();
+const queuedAt = new Map(); // filePath -> time it entered the queue
 
 // Retry mechanism
 const retryCount = new Map(); // filePath -> attemptNumber
@@ -765,11 +903,17 @@ function getFileSource(filePath) {
 /**
  * Create a lock file to prevent concurrent processing
  * @param {string} filePath - Path to the file being processed
- * @returns {string} - Path to the lock file
+ * @returns {string|null} - Path to the lock file, or null if it is already locked
  */
 function createLockFile(filePath) {
   const lockPath = `${filePath}.processing`;
-  fs.writeFileSync(lockPath, new Date().toISOString());
+  try {
+    // Exclusive create: fails if another worker or instance holds the lock
+    fs.writeFileSync(lockPath, new Date().toISOString(), { flag: 'wx' });
+  } catch (err) {
+    if (err.code === 'EEXIST') return null;
+    throw err;
+  }
   return lockPath;
 }
 
@@ -1132,6 +1276,7 @@ async function moveToProcessed(originalPath, compressedPath, generatedName, temp
       fs.unlinkSync(compressedPath);
       console.log(`✓ Compressed file copied and original deleted: ${newPath}`);
     }
+    noteProcessedFile(newPath);
     
     // Delete the original large file if it exists and is different from compressed file
     if (originalPath !== compressedPath && fs.existsSync(originalPath)) {
@@ -1254,6 +1399,7 @@ function scheduleRetry(filePath, error) {
   const timeoutId = setTimeout(() => {
     retryTimeouts.delete(filePath);
     processingQueue.push(filePath);
+    queuedAt.set(filePath, Date.now());
     processQueue();
   }, delay);
 
@@ -1261,51 +1407,74 @@ function scheduleRetry(filePath, error) {
 }
 
 /**
- * Process files from the queue sequentially
+ * Start workers for queued files, up to watch.queue.concurrency at once
  */
-async function processQueue() {
-  if (isProcessingQueue || processingQueue.length === 0) {
-    return;
-  }
-  
-  isProcessingQueue = true;
-  
-  while (processingQueue.length > 0) {
+function processQueue() {
+  const concurrency = Math.max(1, getConfigValue(config, 'watch.queue.concurrency', 1));
+
+  while (inFlight.size < concurrency && processingQueue.length > 0) {
     const filePath = processingQueue.shift();
-    const remainingCount = processingQueue.length;
-    
-    const currentAttempt = retryCount.get(filePath) || 0;
-    const attemptText = currentAttempt > 0 ? ` (attempt ${currentAttempt + 1})` : '';
-    
-    logger.queueStatus(`Processing ${path.basename(filePath)}${attemptText} (${remainingCount} remaining in queue)`);
+    inFlight.add(filePath);
+    runQueuedFile(filePath).finally(() => {
+      inFlight.delete(filePath);
+      if (processingQueue.length > 0) {
+        processQueue();
+      } else if (inFlight.size === 0) {
+        logQueueDrained();
+      }
+    });
+  }
+}
 
-    try {
-      // Process the file
-      await processFile(filePath);
+/**
+ * Process one queued file, scheduling a retry on failure
+ * @param {string} filePath - Path to the file
+ */
+async function runQueuedFile(filePath) {
+  const currentAttempt = retryCount.get(filePath) || 0;
+  const attemptText = currentAttempt > 0 ? ` (attempt ${currentAttempt + 1})` : '';
+  const waitedMs = Date.now() - (queuedAt.get(filePath) ?? Date.now());
+  queuedAt.delete(filePath);
 
-      // Success - clear any retry tracking and pending timeouts
-      if (retryCount.has(filePath)) {
-        logger.success(LogCategory.QUEUE, `File ${path.basename(filePath)} processed successfully after ${currentAttempt + 1} attempts`);
-        retryCount.delete(filePath);
-      }
-      // Clear any pending retry timeout to prevent duplicate processing
-      if (retryTimeouts.has(filePath)) {
-        clearTimeout(retryTimeouts.get(filePath));
-        retryTimeouts.delete(filePath);
-      }
+  logger.queueStatus(`Processing ${path.basename(filePath)}${attemptText} ` +
+    `(${inFlight.size} in flight, ${processingQueue.length} remaining in queue, waited ${(waitedMs / 1000).toFixed(1)}s)`);
 
-      // Configured delay between files
-      if (processingQueue.length > 0) {
-        const delay = getConfigValue(config, 'watch.queue.delayBetweenFiles', 2000);
-        await new Promise(resolve => setTimeout(resolve, delay));
-      }
-    } catch (error) {
-      logger.failure(LogCategory.QUEUE, `Error processing ${path.basename(filePath)}: ${error.message}`);
-      scheduleRetry(filePath, error);
+  try {
+    // Process the file
+    await processFile(filePath);
+
+    // Success - clear any retry tracking and pending timeouts
+    if (retryCount.has(filePath)) {
+      logger.success(LogCategory.QUEUE, `File ${path.basename(filePath)} processed successfully after ${currentAttempt + 1} attempts`);
+      retryCount.delete(filePath);
     }
+    // Clear any pending retry timeout to prevent duplicate processing
+    if (retryTimeouts.has(filePath)) {
+      clearTimeout(retryTimeouts.get(filePath));
+      retryTimeouts.delete(filePath);
+    }
+
+    // Configured delay before this worker picks up the next file
+    if (processingQueue.length > 0) {
+      const delay = getConfigValue(config, 'watch.queue.delayBetweenFiles', 2000);
+      await new Promise(resolve => setTimeout(resolve, delay));
+    }
+  } catch (error) {
+    logger.failure(LogCategory.QUEUE, `Error processing ${path.basename(filePath)}: ${error.message}`);
+    scheduleRetry(filePath, error);
   }
-  
-  isProcessingQueue = false;
+}
+
+/**
+ * Log how long work waited on each rate limit once the queue is empty
+ */
+function logQueueDrained() {
+  const stats = Object.entries(limiterStats()).filter(([, s]) => s.calls > 0);
+  if (stats.length === 0) return;
+  const summary = stats.map(([name, s]) =>
+    `${name} ${s.calls} call${s.calls === 1 ? '' : 's'}, waited ${(s.totalWaitMs / 1000).toFixed(1)}s total / ${(s.maxWaitMs / 1000).toFixed(1)}s max`
+  ).join('; ');
+  logger.queueStatus(`Queue empty - ${summary}`);
 }
 
 /**
@@ -1319,7 +1488,7 @@ function addToQueue(filePath) {
   }
 
   // Check if file is already in queue or being processed
-  if (processingQueue.includes(filePath) || processed.has(filePath)) {
+  if (processingQueue.includes(filePath) || inFlight.has(filePath) || processed.has(filePath)) {
     logger.info(LogCategory.QUEUE, `File already queued or processed: ${path.basename(filePath)}`);
     return;
   }
@@ -1333,9 +1502,10 @@ function addToQueue(filePath) {
   const source = getFileSource(filePath);
   const queuePosition = processingQueue.length + 1;
   logger.info(LogCategory.WATCH, `New file detected from ${source}: ${path.basename(filePath)}`);
-  logger.queueStatus(`Adding to queue (position ${queuePosition})`);
-  
+  logger.queueStatus(`Adding to queue (position ${queuePosition}, ${inFlight.size} in flight)`);
+
   processingQueue.push(filePath);
+  queuedAt.set(filePath, Date.now());
   
   // Start processing if not already running
   processQueue();
@@ -1528,19 +1698,7 @@ async function processRecentVoiceMemos(startDate, endDate, dryRun = false) {
       } else {
         console.log(`\nProcessing ${unprocessedFiles.length} unprocessed files...\n`);
         
-        // Process files sequentially
-        for (let i = 0; i < unprocessedFiles.length; i++) {
-          const item = unprocessedFiles[i];
-          console.log(`\n[${i + 1}/${unprocessedFiles.length}] Processing: ${item.name}`);
-          
-          await processFile(item.path);
-          
-          // Configured delay between files
-          if (i < unprocessedFiles.length - 1) {
-            const delay = getConfigValue(config, 'watch.queue.delayBetweenFiles', 2000);
-            await new Promise(resolve => setTimeout(resolve, delay));
-          }
-        }
+        await processFileBacklog(unprocessedFiles.map(item => item.path));
         
         console.log('\n[Process Recent VM] Finished processing Voice Memos.\n');
       }
@@ -1606,20 +1764,7 @@ async function cleanoutUnprocessed() {
     });
     console.log('');
     
-    // Process files sequentially to avoid overwhelming the system
-    for (let i = 0; i < supportedFiles.length; i++) {
-      const filePath = supportedFiles[i];
-      console.log(`\n[${i + 1}/${supportedFiles.length}] Processing: ${path.basename(filePath)}`);
-      
-      // Use the existing processFile function which handles all the logic
-      await processFile(filePath);
-      
-      // Configured delay between files
-      if (i < supportedFiles.length - 1) {
-        const delay = getConfigValue(config, 'watch.queue.delayBetweenFiles', 2000);
-        await new Promise(resolve => setTimeout(resolve, delay));
-      }
-    }
+    await processFileBacklog(supportedFiles);
     
     console.log('\n[Cleanout Mode] Finished processing existing files.\n');
   } catch (err) {
@@ -1674,19 +1819,7 @@ async function processDirectoryCleanout(dirConfig) {
     });
     console.log('');
 
-    // Process files sequentially
-    for (let i = 0; i < supportedFiles.length; i++) {
-      const filePath = supportedFiles[i];
-      console.log(`\n[${i + 1}/${supportedFiles.length}] Processing: ${path.basename(filePath)}`);
-
-      await processFile(filePath);
-
-      // Configured delay between files
-      if (i < supportedFiles.length - 1) {
-        const delay = getConfigValue(config, 'watch.queue.delayBetweenFiles', 2000);
-        await new Promise(resolve => setTimeout(resolve, delay));
-      }
-    }
+    await processFileBacklog(supportedFiles);
 
     logger.success(LogCategory.PROCESSING, `Cleanout complete for ${dirConfig.name}`);
     return supportedFiles.length;
@@ -1776,19 +1909,7 @@ async function processCustomDirectory(directoryPath) {
   // Add to directoryConfigs so getFileDirectoryConfig() can find it
   directoryConfigs.push(customDirConfig);
 
-  // Process files sequentially
-  for (let i = 0; i < supportedFiles.length; i++) {
-    const filePath = supportedFiles[i];
-    console.log(`\n[${i + 1}/${supportedFiles.length}] Processing: ${path.basename(filePath)}`);
-
-    await processFile(filePath);
-
-    // Configured delay between files
-    if (i < supportedFiles.length - 1) {
-      const delay = getConfigValue(config, 'watch.queue.delayBetweenFiles', 2000);
-      await new Promise(resolve => setTimeout(resolve, delay));
-    }
-  }
+  await processFileBacklog(supportedFiles);
 
   console.log('\n[Custom Directory Mode] Finished processing all files.\n');
 }
@@ -1832,6 +1953,47 @@ async function processYouTubeUrlFile(filePath, dirConfig) {
   };
 }
 
+/**
+ * Process a backlog of files (date range, cleanout, --directory)
+ * Files start one after another as before, but speaker identification is
+ * batched: each file runs until it has queued its identification (or
+ * finished), then the next one starts. Every batchFiles queued files, and the
+ * rest at the end, go to the worker as one identify_batch call; each file then
+ * continues with its own result while later files are still transcribed.
+ * @param {Array<string>} files - Paths to process, in order
+ */
+async function processFileBacklog(files) {
+  const { openSpeakerBatch } = await traceImport('speakerIdentification.mjs', () => import('./speakerIdentification.mjs'));
+  const batchFiles = getConfigValue(config, 'speakerIdentification.python.batchFiles', 4);
+  const delay = getConfigValue(config, 'watch.queue.delayBetweenFiles', 2000);
+  const batch = openSpeakerBatch();
+  const running = [];
+
+  try {
+    for (let i = 0; i < files.length; i++) {
+      const filePath = files[i];
+      console.log(`\n[${i + 1}/${files.length}] Processing: ${path.basename(filePath)}`);
+
+      const queuedBefore = batch.queued;
+      const done = processFile(filePath);
+      running.push(done);
+      await Promise.race([done, batch.waitForQueued(queuedBefore + 1)]);
+
+      if (batch.pending.length >= batchFiles) {
+        batch.flush();
+      }
+
+      // Configured delay between files
+      if (i < files.length - 1) {
+        await new Promise(resolve => setTimeout(resolve, delay));
+      }
+    }
+  } finally {
+    await batch.close();
+  }
+  await Promise.all(running);
+}
+
 /**
  * Process a new file using directory-specific configuration
  * @param {string} filePath - Path to the file to process
@@ -1882,7 +2044,11 @@ async function processFile(filePath) {
   
   // Create lock file
   const lock = createLockFile(filePath);
-  
+  if (!lock) {
+    logger.info(LogCategory.QUEUE, `Skipping ${path.basename(filePath)} - already being processed (lock file present)`);
+    return;
+  }
+
   try {
     console.log('Processing file with directory-specific options...');
 
@@ -1905,6 +2071,7 @@ async function processFile(filePath) {
           // Move the .txt file to processed directory
           const destPath = path.join(processedDir, path.basename(filePath));
           fs.renameSync(filePath, destPath);
+          noteProcessedFile(destPath);
           logger.success(LogCategory.FILE, `Moved to processed: ${path.basename(filePath)}`);
         }
       }
@@ -2076,7 +2243,7 @@ async function startWatching() {
   recoverFailedFiles();
 
   // Validate directories and get list to watch
-  const dirsToWatch = await validateDirectories();
+  const dirsToWatch = await traceStep('validate directories', () => validateDirectories());
   
   // Handle custom directory mode (process and exit)
   if (customDirectoryPath) {
@@ -2148,6 +2315,7 @@ async function startWatching() {
     ...processedPaths.map(p => `${p}/**`)
   ];
   
+  const { default: chokidar } = await traceImport('chokidar', () => import('chokidar'));
   const watcher = chokidar.watch(dirsToWatch, { 
     ignoreInitial: true,
     persistent: true,
@@ -2162,12 +2330,23 @@ async function startWatching() {
     .on('add', addToQueue)
     .on('error', error => logger.failure(LogCategory.WATCH, `Watcher error: ${error.message}`));
 
+  // Keep the processed-directory prefix index current instead of rescanning it per file
+  const processedWatcher = processedPaths.length > 0
+    ? chokidar.watch(processedPaths, { ignoreInitial: true, persistent: true, depth: 0 })
+        .on('add', filePath => noteProcessedFile(filePath))
+        .on('unlink', filePath => noteProcessedFile(filePath, true))
+        .on('error', error => logger.failure(LogCategory.WATCH, `Processed-dir watcher error: ${error.message}`))
+    : null;
+
   // Handle graceful shutdown
   process.on('SIGINT', () => {
     logger.info(LogCategory.SYSTEM, 'Stopping file watcher...');
     watcher.close();
+    processedWatcher?.close();
     process.exit(0);
   });
+
+  finishStartupTrace('watching');
 }
 
 // Only start the main application if not in speaker mode
@@ -2184,7 +2363,7 @@ if (!isSpeakerMode) {
 
   // Check for existing instance before starting (async IIFE)
   (async () => {
-    await checkForExistingInstance();
+    await traceStep('instance lock', () => checkForExistingInstance());
     // Start the application
     startWatching();
   })();
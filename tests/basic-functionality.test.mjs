@@ -2,6 +2,14 @@ import { test, expect, describe, beforeEach, afterEach } from 'bun:test';
 import fs from 'fs';
 import path from 'path';
 import { sanitizeFilename } from '../src/validation.mjs';
+import {
+  chooseChunkCuts,
+  silenceCuts,
+  buildTimeline,
+  toOriginalTime,
+  remapTranscriptionTimes,
+  silenceRemovalFilter
+} from '../audioProcessing.mjs';
 import {
   ProcessingError,
   ValidationError,
@@ -135,6 +143,106 @@ describe('Basic Functionality Tests', () => {
     });
   });
 
+  describe('Audio Chunking', () => {
+    test('chooseChunkCuts splits evenly without silences', () => {
+      expect(chooseChunkCuts(100, 30)).toEqual([30, 60, 90]);
+      expect(chooseChunkCuts(20, 30)).toEqual([]);
+    });
+
+    test('chooseChunkCuts prefers the latest silence in each window', () => {
+      const silences = [
+        { start: 20, end: 22, duration: 2 },
+        { start: 25, end: 26, duration: 1 },
+        { start: 40, end: 41, duration: 1 },
+        { start: 70, end: 71, duration: 1 }
+      ];
+      const cuts = chooseChunkCuts(100, 30, silences);
+      expect(cuts).toEqual([25.5, 40.5, 70.5]);
+      // No chunk exceeds the maximum duration
+      [0, ...cuts, 100].reduce((previous, cut) => {
+        expect(cut - previous).toBeLessThanOrEqual(30);
+        return cut;
+      });
+    });
+  });
+
+  describe('Silence Removal', () => {
+    const silences = [
+      { start: 10, end: 15, duration: 5 },
+      { start: 30, end: 30.4, duration: 0.4 },
+      { start: 40, end: 50, duration: 10 }
+    ];
+
+    test('silenceCuts keeps padding and skips pauses too short to cut', () => {
+      expect(silenceCuts(silences, 0.25)).toEqual([
+        { start: 10.25, end: 14.75 },
+        { start: 40.25, end: 49.75 }
+      ]);
+    });
+
+    test('toOriginalTime undoes the cuts and the tempo change', () => {
+      const timeline = buildTimeline(silenceCuts(silences, 0.25), 2);
+      expect(timeline.removedSeconds).toBeCloseTo(14);
+
+      // Before the first cut only the tempo applies
+      expect(toOriginalTime(5, timeline)).toBeCloseTo(10);
+      // Speech after the first cut (condensed 20s) is 4.5s later in the recording
+      expect(toOriginalTime(10, timeline)).toBeCloseTo(24.5);
+      // After both cuts
+      expect(toOriginalTime(30, timeline)).toBeCloseTo(74);
+      // Without a timeline times are unchanged
+      expect(toOriginalTime(30, null)).toBe(30);
+    });
+
+    test('a timeline without cuts still undoes the tempo change', () => {
+      const timeline = buildTimeline([], 1.5);
+      expect(timeline.removedSeconds).toBe(0);
+      expect(toOriginalTime(400, timeline)).toBeCloseTo(600);
+    });
+
+    test('silenceRemovalFilter selects exactly the audio outside the cuts', () => {
+      const cuts = Array.from({ length: 37 }, (_, i) => ({ start: i * 10 + 2, end: i * 10 + 6.5 }));
+      const filter = silenceRemovalFilter(cuts);
+      const expression = filter.match(/aselect='([^']+)'/)[1];
+
+      // Evaluate the ffmpeg expression with the same semantics in JS
+      const select = new Function('t', 'iff', 'lt', 'not', 'between',
+        `return ${expression.replace(/\bif\(/g, 'iff(')};`);
+      const ops = [
+        (condition, then, otherwise) => (condition ? then : otherwise),
+        (a, b) => (a < b ? 1 : 0),
+        (x) => (x ? 0 : 1),
+        (x, low, high) => (x >= low && x <= high ? 1 : 0)
+      ];
+      for (let t = 0; t < 380; t += 0.25) {
+        const inCut = cuts.some(cut => t >= cut.start && t <= cut.end);
+        expect(select(t, ...ops)).toBe(inCut ? 0 : 1);
+      }
+
+      // A binary search: each cut appears once, nested only log2(cuts) deep
+      expect(expression.match(/between/g).length).toBe(cuts.length);
+      let depth = 0;
+      let deepest = 0;
+      for (const char of expression) {
+        if (char === '(') deepest = Math.max(deepest, ++depth);
+        if (char === ')') depth--;
+      }
+      // 6 if() levels, then not(between(...)) adds two more
+      expect(deepest).toBeLessThanOrEqual(8);
+    });
+
+    test('remapTranscriptionTimes rewrites segments in place', () => {
+      const timeline = buildTimeline([{ start: 10, end: 20 }], 1);
+      const data = {
+        segments: [{ start: 2, end: 9, text: 'before' }, { start: 11, end: 15, text: 'after' }],
+        duration: 15
+      };
+      remapTranscriptionTimes(data, timeline);
+      expect(data.segments.map(s => [s.start, s.end])).toEqual([[2, 9], [21, 25]]);
+      expect(data.duration).toBe(25);
+    });
+  });
+
   describe('Module Imports', () => {
     test('can import core modules without errors', async () => {
       // Test that core modules can be imported
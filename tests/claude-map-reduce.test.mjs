@@ -0,0 +1,175 @@
+#!/usr/bin/env bun
+
+/**
+ * Tests for map-reduce summarization of long transcripts
+ * Runs against a local stub of the Messages API (ANTHROPIC_BASE_URL)
+ */
+
+import { describe, test, expect, beforeAll, afterAll, beforeEach } from 'bun:test';
+import http from 'http';
+import fs from 'fs';
+import path from 'path';
+import os from 'os';
+
+let server;
+let testDir;
+let requests;
+let failMerge;
+let summarizeInPieces;
+let splitTranscript;
+
+beforeAll(async () => {
+  testDir = fs.mkdtempSync(path.join(os.tmpdir(), 'summarai-claude-test-'));
+
+  server = http.createServer((req, res) => {
+    let body = '';
+    req.on('data', chunk => { body += chunk; });
+    req.on('end', () => {
+      const prompt = JSON.parse(body).messages[0].content;
+      const isMerge = prompt.includes('was too long to send at once');
+      requests.push({ isMerge, prompt });
+
+      if (isMerge && failMerge) {
+        res.writeHead(400, { 'content-type': 'application/json' });
+        res.end(JSON.stringify({ error: { type: 'invalid_request_error', message: 'merge failed' } }));
+        return;
+      }
+
+      const part = prompt.match(/This is part (\d+) of/);
+      const text = isMerge ? 'Summary: Merged result' : `partial summary ${part[1]}`;
+      res.writeHead(200, { 'content-type': 'application/json' });
+      res.end(JSON.stringify({ content: [{ type: 'text', text }] }));
+    });
+  });
+  await new Promise(resolve => server.listen(0, '127.0.0.1', resolve));
+
+  process.env.ANTHROPIC_BASE_URL = `http://127.0.0.1:${server.address().port}`;
+  ({ summarizeInPieces, splitTranscript } = await import('../claudeAPI.mjs'));
+});
+
+afterAll(() => {
+  server.close();
+  delete process.env.ANTHROPIC_BASE_URL;
+  fs.rmSync(testDir, { recursive: true, force: true });
+});
+
+beforeEach(() => {
+  requests = [];
+  failMerge = false;
+});
+
+function makeSegments(count) {
+  return Array.from({ length: count }, (_, i) => ({
+    start: i * 10,
+    end: i * 10 + 9,
+    speaker: `Speaker ${Math.floor(i / 4) % 2}`,
+    text: `Sentence number ${i} about the routing matrix and the next release.`
+  }));
+}
+
+const options = (overrides = {}) => ({
+  segments: makeSegments(24),
+  model: 'claude-test',
+  apiKey: 'test-key',
+  pieceChars: 500,
+  concurrency: 2,
+  ...overrides
+});
+
+describe('Long transcript summarization', () => {
+  test('splitTranscript keeps whole segments and stays under the piece size', () => {
+    const pieces = splitTranscript('', makeSegments(24), 500);
+    expect(pieces.length).toBeGreaterThan(1);
+    for (const piece of pieces) {
+      expect(piece.text.length).toBeLessThanOrEqual(500);
+      expect(piece.text.startsWith('[')).toBe(true);
+    }
+    expect(pieces[0].start).toBe(0);
+    expect(pieces[pieces.length - 1].end).toBe(239);
+  });
+
+  test('splitTranscript falls back to sentence boundaries without segments', () => {
+    const text = Array.from({ length: 40 }, (_, i) => `This is sentence ${i}.`).join(' ');
+    const pieces = splitTranscript(text, null, 100);
+    expect(pieces.length).toBeGreaterThan(1);
+    expect(pieces.every(piece => piece.text.trim().endsWith('.'))).toBe(true);
+  });
+
+  test('splitTranscript wraps a segment longer than the piece size at whitespace', () => {
+    const words = Array.from({ length: 300 }, (_, i) => `word${i}`);
+    const pieces = splitTranscript('', [
+      { start: 65, end: 400, speaker: 'Speaker 0', text: words.join(' ') }
+    ], 500);
+
+    expect(pieces.length).toBeGreaterThan(1);
+    for (const piece of pieces) {
+      expect(piece.text.length).toBeLessThanOrEqual(500);
+      expect(piece.text.startsWith('[01:05] Speaker 0: ')).toBe(true);
+      expect(piece.start).toBe(65);
+    }
+    const wrapped = pieces.flatMap(piece => piece.text.replace('[01:05] Speaker 0: ', '').split(' '));
+    expect(wrapped).toEqual(words);
+  });
+
+  test('splitTranscript wraps an over-long sentence without segments', () => {
+    const sentence = Array.from({ length: 100 }, (_, i) => `clause ${i}`).join(', ') + '.';
+    const pieces = splitTranscript(`Short start. ${sentence}`, null, 100);
+    expect(pieces.length).toBeGreaterThan(1);
+    expect(pieces.every(piece => piece.text.length <= 100)).toBe(true);
+    expect(pieces.map(piece => piece.text).join(' ')).toBe(`Short start. ${sentence}`);
+  });
+
+  test('passes the transcript note into every part and the merge', async () => {
+    const previousHome = process.env.HOME;
+    process.env.HOME = testDir;
+    try {
+      const note = 'Speakers identified in this recording: Alice, Bob\n\n';
+      await summarizeInPieces('', options({ transcriptNote: note }));
+
+      expect(requests.filter(r => !r.isMerge).length).toBeGreaterThan(1);
+      expect(requests.every(r => r.prompt.includes(note))).toBe(true);
+    } finally {
+      process.env.HOME = previousHome;
+    }
+  });
+
+  test('summarizes pieces, then merges them in order', async () => {
+    const previousHome = process.env.HOME;
+    process.env.HOME = testDir;
+    try {
+      const result = await summarizeInPieces('', options());
+      expect(result).toBe('Summary: Merged result');
+
+      const maps = requests.filter(r => !r.isMerge);
+      const merges = requests.filter(r => r.isMerge);
+      expect(maps.length).toBeGreaterThan(1);
+      expect(merges.length).toBe(1);
+
+      const order = [...merges[0].prompt.matchAll(/partial summary (\d+)/g)].map(m => Number(m[1]));
+      expect(order).toEqual(maps.map((_, i) => i + 1));
+    } finally {
+      process.env.HOME = previousHome;
+    }
+  });
+
+  test('a failed merge reuses the cached piece summaries on retry', async () => {
+    const previousHome = process.env.HOME;
+    process.env.HOME = testDir;
+    try {
+      failMerge = true;
+      await expect(summarizeInPieces('', options())).rejects.toThrow();
+      const firstMaps = requests.filter(r => !r.isMerge).length;
+
+      requests = [];
+      failMerge = false;
+      const result = await summarizeInPieces('', options());
+
+      expect(firstMaps).toBeGreaterThan(1);
+      expect(result).toBe('Summary: Merged result');
+      expect(requests.filter(r => !r.isMerge).length).toBe(0);
+      expect(requests.filter(r => r.isMerge).length).toBe(1);
+    } finally {
+      process.env.HOME = previousHome;
+    }
+  });
+});
@@ -7,6 +7,9 @@
  */
 
 import { describe, test, expect, beforeEach, afterEach } from 'bun:test';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
 import { loadConfig, getConfigValue, parseValue, getLastConfigPath } from '../configLoader.mjs';
 
 describe('Config Loading', () => {
@@ -377,4 +380,53 @@ describe('Config Loading', () => {
       expect(result.errors.some(e => e.includes('level'))).toBe(true);
     });
   });
+
+  describe('parsed config cache', () => {
+    const configYaml = (service) => [
+      'directories:',
+      '  watch:',
+      '    main:',
+      '      name: Main',
+      '      path: ~/recordings',
+      'transcription:',
+      `  defaultService: ${service}`,
+      'fileProcessing:',
+      '  supportedExtensions:',
+      '    audio: [".m4a"]',
+      ''
+    ].join('\n');
+
+    let testDir;
+    let configPath;
+
+    beforeEach(() => {
+      testDir = fs.mkdtempSync(path.join(os.tmpdir(), 'summarai-config-test-'));
+      configPath = path.join(testDir, 'config.yaml');
+    });
+
+    afterEach(() => {
+      fs.rmSync(testDir, { recursive: true, force: true });
+    });
+
+    test('returns independent copies of an unchanged file', () => {
+      fs.writeFileSync(configPath, configYaml('scribe'));
+      const first = loadConfig(configPath);
+      first.transcription.defaultService = 'changed';
+
+      const second = loadConfig(configPath);
+      expect(second.transcription.defaultService).toBe('scribe');
+      expect(second.directories.watch.main.path).toBe(path.join(os.homedir(), 'recordings'));
+    });
+
+    test('re-reads the file once it changes', () => {
+      fs.writeFileSync(configPath, configYaml('scribe'));
+      expect(loadConfig(configPath).transcription.defaultService).toBe('scribe');
+
+      fs.writeFileSync(configPath, configYaml('whisper'));
+      // Make sure the change is visible even on coarse mtime filesystems
+      const later = new Date(Date.now() + 5000);
+      fs.utimesSync(configPath, later, later);
+      expect(loadConfig(configPath).transcription.defaultService).toBe('whisper');
+    });
+  });
 });
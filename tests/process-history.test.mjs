@@ -257,6 +257,56 @@ describe('Process History', () => {
     });
   });
 
+  describe('incremental index', () => {
+    test('picks up records appended after the first load', async () => {
+      const { loadIndex, appendRecord } = await import('../src/processHistory.mjs');
+      appendRecord(testConfig, { sourcePath: '/path/first.m4a' });
+      expect(loadIndex(testConfig).bySourcePath.size).toBe(1);
+
+      appendRecord(testConfig, { sourcePath: '/path/second.m4a' });
+      const index = loadIndex(testConfig);
+      expect(index.bySourcePath.has('/path/second.m4a')).toBe(true);
+      expect(index.bySourcePath.size).toBe(2);
+    });
+
+    test('leaves a partially written line for the next load', async () => {
+      const ndjsonPath = testConfig.fileProcessing.history.file;
+      fs.writeFileSync(ndjsonPath, '{"sourceName":"done.m4a","sourcePath":"/path/done.m4a","status":"success"}\n{"sourcePath":"/pa');
+
+      const { loadIndex } = await import('../src/processHistory.mjs');
+      expect(loadIndex(testConfig).bySourcePath.size).toBe(1);
+
+      fs.appendFileSync(ndjsonPath, 'th/late.m4a","status":"success"}\n');
+      expect(loadIndex(testConfig).bySourcePath.has('/path/late.m4a')).toBe(true);
+    });
+
+    test('rebuilds when the log is rewritten', async () => {
+      const ndjsonPath = testConfig.fileProcessing.history.file;
+      fs.writeFileSync(ndjsonPath, '{"sourcePath":"/path/old.m4a","status":"success"}\n');
+
+      const { loadIndex } = await import('../src/processHistory.mjs');
+      expect(loadIndex(testConfig).bySourcePath.has('/path/old.m4a')).toBe(true);
+
+      fs.writeFileSync(ndjsonPath, '{"sourcePath":"/path/new.m4a","status":"success"}\n');
+      const index = loadIndex(testConfig);
+      expect(index.bySourcePath.has('/path/old.m4a')).toBe(false);
+      expect(index.bySourcePath.has('/path/new.m4a')).toBe(true);
+    });
+
+    test('writes a snapshot that later loads start from', async () => {
+      const config = { fileProcessing: { history: { ...testConfig.fileProcessing.history, snapshotEvery: 2 } } };
+      const { loadIndex, appendRecord, appendFailureRecord } = await import('../src/processHistory.mjs');
+      appendRecord(config, { sourcePath: '/path/a.m4a' });
+      appendFailureRecord(config, { sourcePath: '/path/b.m4a', error: { message: 'boom' } });
+      loadIndex(config);
+
+      const snapshot = JSON.parse(fs.readFileSync(`${config.fileProcessing.history.file}.index.json`, 'utf8'));
+      expect(snapshot.bySourcePath).toEqual(['/path/a.m4a']);
+      expect(snapshot.failedFiles.map(([key]) => key)).toEqual(['/path/b.m4a']);
+      expect(snapshot.offset).toBe(fs.statSync(config.fileProcessing.history.file).size);
+    });
+  });
+
   describe('appendRecord', () => {
     test('creates file if missing', async () => {
       const { appendRecord } = await import('../src/processHistory.mjs');
@@ -0,0 +1,70 @@
+#!/usr/bin/env bun
+
+/**
+ * Tests for the shared concurrency / token bucket limits used by the queue
+ */
+
+import { describe, test, expect } from 'bun:test';
+import { Semaphore, TokenBucket, Limiter } from '../src/rateLimiter.mjs';
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+describe('Rate Limiter', () => {
+  test('Semaphore hands slots to waiters in FIFO order', async () => {
+    const semaphore = new Semaphore(1);
+    const order = [];
+
+    await semaphore.acquire();
+    const first = semaphore.acquire().then(() => order.push('first'));
+    const second = semaphore.acquire().then(() => order.push('second'));
+    expect(semaphore.waiting).toBe(2);
+
+    semaphore.release();
+    await first;
+    semaphore.release();
+    await second;
+    semaphore.release();
+
+    expect(order).toEqual(['first', 'second']);
+    expect(semaphore.active).toBe(0);
+  });
+
+  test('TokenBucket allows a burst then waits for refill', async () => {
+    const bucket = new TokenBucket(600, 2); // one token per 100ms
+    const started = Date.now();
+
+    await bucket.take();
+    await bucket.take();
+    expect(Date.now() - started).toBeLessThan(50);
+
+    await bucket.take();
+    expect(Date.now() - started).toBeGreaterThanOrEqual(80);
+  });
+
+  test('Limiter caps calls in flight and records waits', async () => {
+    const limiter = new Limiter('test', { maxConcurrent: 2 });
+    let running = 0;
+    let peak = 0;
+
+    const task = async () => {
+      running++;
+      peak = Math.max(peak, running);
+      await sleep(20);
+      running--;
+    };
+
+    await Promise.all(Array.from({ length: 5 }, () => limiter.run(task)));
+
+    expect(peak).toBe(2);
+    expect(limiter.stats.calls).toBe(5);
+    expect(limiter.stats.waited).toBeGreaterThan(0);
+    expect(limiter.active).toBe(0);
+  });
+
+  test('Limiter releases its slot when the call fails', async () => {
+    const limiter = new Limiter('test', { maxConcurrent: 1 });
+
+    await expect(limiter.run(async () => { throw new Error('boom'); })).rejects.toThrow('boom');
+    expect(await limiter.run(async () => 'ok')).toBe('ok');
+  });
+});
@@ -0,0 +1,442 @@
+#!/usr/bin/env bun
+
+/**
+ * Tests for the speaker identification bridge (speakerIdentification.mjs <-> pyannote/speaker_id.py)
+ * Only exercises paths that don't need torch/pyannote (check/list/protocol handling,
+ * identify_batch with no enrolled profiles, backlog batching against a stub worker,
+ * and relabel end to end with the NumPy-only stub embedding backend)
+ */
+
+import { describe, test, expect, beforeEach, afterEach, afterAll } from 'bun:test';
+import fs from 'fs';
+import path from 'path';
+import os from 'os';
+import { spawnSync } from 'child_process';
+import {
+  listProfiles,
+  enrollSpeaker,
+  identifySpeakers,
+  linkUnknownSpeakers,
+  relabelSpeaker,
+  checkPythonEnvironment,
+  identifySpeakersBatch,
+  openSpeakerBatch,
+  shutdownSpeakerWorker
+} from '../speakerIdentification.mjs';
+
+let testDir;
+
+beforeEach(() => {
+  testDir = fs.mkdtempSync(path.join(os.tmpdir(), 'summarai-speaker-test-'));
+});
+
+afterEach(() => {
+  fs.rmSync(testDir, { recursive: true, force: true });
+});
+
+afterAll(() => {
+  shutdownSpeakerWorker();
+});
+
+/**
+ * Stand-in for python3: a --server worker that answers `list` requests one at
+ * a time after a delay, taking longer for profile dirs whose name contains "slow"
+ */
+function writeSlowWorker(dir) {
+  const workerPath = path.join(dir, 'slow-python');
+  fs.writeFileSync(workerPath, `#!/usr/bin/env python3
+import json, sys, time
+print(json.dumps({'id': None, 'event': 'ready', 'pid': 0}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    time.sleep(2.0 if 'slow' in request['profiles_dir'] else 0.4)
+    print(json.dumps({'id': request['id'], 'success': True, 'profiles': [], 'count': 0,
+                      'dir': request['profiles_dir']}), flush=True)
+`);
+  fs.chmodSync(workerPath, 0o755);
+  return workerPath;
+}
+
+/**
+ * Stand-in for python3: a --server worker that logs each request's action and
+ * job count, and names speaker_0 "Alice" in the first job of an identify_batch
+ */
+function writeBatchWorker(dir, logPath) {
+  const workerPath = path.join(dir, 'batch-python');
+  fs.writeFileSync(workerPath, `#!/usr/bin/env python3
+import json, sys
+print(json.dumps({'id': None, 'event': 'ready', 'pid': 0}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    jobs = request.get('jobs', [])
+    with open(${JSON.stringify(logPath)}, 'a') as log:
+        log.write('%s %d\\n' % (request['action'], len(jobs)))
+    for index in range(len(jobs)):
+        result = {'id': request['id'], 'event': 'result', 'index': index, 'success': True,
+                  'speaker_mapping': {'speaker_0': 'Alice' if index == 0 else None}}
+        if index > 0:
+            result['unknown_speakers'] = {'speaker_0': 'unknown-%d' % index}
+        print(json.dumps(result), flush=True)
+    print(json.dumps({'id': request['id'], 'success': True}), flush=True)
+`);
+  fs.chmodSync(workerPath, 0o755);
+  return workerPath;
+}
+
+const hasNumpy = spawnSync('python3', ['-c', 'import numpy']).status === 0;
+
+/**
+ * Write a 16 kHz mono WAV of synthetic voices, one { f0, formant, seconds }
+ * part after another; the stub backend tells different voices apart
+ */
+function writeVoiceWav(file, parts) {
+  const sampleRate = 16000;
+  const samples = [];
+  for (const { f0, formant, seconds, phase = 0 } of parts) {
+    const part = new Float64Array(Math.round(seconds * sampleRate));
+    for (let harmonic = 1; harmonic * f0 < 4000; harmonic++) {
+      const gain = Math.exp(-((harmonic * f0 - formant) ** 2) / (2 * 300 ** 2));
+      for (let i = 0; i < part.length; i++) {
+        part[i] += gain * Math.sin(2 * Math.PI * harmonic * f0 * i / sampleRate + phase * harmonic);
+      }
+    }
+    const peak = part.reduce((max, value) => Math.max(max, Math.abs(value)), 0);
+    part.forEach(value => samples.push(Math.round(0.3 * value / peak * 32767)));
+  }
+
+  const data = Buffer.alloc(samples.length * 2);
+  samples.forEach((value, i) => data.writeInt16LE(value, i * 2));
+  const header = Buffer.alloc(44);
+  header.write('RIFF', 0);
+  header.writeUInt32LE(36 + data.length, 4);
+  header.write('WAVEfmt ', 8);
+  header.writeUInt32LE(16, 16);
+  header.writeUInt16LE(1, 20);
+  header.writeUInt16LE(1, 22);
+  header.writeUInt32LE(sampleRate, 24);
+  header.writeUInt32LE(sampleRate * 2, 28);
+  header.writeUInt16LE(2, 32);
+  header.writeUInt16LE(16, 34);
+  header.write('data', 36);
+  header.writeUInt32LE(data.length, 40);
+  fs.writeFileSync(file, Buffer.concat([header, data]));
+  return file;
+}
+
+const VOICE_ALICE = { f0: 110, formant: 700 };
+const VOICE_BOB = { f0: 230, formant: 2500 };
+const VOICE_CAROL = { f0: 160, formant: 1500 };
+
+function writeProfile(profilesDir, id, name) {
+  const dir = path.join(profilesDir, id);
+  fs.mkdirSync(dir, { recursive: true });
+  fs.writeFileSync(path.join(dir, 'metadata.json'), JSON.stringify({
+    name,
+    display_name: name,
+    profile_id: id,
+    created_at: '2025-01-01T00:00:00Z',
+    sample_duration_seconds: 12.5
+  }));
+}
+
+describe('Speaker Identification', () => {
+  describe('persistent worker', () => {
+    test('lists profiles through the worker', async () => {
+      writeProfile(testDir, 'jared', 'Jared');
+
+      const result = await listProfiles({ profilesDir: testDir });
+      expect(result.success).toBe(true);
+      expect(result.count).toBe(1);
+      expect(result.profiles[0].display_name).toBe('Jared');
+    });
+
+    test('reuses the worker across requests and sees new profiles', async () => {
+      const first = await listProfiles({ profilesDir: testDir });
+      expect(first.count).toBe(0);
+
+      writeProfile(testDir, 'sarah', 'Sarah');
+      const second = await listProfiles({ profilesDir: testDir });
+      expect(second.count).toBe(1);
+    });
+
+    test('queues concurrent requests so each timeout covers only its own work', async () => {
+      const pythonPath = writeSlowWorker(testDir);
+      const options = { pythonPath, timeout: 1000 };
+
+      // 3 x 0.4s run back to back: the last finishes ~1.2s after it was queued,
+      // past the 1s timeout, but only ~0.4s after it was sent
+      const results = await Promise.all([1, 2, 3].map(n =>
+        listProfiles({ ...options, profilesDir: path.join(testDir, `dir${n}`) })
+      ));
+      expect(results.every(result => result.success)).toBe(true);
+      shutdownSpeakerWorker();
+    });
+
+    test('a timeout fails only the request that was running', async () => {
+      const pythonPath = writeSlowWorker(testDir);
+      const options = { pythonPath, timeout: 1000 };
+
+      const [slow, ...queued] = await Promise.allSettled([
+        listProfiles({ ...options, profilesDir: path.join(testDir, 'slow') }),
+        listProfiles({ ...options, profilesDir: path.join(testDir, 'a') }),
+        listProfiles({ ...options, profilesDir: path.join(testDir, 'b') })
+      ]);
+
+      expect(slow.status).toBe('rejected');
+      expect(slow.reason.message).toMatch(/timed out/);
+      expect(queued.map(result => result.status)).toEqual(['fulfilled', 'fulfilled']);
+      shutdownSpeakerWorker();
+    });
+
+    test('recovers after the worker fails to start', async () => {
+      await expect(
+        listProfiles({ profilesDir: testDir, pythonPath: '/nonexistent/python3' })
+      ).rejects.toThrow(/Python not found/);
+
+      const result = await listProfiles({ profilesDir: testDir });
+      expect(result.success).toBe(true);
+    });
+  });
+
+  describe('one-shot mode', () => {
+    test('returns the same result without the worker', async () => {
+      writeProfile(testDir, 'jared', 'Jared');
+
+      const result = await listProfiles({ profilesDir: testDir, persistent: false });
+      expect(result.count).toBe(1);
+      expect(result.profiles[0].id).toBe('jared');
+    });
+  });
+
+  describe('environment check', () => {
+    test('fast check is cached per process', async () => {
+      const first = await checkPythonEnvironment();
+      const second = await checkPythonEnvironment();
+      expect(second).toBe(first);
+      expect(typeof first.available).toBe('boolean');
+    });
+
+    test('deep check runs again instead of using the cache', async () => {
+      const fast = await checkPythonEnvironment();
+      const deep = await checkPythonEnvironment(false, { deep: true });
+      expect(deep).not.toBe(fast);
+      expect(deep.available).toBe(fast.available);
+    });
+  });
+
+  describe('batch identify', () => {
+    test('streams a result per file, including failures', async () => {
+      const audioPath = path.join(testDir, 'memo.m4a');
+      fs.writeFileSync(audioPath, 'not really audio');
+      const profilesDir = path.join(testDir, 'profiles');
+      fs.mkdirSync(profilesDir);
+
+      const seen = [];
+      const mappings = await identifySpeakersBatch([
+        { audioPath, segments: [{ speaker: 'Speaker 0', start: 0, end: 5 }] },
+        { audioPath: path.join(testDir, 'missing.m4a'), segments: [] }
+      ], {
+        profilesDir,
+        onResult: (index, mapping) => seen.push([index, mapping])
+      });
+
+      expect(mappings).toEqual([{}, {}]);
+      expect(seen.map(([index]) => index)).toEqual([0, 1]);
+    });
+  });
+
+  describe('backlog batching', () => {
+    test('queued files are identified together in one worker call', async () => {
+      const logPath = path.join(testDir, 'requests.log');
+      const pythonPath = writeBatchWorker(testDir, logPath);
+      const segments = [{ speaker: 'Speaker 0', start: 0, end: 5 }];
+      const unknown = [];
+
+      const batch = openSpeakerBatch();
+      const first = batch.add(path.join(testDir, 'a.m4a'), segments, {
+        pythonPath,
+        onUnknownSpeakers: (entries) => unknown.push(['a', entries])
+      });
+      const second = batch.add(path.join(testDir, 'b.m4a'), segments, {
+        pythonPath,
+        onUnknownSpeakers: (entries) => unknown.push(['b', entries])
+      });
+
+      await batch.waitForQueued(2);
+      expect(batch.pending.length).toBe(2);
+      expect(fs.existsSync(logPath)).toBe(false);
+
+      await batch.close();
+      expect(await first).toEqual({ speaker_0: 'Alice' });
+      expect(await second).toEqual({ speaker_0: null });
+      expect(unknown).toEqual([['b', { speaker_0: 'unknown-1' }]]);
+      expect(fs.readFileSync(logPath, 'utf8').trim().split('\n')).toEqual(['identify_batch 2']);
+    });
+
+    test('waitForQueued resolves when the batch closes', async () => {
+      const batch = openSpeakerBatch();
+      const waiting = batch.waitForQueued(1);
+      await batch.close();
+      await waiting;
+      expect(batch.queued).toBe(0);
+    });
+  });
+
+  describe.skipIf(!hasNumpy)('relabel', () => {
+    let previousHome;
+
+    beforeEach(() => {
+      // Unknown speakers and the embedding cache live under ~/.summarai
+      previousHome = process.env.HOME;
+      process.env.HOME = testDir;
+    });
+
+    afterEach(() => {
+      process.env.HOME = previousHome;
+    });
+
+    test('names a previously unknown voice in its outputs after enrollment', async () => {
+      const options = { profilesDir: path.join(testDir, 'profiles'), backend: 'stub' };
+
+      // Identification only stores unknown speakers once some profile exists
+      await enrollSpeaker('Bob', writeVoiceWav(path.join(testDir, 'bob.wav'), [
+        { ...VOICE_BOB, seconds: 4 }
+      ]), options);
+
+      // Recording 1: Carol is speaker_0, Alice (not enrolled yet) is speaker_1
+      const recording = writeVoiceWav(path.join(testDir, 'meeting.wav'), [
+        { ...VOICE_CAROL, seconds: 4 }, { ...VOICE_ALICE, seconds: 4 },
+        { ...VOICE_CAROL, seconds: 4 }, { ...VOICE_ALICE, seconds: 4 }
+      ]);
+      let unknown = {};
+      const mapping = await identifySpeakers(recording, [
+        { speaker: 'Speaker 0', start: 0, end: 4 },
+        { speaker: 'Speaker 1', start: 4, end: 8 },
+        { speaker: 'Speaker 0', start: 8, end: 12 },
+        { speaker: 'Speaker 1', start: 12, end: 16 }
+      ], { ...options, onUnknownSpeakers: (entries) => { unknown = entries; } });
+      expect(mapping).toEqual({ speaker_0: null, speaker_1: null });
+      expect(Object.keys(unknown).sort()).toEqual(['speaker_0', 'speaker_1']);
+
+      // Recording 2: only Carol, so nothing in it should ever be renamed to Alice
+      const other = writeVoiceWav(path.join(testDir, 'call.wav'), [{ ...VOICE_CAROL, seconds: 6 }]);
+      let otherUnknown = {};
+      await identifySpeakers(other, [{ speaker: 'Speaker 0', start: 0, end: 6 }], {
+        ...options, onUnknownSpeakers: (entries) => { otherUnknown = entries; }
+      });
+
+      const segmentsPath = path.join(testDir, 'meeting_segments.txt');
+      const markdownPath = path.join(testDir, 'meeting.md');
+      const otherPath = path.join(testDir, 'call_segments.txt');
+      fs.writeFileSync(segmentsPath, [
+        '[00:00.000 - 00:04.000] Speaker 0: Shall we start?',
+        '[00:04.000 - 00:08.000] Speaker 1: Yes, the routing matrix first.',
+        '[00:08.000 - 00:12.000] Speaker 0: Fine.',
+        '[00:12.000 - 00:16.000] Speaker 1: Then the release.',
+        '[00:16.000 - 00:17.500] Speaker 10: Another diarized speaker.',
+        'Speaker 1: not a segment line',
+        ''
+      ].join('\n'));
+      fs.writeFileSync(markdownPath, [
+        '# Meeting',
+        '',
+        'Speaker 1 suggested starting with the routing matrix.',
+        '',
+        '[01:04.000 - 01:08.000] Speaker 1: Quoted segment.',
+        ''
+      ].join('\n'));
+      fs.writeFileSync(otherPath, '[00:00.000 - 00:06.000] Speaker 0: Just me.\n');
+      const before = {
+        segments: fs.readFileSync(segmentsPath, 'utf8'),
+        markdown: fs.readFileSync(markdownPath, 'utf8'),
+        other: fs.readFileSync(otherPath, 'utf8')
+      };
+
+      expect(await linkUnknownSpeakers(unknown, recording, [segmentsPath, markdownPath], options)).toBe(2);
+      expect(await linkUnknownSpeakers(otherUnknown, other, [otherPath], options)).toBe(1);
+
+      await enrollSpeaker('Alice', writeVoiceWav(path.join(testDir, 'alice.wav'), [
+        { ...VOICE_ALICE, seconds: 5, phase: 1 }
+      ]), options);
+
+      const unchanged = () => {
+        expect(fs.readFileSync(segmentsPath, 'utf8')).toBe(before.segments);
+        expect(fs.readFileSync(markdownPath, 'utf8')).toBe(before.markdown);
+        expect(fs.readFileSync(otherPath, 'utf8')).toBe(before.other);
+      };
+
+      // No stored voice matches Bob
+      const noMatch = await relabelSpeaker('Bob', options);
+      expect(noMatch.clusters).toEqual([]);
+      expect(noMatch.entriesRelabelled).toBe(0);
+      unchanged();
+
+      // Dry run reports the match but writes nothing
+      const dryRun = await relabelSpeaker('Alice', { ...options, dryRun: true });
+      expect(dryRun.dryRun).toBe(true);
+      expect(dryRun.clusters.length).toBe(1);
+      expect(dryRun.entriesRelabelled).toBe(0);
+      expect(dryRun.filesRewritten).toEqual([]);
+      unchanged();
+
+      const result = await relabelSpeaker('Alice', options);
+      expect(result.name).toBe('Alice');
+      expect(result.entriesRelabelled).toBe(1);
+      expect(result.filesRewritten).toEqual([markdownPath, segmentsPath].sort());
+
+      // Only timestamped "Speaker 1: " lines change
+      expect(fs.readFileSync(segmentsPath, 'utf8')).toBe([
+        '[00:00.000 - 00:04.000] Speaker 0: Shall we start?',
+        '[00:04.000 - 00:08.000] Alice: Yes, the routing matrix first.',
+        '[00:08.000 - 00:12.000] Speaker 0: Fine.',
+        '[00:12.000 - 00:16.000] Alice: Then the release.',
+        '[00:16.000 - 00:17.500] Speaker 10: Another diarized speaker.',
+        'Speaker 1: not a segment line',
+        ''
+      ].join('\n'));
+      expect(fs.readFileSync(markdownPath, 'utf8')).toBe(
+        before.markdown.replace('] Speaker 1: Quoted', '] Alice: Quoted')
+      );
+      expect(fs.readFileSync(otherPath, 'utf8')).toBe(before.other);
+
+      // Already labelled entries are not rewritten again
+      const again = await relabelSpeaker('Alice', options);
+      expect(again.entriesRelabelled).toBe(0);
+      expect(again.filesRewritten).toEqual([]);
+    });
+
+    test('refuses unknown speakers recorded with another embedding backend', async () => {
+      const options = { profilesDir: path.join(testDir, 'profiles'), backend: 'stub' };
+      await enrollSpeaker('Alice', writeVoiceWav(path.join(testDir, 'alice.wav'), [
+        { ...VOICE_ALICE, seconds: 4 }
+      ]), options);
+
+      // A store left behind by the pyannote backend (512-d embeddings)
+      const segmentsPath = path.join(testDir, 'old_segments.txt');
+      const segments = '[00:00.000 - 00:04.000] Speaker 0: Recorded with pyannote.\n';
+      fs.writeFileSync(segmentsPath, segments);
+      const storeDir = path.join(testDir, '.summarai', 'unknown-speakers');
+      fs.mkdirSync(storeDir, { recursive: true });
+      fs.writeFileSync(path.join(storeDir, 'index.json'), JSON.stringify({
+        version: '1.0',
+        embedding_version: 'pyannote/wespeaker-voxceleb-resnet34-LM@1',
+        entries: [{
+          id: 'u1', recording: path.join(testDir, 'old.wav'), speaker_id: 'speaker_0',
+          cluster: 'c1', outputs: [segmentsPath], label: null
+        }],
+        clusters: [{ id: 'c1', count: 1, label: null }]
+      }));
+      const written = spawnSync('python3', ['-c', [
+        'import numpy as np, sys',
+        'row = np.ones((1, 512), dtype=np.float32) / np.sqrt(512)',
+        'np.save(sys.argv[1] + "/embeddings.npy", row)',
+        'np.save(sys.argv[1] + "/centroids.npy", row)'
+      ].join('\n'), storeDir]);
+      expect(written.status).toBe(0);
+
+      await expect(relabelSpeaker('Alice', options)).rejects.toThrow(/embedding version/);
+      await expect(relabelSpeaker('Alice', { ...options, dryRun: true })).rejects.toThrow(/embedding version/);
+      expect(fs.readFileSync(segmentsPath, 'utf8')).toBe(segments);
+    });
+  });
+});
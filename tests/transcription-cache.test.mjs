@@ -0,0 +1,87 @@
+#!/usr/bin/env bun
+
+/**
+ * Tests for the content-addressed transcription cache
+ */
+
+import { describe, test, expect, beforeAll, afterAll } from 'bun:test';
+import fs from 'fs';
+import path from 'path';
+import os from 'os';
+
+let testDir;
+let originalHome;
+let cache;
+
+beforeAll(async () => {
+  testDir = fs.mkdtempSync(path.join(os.tmpdir(), 'summarai-cache-test-'));
+  // The default cache directory lives under the home directory
+  originalHome = process.env.HOME;
+  process.env.HOME = testDir;
+  cache = await import('../src/transcriptionCache.mjs');
+});
+
+afterAll(() => {
+  process.env.HOME = originalHome;
+  fs.rmSync(testDir, { recursive: true, force: true });
+});
+
+function writeAudio(name, fill) {
+  const audioPath = path.join(testDir, name);
+  fs.writeFileSync(audioPath, Buffer.alloc(4096, fill));
+  return audioPath;
+}
+
+describe('Transcription Cache', () => {
+  test('returns the cached response for identical audio and options', async () => {
+    const audioPath = writeAudio('a.m4a', 1);
+    let calls = 0;
+    const transcribe = async () => ({ text: `call ${++calls}` });
+
+    const first = await cache.withTranscriptionCache(audioPath, { service: 'scribe', modelId: 'scribe_v1' }, transcribe);
+    // Same content under another name, options in a different order
+    const copy = writeAudio('copy.m4a', 1);
+    const second = await cache.withTranscriptionCache(copy, { modelId: 'scribe_v1', service: 'scribe' }, transcribe);
+
+    expect(first).toEqual({ text: 'call 1' });
+    expect(second).toEqual({ text: 'call 1' });
+    expect(calls).toBe(1);
+  });
+
+  test('misses when audio or options differ', async () => {
+    const audioPath = writeAudio('b.m4a', 2);
+    let calls = 0;
+    const transcribe = async () => ({ text: `call ${++calls}` });
+
+    await cache.withTranscriptionCache(audioPath, { service: 'scribe', modelId: 'scribe_v1' }, transcribe);
+    await cache.withTranscriptionCache(audioPath, { service: 'scribe', modelId: 'scribe_v2' }, transcribe);
+    await cache.withTranscriptionCache(writeAudio('c.m4a', 3), { service: 'scribe', modelId: 'scribe_v1' }, transcribe);
+
+    expect(calls).toBe(3);
+  });
+
+  test('is bypassed when disabled', async () => {
+    const audioPath = writeAudio('d.m4a', 4);
+    let calls = 0;
+    const transcribe = async () => ({ text: `call ${++calls}` });
+
+    await cache.withTranscriptionCache(audioPath, { service: 'whisper' }, transcribe);
+    cache.setTranscriptionCacheEnabled(false);
+    try {
+      await cache.withTranscriptionCache(audioPath, { service: 'whisper' }, transcribe);
+    } finally {
+      cache.setTranscriptionCacheEnabled(true);
+    }
+
+    expect(calls).toBe(2);
+  });
+
+  test('does not cache failed transcriptions', async () => {
+    const audioPath = writeAudio('e.m4a', 5);
+    const failing = async () => { throw new Error('quota exceeded'); };
+
+    await expect(cache.withTranscriptionCache(audioPath, { service: 'scribe' }, failing)).rejects.toThrow('quota exceeded');
+    expect(await cache.withTranscriptionCache(audioPath, { service: 'scribe' }, async () => ({ text: 'ok' })))
+      .toEqual({ text: 'ok' });
+  });
+});
@@ -13,11 +13,13 @@ import { stdin as input, stdout as output } from 'process';
 import { promisify } from 'util';
 import { sendToClaude } from './claudeAPI.mjs';
 import { transcribeWithWhisper } from './whisperAPI.mjs';
-import { transcribeWithScribe, createSegmentsContent } from './scribeAPI.mjs';
-import { convertToTempAAC, cleanupTempDir, splitAudioFile } from './audioProcessing.mjs';
-import { startSpinner, sanitizeFilename } from './utils.mjs';
+import { transcribeWithScribe, createSegmentsContent, speakerPromptNote } from './scribeAPI.mjs';
+import { convertToTempAAC, cleanupTempDir, splitAudioChunks, readTimeline, remapTranscriptionTimes } from './audioProcessing.mjs';
+import { startSpinner, sanitizeFilename, isYouTubeUrl } from './utils.mjs';
 import { loadConfig, getConfigValue } from './configLoader.mjs';
 import { appendRecord, loadIndex } from './src/processHistory.mjs';
+import { linkUnknownSpeakers } from './speakerIdentification.mjs';
+import { setTranscriptionCacheEnabled } from './src/transcriptionCache.mjs';
 import {
   ProcessingError,
   FileSystemError,
@@ -43,6 +45,9 @@ import {
 } from './src/validation.mjs';
 import logger, { LogCategory, LogStatus } from './src/logger.mjs';
 
+// Lives in utils.mjs so the CLI can recognize YouTube arguments without loading this module
+export { isYouTubeUrl };
+
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
@@ -364,6 +369,8 @@ export async function processVoiceMemo(filePath, options = {}) {
       lowQuality: lowQuality
     });
     usedTemp = true;
+    // Present when silence was cut; maps transcript times back to the recording
+    const timeline = readTimeline(tempAACPath);
     logger.processing(LogCategory.PROCESSING, `Processing file: ${originalFileName}`);
     // Get file size for logging
     const tempStats = fs.statSync(tempAACPath);
@@ -385,7 +392,7 @@ export async function processVoiceMemo(filePath, options = {}) {
       if (fileSizeMB > maxSizeMB) {
         console.log(`Audio file size (${fileSizeMB.toFixed(2)} MB) exceeds Whisper API limit of ${maxSizeMB} MB`);
         // Split the audio file into chunks
-        audioPathsToProcess = await splitAudioFile(tempAACPath, chunksDir, maxSizeMB);
+        audioPathsToProcess = await splitAudioChunks(tempAACPath, chunksDir, maxSizeMB);
         console.log(`Split audio into ${audioPathsToProcess.length} chunks for processing`);
       } else {
         audioPathsToProcess = [tempAACPath];
@@ -394,6 +401,7 @@ export async function processVoiceMemo(filePath, options = {}) {
       
       // Use verbose mode to get timestamps and detailed JSON
       transcriptionData = await transcribeWithWhisper(audioPathsToProcess, true);
+      remapTranscriptionTimes(transcriptionData, timeline);
       
       // Extract the text transcript from the response
       transcript = transcriptionData.text;
@@ -480,6 +488,9 @@ export async function processVoiceMemo(filePath, options = {}) {
         tagAudioEvents: true,
         verbose: true
       });
+      // Speaker identification has already taken the segments' times in the
+      // converted audio (it reads that audio), so remapping in place is safe
+      remapTranscriptionTimes(transcriptionData, timeline);
       
       // Extract the text transcript
       transcript = transcriptionData.text;
@@ -497,7 +508,17 @@ export async function processVoiceMemo(filePath, options = {}) {
   
     // Send to Claude and write output (markdown + audio)
     // Pass the original filePath for metadata, but tempAACPath for copying the actual file
-    const { finalName, targetDir, mdFilePath } = await sendToClaude(transcript, filePath, recordingDateTimePrefix, recordingDateTime, outputPath || OUTPUT_DIR, originalFileName, tempAACPath);
+    const { finalName, targetDir, mdFilePath } = await sendToClaude(transcript, filePath, recordingDateTimePrefix, recordingDateTime, outputPath || OUTPUT_DIR, originalFileName, tempAACPath, null, {
+      segments: transcriptionData?.segments,
+      transcriptNote: speakerPromptNote(transcriptionData)
+    });
+
+    // Overlapped speaker identification ran alongside summarization - the
+    // segments need its names before they are written
+    if (transcriptionData?.pendingSpeakerMapping) {
+      await transcriptionData.pendingSpeakerMapping;
+      segmentsContent = createSegmentsContent(transcriptionData);
+    }
     
     // Write segments to a separate file (only if enabled by config or override)
     if (shouldCreateSegmentsFile) {
@@ -511,6 +532,14 @@ export async function processVoiceMemo(filePath, options = {}) {
       fs.appendFileSync(mdFilePath, '\n\n' + segmentsContent);
       console.log(`Timestamps appended to markdown file: ${mdFilePath}`);
     }
+
+    // Let a later `speaker relabel` find the generic labels in these outputs
+    if (transcriptionData?.unknownSpeakers) {
+      await linkUnknownSpeakers(transcriptionData.unknownSpeakers, validatedPath, [
+        ...(shouldCreateSegmentsFile ? [path.join(targetDir, `${finalName}_segments.txt`)] : []),
+        ...(mdFilePath && fs.existsSync(mdFilePath) ? [mdFilePath] : [])
+      ]);
+    }
   
     // Append NDJSON record for processed file (source-based)
     try {
@@ -661,6 +690,7 @@ export async function processYouTubeUrl(url, options = {}) {
     tempDir = path.join(os.tmpdir(), 'summarai_youtube', metadata.videoId);
     const tempAACPath = await convertToTempAAC(audioPath, tempDir, { lowQuality });
     usedTemp = true;
+    const timeline = readTimeline(tempAACPath);
 
     logger.processing(LogCategory.PROCESSING, `Processing YouTube video: ${metadata.title}`);
 
@@ -684,13 +714,14 @@ export async function processYouTubeUrl(url, options = {}) {
       const chunksDir = path.join(tempDir, 'chunks');
 
       if (fileSizeMB > maxSizeMB) {
-        audioPathsToProcess = await splitAudioFile(tempAACPath, chunksDir, maxSizeMB);
+        audioPathsToProcess = await splitAudioChunks(tempAACPath, chunksDir, maxSizeMB);
         console.log(`Split audio into ${audioPathsToProcess.length} chunks`);
       } else {
         audioPathsToProcess = [tempAACPath];
       }
 
       transcriptionData = await transcribeWithWhisper(audioPathsToProcess, true);
+      remapTranscriptionTimes(transcriptionData, timeline);
       transcript = transcriptionData.text;
       usedModel = getConfigValue(config, 'transcription.whisper.model', 'whisper-1');
 
@@ -717,6 +748,7 @@ export async function processYouTubeUrl(url, options = {}) {
         tagAudioEvents: true,
         verbose: true
       });
+      remapTranscriptionTimes(transcriptionData, timeline);
 
       transcript = transcriptionData.text;
       segmentsContent = createSegmentsContent(transcriptionData, metadata.videoUrl);
@@ -762,15 +794,26 @@ export async function processYouTubeUrl(url, options = {}) {
       outputDir,
       `${metadata.title}.m4a`,
       tempAACPath,
-      sourceMetadata
+      sourceMetadata,
+      { segments: transcriptionData?.segments, transcriptNote: speakerPromptNote(transcriptionData) }
     );
 
+    // Overlapped speaker identification ran alongside summarization
+    if (transcriptionData?.pendingSpeakerMapping) {
+      await transcriptionData.pendingSpeakerMapping;
+      segmentsContent = createSegmentsContent(transcriptionData, metadata.videoUrl);
+    }
+
     // 6. Append segments to markdown file
     if (mdFilePath && fs.existsSync(mdFilePath)) {
       fs.appendFileSync(mdFilePath, '\n\n' + segmentsContent);
       console.log(`Timestamps appended to: ${mdFilePath}`);
     }
 
+    if (transcriptionData?.unknownSpeakers && mdFilePath && fs.existsSync(mdFilePath)) {
+      await linkUnknownSpeakers(transcriptionData.unknownSpeakers, url, [mdFilePath]);
+    }
+
     // 7. Save audio and video files with same name as markdown
     let destAudioPath = null;
     let destVideoPath = null;
@@ -846,28 +889,6 @@ export async function processYouTubeUrl(url, options = {}) {
   }
 }
 
-/**
- * Check if a string looks like a YouTube URL or video ID
- * @param {string} input - String to check
- * @returns {boolean} - True if it looks like a YouTube URL or ID
- */
-export function isYouTubeUrl(input) {
-  if (!input || typeof input !== 'string') return false;
-  const trimmed = input.trim();
-
-  // Check for video ID pattern (11 characters)
-  if (/^[a-zA-Z0-9_-]{11}$/.test(trimmed)) return true;
-
-  // Check for YouTube URLs
-  try {
-    const url = new URL(trimmed.startsWith('http') ? trimmed : `https://${trimmed}`);
-    const hosts = ['youtube.com', 'www.youtube.com', 'm.youtube.com', 'youtu.be'];
-    return hosts.includes(url.hostname);
-  } catch {
-    return false;
-  }
-}
-
 /**
  * Formats seconds to a readable timestamp format (MM:SS.ms)
  * @param {number} seconds - Time in seconds
@@ -920,6 +941,8 @@ function parseCommandLineArgs() {
       if (!result.silentMode) logger.info(LogCategory.PROCESSING, 'Using OpenAI Whisper for transcription');
     } else if (arg === '--silent') {
       // Already handled above
+    } else if (arg === '--no-cache') {
+      setTranscriptionCacheEnabled(false);
     } else if (!arg.startsWith('-') && !result.filePath) {
       result.filePath = arg;
     }
@@ -958,6 +981,7 @@ Options:
   --whisper, -w       Use OpenAI Whisper for transcription
   --scribe, -s        Use ElevenLabs Scribe for transcription (default)
   --silent            Silent mode: auto-process newest unprocessed voice memo
+  --no-cache          Re-transcribe even if a cached transcription exists
 
 Examples:
   node transcribe.mjs                            # Interactive mode
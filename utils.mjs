@@ -31,3 +31,25 @@ export function startSpinner(message) {
 export function sanitizeFilename(name) {
   return _sanitizeFilename(name, { maxLength: 60 });
 }
+
+/**
+ * Check if a string looks like a YouTube URL or video ID
+ * @param {string} input - String to check
+ * @returns {boolean} - True if it looks like a YouTube URL or ID
+ */
+export function isYouTubeUrl(input) {
+  if (!input || typeof input !== 'string') return false;
+  const trimmed = input.trim();
+
+  // Check for video ID pattern (11 characters)
+  if (/^[a-zA-Z0-9_-]{11}$/.test(trimmed)) return true;
+
+  // Check for YouTube URLs
+  try {
+    const url = new URL(trimmed.startsWith('http') ? trimmed : `https://${trimmed}`);
+    const hosts = ['youtube.com', 'www.youtube.com', 'm.youtube.com', 'youtu.be'];
+    return hosts.includes(url.hostname);
+  } catch {
+    return false;
+  }
+}
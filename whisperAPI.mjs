@@ -4,6 +4,8 @@ import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
 import { startSpinner } from './utils.mjs';
+import { withLimit } from './src/rateLimiter.mjs';
+import { withTranscriptionCache } from './src/transcriptionCache.mjs';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -89,15 +91,20 @@ async function transcribeSingleFile(audioFilePath, verbose = false) {
   }
 
   try {
-    const response = await axios.post('https://api.openai.com/v1/audio/transcriptions', form, {
-      headers: {
-        ...form.getHeaders(),
-        'Authorization': `Bearer ${OPENAI_API_KEY}`,
-      }
+    // Identical audio + request reuse a cached response instead of paying again
+    const cacheParams = { service: 'whisper', model: 'whisper-1', prompt: nomenclaturePrompt, verbose };
+    const data = await withTranscriptionCache(audioFilePath, cacheParams, async () => {
+      const response = await withLimit('openai', () => axios.post('https://api.openai.com/v1/audio/transcriptions', form, {
+        headers: {
+          ...form.getHeaders(),
+          'Authorization': `Bearer ${OPENAI_API_KEY}`,
+        }
+      }), path.basename(audioFilePath));
+      return response.data;
     });
-    
+
     // Return full response data if verbose mode is enabled, otherwise just the text
-    return verbose ? response.data : response.data.text;
+    return verbose ? data : data.text;
   } catch (err) {
     throw new Error(`Transcription error: ${JSON.stringify(err.response?.data || err.message, null, 2)}`);
   }
@@ -106,9 +113,11 @@ async function transcribeSingleFile(audioFilePath, verbose = false) {
 /**
  * Combines multiple transcription responses into a single response
  * @param {Array<Object>} transcriptions - Array of transcription responses in verbose JSON format
+ * @param {Array<number|null>} [offsets] - Start of each chunk in the original audio (seconds);
+ *   without one a chunk is assumed to start where the previous chunk's last segment ended
  * @returns {Object} - Combined transcription response
  */
-function combineTranscriptions(transcriptions) {
+function combineTranscriptions(transcriptions, offsets = []) {
   if (!transcriptions || transcriptions.length === 0) {
     throw new Error('No transcriptions to combine');
   }
@@ -138,10 +147,11 @@ function combineTranscriptions(transcriptions) {
     
     // Adjust segment timestamps and add to combined segments
     if (transcription.segments && Array.isArray(transcription.segments)) {
+      const offset = Number.isFinite(offsets[chunkIndex]) ? offsets[chunkIndex] : lastEndTime;
       const adjustedSegments = transcription.segments.map(segment => ({
         ...segment,
-        start: segment.start + lastEndTime,
-        end: segment.end + lastEndTime
+        start: segment.start + offset,
+        end: segment.end + offset
       }));
       
       combined.segments.push(...adjustedSegments);
@@ -159,13 +169,18 @@ function combineTranscriptions(transcriptions) {
 
 /**
  * Transcribes audio using OpenAI's Whisper API, handling multiple file chunks if necessary
- * @param {string|Array<string>} audioFilePaths - Path to the audio file or array of paths to transcribe
+ * Chunks are uploaded concurrently (bounded by api.rateLimits.openai) and
+ * stitched back together in order
+ * @param {string|Array<string|{path: string, start: number}>} audioFilePaths - Path to the audio file,
+ *   or chunks to transcribe (paths, or chunks from splitAudioChunks with their start offsets)
  * @param {boolean} [verbose=false] - Whether to return verbose JSON with timestamps
  * @returns {Promise<string|Object>} - Transcription text or full JSON response with timestamps
  */
 export async function transcribeWithWhisper(audioFilePaths, verbose = false) {
   // Handle both single file and array of files
-  const filePaths = Array.isArray(audioFilePaths) ? audioFilePaths : [audioFilePaths];
+  const chunks = (Array.isArray(audioFilePaths) ? audioFilePaths : [audioFilePaths])
+    .map(chunk => typeof chunk === 'string' ? { path: chunk, start: null } : chunk);
+  const filePaths = chunks.map(chunk => chunk.path);
   
   // Show how many files we're processing
   console.log(`Transcribing ${filePaths.length} audio file${filePaths.length > 1 ? 's' : ''}...`);
@@ -174,17 +189,15 @@ export async function transcribeWithWhisper(audioFilePaths, verbose = false) {
   const stopSpinner = startSpinner('Connecting to Whisper API and transcribing...');
   
   try {
-    // Process each file
-    const transcriptions = [];
-    for (let i = 0; i < filePaths.length; i++) {
-      const filePath = filePaths[i];
+    // Transcribe all chunks at once; the OpenAI limiter bounds how many are in flight
+    let completed = 0;
+    const transcriptions = await Promise.all(filePaths.map(async (filePath, i) => {
+      const result = await transcribeSingleFile(filePath, true); // Always use verbose for chunks
       if (filePaths.length > 1) {
-        console.log(`Processing chunk ${i+1}/${filePaths.length}: ${filePath}`);
+        console.log(`Transcribed chunk ${i+1}/${filePaths.length} (${++completed} done): ${filePath}`);
       }
-      
-      const result = await transcribeSingleFile(filePath, true); // Always use verbose for chunks
-      transcriptions.push(result);
-    }
+      return result;
+    }));
     
     stopSpinner();
     
@@ -192,7 +205,7 @@ export async function transcribeWithWhisper(audioFilePaths, verbose = false) {
     let finalResult;
     if (transcriptions.length > 1) {
       console.log('Combining transcriptions from multiple chunks...');
-      finalResult = combineTranscriptions(transcriptions);
+      finalResult = combineTranscriptions(transcriptions, chunks.map(chunk => chunk.start));
     } else {
       finalResult = transcriptions[0];
     }